@@ -1,7 +1,8 @@
 import os
 os.environ["ANONYMIZED_TELEMETRY"] = "false"
 
-import yfinance as yf # type: ignore
+import yahoo
+from info_cache import get_info
 from datetime import datetime
 import pytz
 import asyncio
@@ -35,22 +36,21 @@ async def browser_monitor(browser: Browser):
 async def get_stock_price(ticker: str):
     try:
         sym = f"{ticker.upper()}.AX" if not ticker.upper().endswith(".AX") else ticker.upper()
-        stock = yf.Ticker(sym).fast_info
-        return {"price": stock.last_price, "change": ((stock.last_price - stock.previous_close)/stock.previous_close)*100}
+        stock = yahoo.quote(sym)
+        return {"price": stock["last_price"], "change": ((stock["last_price"] - stock["previous_close"])/stock["previous_close"])*100}
     except Exception as e: return f"Error: {e}"
 
 async def get_company_info(ticker: str):
     try:
         sym = f"{ticker.upper()}.AX"
-        info = yf.Ticker(sym).info
+        info = get_info(sym, ("longBusinessSummary", "sector"))
         return {"description": info.get('longBusinessSummary','N/A')[:500]+"...", "sector": info.get('sector','N/A')}
     except Exception as e: return f"Error: {e}"
 
 async def get_financials(ticker: str):
     try:
         sym = f"{ticker.upper()}.AX"
-        stock = yf.Ticker(sym)
-        fin = stock.income_stmt
+        fin = yahoo.ticker_data(sym, "income_stmt")
         if fin.empty: return "No data"
         recent = fin.iloc[:, 0]
         return {"Revenue": recent.get("Total Revenue"), "Net Income": recent.get("Net Income")}
@@ -0,0 +1,168 @@
+import asyncio
+from sqlalchemy.orm import Session # type: ignore
+import yahoo
+from database import SessionLocal
+from order_book import PriceLevels, remove_on_commit
+from event_bus import publish_on_commit
+import models
+
+# how often the monitor polls yfinance for alerts the ingestor can't see (seconds)
+ALERT_CHECK_INTERVAL = 10
+
+# price alerts, "REMINDER" alerts have no price condition
+PRICE_CONDITIONS = ("ABOVE", "BELOW")
+
+class AlertIndex:
+    """
+    ACTIVE price alerts per ticker as two sorted threshold lists
+    triggered alerts leave the index, so every ABOVE target is over the last
+    price and every BELOW target under it. a move p0 -> p1 therefore fires
+    exactly the targets in the crossed interval, found with one bisect each
+    """
+    def __init__(self, model):
+        self.model = model
+        self.books: dict[str, dict[str, PriceLevels]] = {}
+        self.alerts: dict[int, tuple[str, str, float, str | None]] = {} # id -> (ticker, condition, target, session_id)
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def tickers(self) -> set[str]:
+        return set(self.books)
+
+    def add(self, alert):
+        if alert.condition not in PRICE_CONDITIONS or alert.target_price is None or alert.id in self.alerts:
+            return
+        book = self.books.setdefault(alert.ticker, {"ABOVE": PriceLevels(), "BELOW": PriceLevels()})
+        book[alert.condition].add(alert.target_price, alert.id)
+        self.alerts[alert.id] = (alert.ticker, alert.condition, alert.target_price, getattr(alert, "session_id", None))
+
+    def remove(self, alert_id: int):
+        entry = self.alerts.pop(alert_id, None)
+        if entry is None:
+            return
+        ticker, condition, target, _ = entry
+        book = self.books.get(ticker)
+        if book is None:
+            return
+        book[condition].remove(target, alert_id)
+        if not book["ABOVE"] and not book["BELOW"]:
+            del self.books[ticker]
+
+    def remove_on_commit(self, db, alert_id: int):
+        """remove() once db's transaction commits, a trigger that's rolled back keeps the alert indexed"""
+        remove_on_commit(db, self, alert_id)
+
+    def crossed(self, ticker: str, price: float) -> list[int]:
+        """ids of the alerts on `ticker` that `price` fires, O(log n + k)"""
+        book = self.books.get(ticker)
+        if book is None or not price:
+            return []
+        return book["ABOVE"].at_or_below(price) + book["BELOW"].at_or_above(price)
+
+    def rebuild(self, db=None):
+        """reloads the index from the ACTIVE rows (startup)"""
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            self.books.clear()
+            self.alerts.clear()
+            for alert in db.query(self.model).filter(self.model.status == "ACTIVE").all():
+                self.add(alert)
+        finally:
+            if own_session:
+                db.close()
+        print(f"🔔 [Alerts] indexed {len(self.alerts)} {self.model.__tablename__} on {len(self.books)} tickers")
+
+alert_index = AlertIndex(models.Alert)
+
+# display mode alerts, fired by the price simulator
+session_alert_index = AlertIndex(models.SessionAlert)
+
+def check_alerts(db: Session, index: AlertIndex, prices: dict[str, float]) -> int:
+    """
+    triggers the ACTIVE price alerts in `index` crossed by `prices` (ticker -> latest price)
+    live prices go to alert_index, simulated ones to session_alert_index, so a demo tick
+    never fires a real alert (or the other way round)
+    only touches the rows that fire, the caller commits (fired alerts leave the index once it does)
+    returns the number of alerts triggered
+    """
+    if not index.alerts:
+        return 0
+    fired = []
+    for ticker, current_price in prices.items():
+        for alert_id in index.crossed(ticker, current_price):
+            _, condition, target, session_id = index.alerts[alert_id]
+            print(f"🚨 [Alerts] triggered: {ticker} is {condition} {target} (Current: {current_price})")
+            publish_on_commit(db, f"alerts:{session_id}" if session_id else "alerts", "alert", {
+                "id": alert_id,
+                "ticker": ticker,
+                "condition": condition,
+                "target_price": target,
+                "price": current_price,
+            })
+            fired.append(alert_id)
+    if not fired:
+        return 0
+
+    db.query(index.model).filter(
+        index.model.id.in_(fired),
+        index.model.status == "ACTIVE"
+    ).update({index.model.status: "TRIGGERED"}, synchronize_session=False)
+    for alert_id in fired:
+        index.remove_on_commit(db, alert_id)
+    return len(fired)
+
+def fetch_last_prices(tickers: list[str]) -> dict[str, float]:
+    """latest intraday price for each ticker in one batched yfinance call"""
+    if not tickers:
+        return {}
+    symbols = [f"{t}.AX" for t in tickers]
+    try:
+        data = yahoo.download(symbols, period="1d", interval="1m", threads=True)['Close']
+    except Exception as e:
+        print(f"⚠️ [Alerts] failed to fetch prices for {len(tickers)} tickers: {e}")
+        return {}
+
+    prices = {}
+    for ticker, symbol in zip(tickers, symbols):
+        try:
+            # handle single vs multi-index dataframes
+            series = data[symbol] if len(symbols) > 1 else data
+            if hasattr(series, "columns"):
+                series = series.iloc[:, 0]
+            series = series.dropna()
+            if not series.empty:
+                prices[ticker] = float(series.iloc[-1])
+        except Exception:
+            print(f"⚠️ [Alerts] failed to fetch price for {ticker}")
+    return prices
+
+async def run_alert_monitor():
+    """
+    background sweep for alerted tickers the scraper doesn't track
+    tracked tickers fire from the tick stream (ingestor / price simulator)
+    and new alerts are checked against the current price when created
+    """
+    print("🔔 [Alerts] monitor starting...")
+    while True:
+        try:
+            # session alerts only ever fire off simulated prices (price simulator)
+            tickers = alert_index.tickers()
+            if tickers:
+                db = SessionLocal()
+                try:
+                    covered = {t for (t,) in db.query(models.Stock.ticker).filter(models.Stock.ticker.in_(tickers)).all()}
+                    uncovered = sorted(tickers - covered)
+                    if uncovered:
+                        prices = await asyncio.to_thread(fetch_last_prices, uncovered)
+                        if check_alerts(db, alert_index, prices):
+                            db.commit()
+                finally:
+                    db.close()
+
+            await asyncio.sleep(ALERT_CHECK_INTERVAL)
+
+        except Exception as e:
+            print(f"[Alerts] monitor error: {e}")
+            await asyncio.sleep(ALERT_CHECK_INTERVAL)
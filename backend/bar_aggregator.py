@@ -0,0 +1,109 @@
+from collections import deque
+from datetime import datetime, time
+import pandas as pd
+import pytz
+from tick_store import tick_store
+
+# bar sizes built from live ticks (seconds)
+BAR_INTERVALS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900
+}
+
+# completed bars kept in memory per ticker/interval (older ones are read back from the tick store)
+BAR_HISTORY = 400
+
+SYDNEY_TZ = pytz.timezone("Australia/Sydney")
+
+class BarAggregator:
+    """
+    rolls live ticks into OHLCV bars incrementally
+    bars are [start, open, high, low, close, volume] lists, start in epoch seconds
+    """
+    def __init__(self):
+        self.partial: dict[tuple[str, str], list] = {}
+        self.history: dict[tuple[str, str], deque] = {}
+        self.last_volume: dict[str, int] = {}
+
+    def _close(self, ticker: str, interval: str, bar: list):
+        key = (ticker, interval)
+        if key not in self.history:
+            self.history[key] = deque(maxlen=BAR_HISTORY)
+        self.history[key].append(bar)
+        tick_store.record_bars([(ticker, interval, *bar)])
+
+    def on_tick(self, ticker: str, ts: float, price: float, day_volume: int):
+        """
+        O(1) update of every interval's current bar
+        day_volume is the cumulative volume the scraper reports, bars get the delta
+        """
+        if not price:
+            return
+
+        prev = self.last_volume.get(ticker)
+        # first tick or a new session (cumulative volume reset)
+        volume = 0 if prev is None else (day_volume - prev if day_volume >= prev else day_volume)
+        self.last_volume[ticker] = day_volume
+
+        for interval, seconds in BAR_INTERVALS.items():
+            start = int(ts) - int(ts) % seconds
+            key = (ticker, interval)
+            bar = self.partial.get(key)
+
+            if bar is None or bar[0] != start:
+                if bar is not None:
+                    self._close(ticker, interval, bar)
+                self.partial[key] = [start, price, price, price, price, volume]
+                continue
+
+            if price > bar[2]: bar[2] = price
+            if price < bar[3]: bar[3] = price
+            bar[4] = price
+            bar[5] += volume
+
+    def roll(self, ts: float):
+        """closes partial bars whose interval has ended (tickers that stopped trading)"""
+        for (ticker, interval), bar in list(self.partial.items()):
+            if ts >= bar[0] + BAR_INTERVALS[interval]:
+                self._close(ticker, interval, bar)
+                del self.partial[(ticker, interval)]
+
+    def get_bars(self, ticker: str, interval: str, since: int) -> tuple[list, list | None]:
+        """
+        returns (completed bars, current partial bar) for a ticker since `since` (epoch seconds)
+        reads the tick store when memory doesn't reach back far enough (e.g. after a restart)
+        """
+        key = (ticker, interval)
+        memory = [b for b in self.history.get(key, ()) if b[0] >= since]
+        oldest = memory[0][0] if memory else None
+
+        if oldest is None or oldest > since:
+            stored = tick_store.query_bars(ticker, interval, since, (oldest - 1) if oldest else None)
+            memory = [list(b) for b in stored] + memory
+
+        partial = self.partial.get(key)
+        if partial and partial[0] < since:
+            partial = None
+        return memory, partial
+
+    def session_frame(self, ticker: str, interval: str) -> pd.DataFrame | None:
+        """
+        today's bars as a yfinance-shaped history frame (Datetime, Open, High, Low, Close, Volume)
+        returns None unless the local bars cover the session from the open
+        """
+        now = datetime.now(SYDNEY_TZ)
+        session_open = SYDNEY_TZ.localize(datetime.combine(now.date(), time(10, 0)))
+        since = int(session_open.timestamp())
+
+        bars, partial = self.get_bars(ticker, interval, since)
+        if partial:
+            bars = bars + [partial]
+        if not bars or bars[0][0] > since + BAR_INTERVALS[interval]:
+            return None
+
+        frame = pd.DataFrame(bars, columns=["Datetime", "Open", "High", "Low", "Close", "Volume"])
+        frame["Datetime"] = pd.to_datetime(frame["Datetime"], unit="s", utc=True).dt.tz_convert(SYDNEY_TZ)
+        return frame
+
+bar_aggregator = BarAggregator()
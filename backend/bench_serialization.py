@@ -0,0 +1,147 @@
+"""
+before/after for the json response path
+old: python lists/dicts (iterrows, .tolist()) -> jsonable_encoder -> json.dumps
+new: pandas/numpy/ORM objects -> FastJSONResponse (orjson), then gzip/brotli on the wire
+
+runs offline: /stocks uses a scratch copy of kangaroo.db (or DATABASE_URL's sqlite file), the yfinance-backed
+payloads are synthetic at the real sizes
+usage: python bench_serialization.py [repeats]
+"""
+import atexit
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# run_migrations() alters / backfills the db it's pointed at, so point it at a copy
+# (before database.py is imported, it reads DATABASE_URL once)
+SOURCE_URL = os.getenv("DATABASE_URL", "sqlite:///./kangaroo.db")
+if SOURCE_URL.startswith("sqlite:///"):
+    _scratch_dir = tempfile.mkdtemp(prefix="bench-serialization-")
+    atexit.register(shutil.rmtree, _scratch_dir, ignore_errors=True)
+    _scratch_db = os.path.join(_scratch_dir, "bench.db")
+    if os.path.exists(SOURCE_URL.removeprefix("sqlite:///")):
+        shutil.copyfile(SOURCE_URL.removeprefix("sqlite:///"), _scratch_db)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_scratch_db}"
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from database import SessionLocal
+from migrations import run_migrations
+from responses import FastJSONResponse, GZIP_LEVEL, BROTLI_QUALITY, brotli
+import models
+
+REPEATS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+def _history_frame(days: int) -> pd.DataFrame:
+    """what /stock/{t}/history has after the indicators, yfinance daily bars"""
+    rng = np.random.default_rng(1)
+    close = 40 * np.exp(np.cumsum(rng.normal(0, 0.015, days)))
+    hist = pd.DataFrame({
+        "Date": pd.bdate_range(end="2026-06-30", periods=days, tz="Australia/Sydney"),
+        "Open": close * (1 + rng.normal(0, 0.003, days)),
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 9_000_000, days),
+    })
+    hist['SMA_50'] = hist['Close'].rolling(window=50).mean()
+    hist['SMA_200'] = hist['Close'].rolling(window=200).mean()
+    hist['EMA_20'] = hist['Close'].ewm(span=20, adjust=False).mean()
+    hist['BB_Middle'] = hist['Close'].rolling(window=20).mean()
+    std_dev = hist['Close'].rolling(window=20).std()
+    hist['BB_Upper'] = hist['BB_Middle'] + (2 * std_dev)
+    hist['BB_Lower'] = hist['BB_Middle'] - (2 * std_dev)
+    return hist
+
+def history_before(hist: pd.DataFrame):
+    hist = hist.replace({float('nan'): None})
+    data = []
+    for index, row in hist.iterrows():
+        data.append({
+            "time": row['Date'].strftime('%Y-%m-%d'),
+            "open": row['Open'], "high": row['High'], "low": row['Low'], "close": row['Close'],
+            "volume": row['Volume'],
+            "sma50": row.get('SMA_50'), "sma200": row.get('SMA_200'), "ema20": row.get('EMA_20'),
+            "bb_upper": row.get('BB_Upper'), "bb_lower": row.get('BB_Lower'),
+        })
+    return data
+
+def history_after(hist: pd.DataFrame):
+    return pd.DataFrame({
+        "time": hist['Date'].dt.strftime('%Y-%m-%d'),
+        "open": hist['Open'], "high": hist['High'], "low": hist['Low'], "close": hist['Close'],
+        "volume": hist['Volume'],
+        "sma50": hist['SMA_50'], "sma200": hist['SMA_200'], "ema20": hist['EMA_20'],
+        "bb_upper": hist['BB_Upper'], "bb_lower": hist['BB_Lower'],
+    })
+
+def compare_payload(hists: list[pd.DataFrame], as_lists: bool):
+    """/compare: two 1y close series plus their dates"""
+    side = {}
+    for key, hist in zip(("stock_1", "stock_2"), hists):
+        history, dates = hist['Close'], hist.index.strftime('%Y-%m-%d')
+        if as_lists:
+            history, dates = history.tolist(), dates.tolist()
+        side[key] = {"ticker": key, "metrics": {"price": float(hist['Close'].iloc[-1])}, "history": history, "dates": dates}
+    return {**side, "correlation": {"score": np.float64(0.41)}, "winner": "TIE"}
+
+def galaxy_corr(n: int) -> np.ndarray:
+    """6m daily return correlations with a common market factor"""
+    rng = np.random.default_rng(2)
+    returns = pd.DataFrame(rng.normal(0, 0.01, (126, n)) + rng.normal(0, 0.01, (126, 1)))
+    return returns.corr().to_numpy()
+
+def galaxy_payload(stocks, corr: np.ndarray):
+    """/market-galaxy: 100 nodes, links above the threshold"""
+    nodes = [{"id": s.ticker, "name": s.name, "sector": s.sector or "Other", "marketCap": s.market_cap_value or 0.0, "price": s.price, "change": s.change_percent_value or 0.0} for s in stocks]
+    links = [
+        {"source": stocks[i].ticker, "target": stocks[j].ticker, "correlation": round(corr[i, j], 3)}
+        for i in range(len(stocks)) for j in range(i + 1, len(stocks)) if abs(corr[i, j]) >= 0.3
+    ]
+    return {"nodes": nodes, "links": links, "threshold": 0.3}
+
+def _timed(fn) -> tuple[float, bytes]:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, body
+
+def run():
+    run_migrations()
+    db = SessionLocal()
+    try:
+        stocks = db.query(models.Stock).order_by(models.Stock.market_cap_value.desc().nulls_last()).all()
+    finally:
+        db.close()
+    hist = _history_frame(504)
+    compare_hists = [_history_frame(252).set_index("Date") for _ in range(2)]
+    galaxy_stocks = stocks[:100]
+    corr = galaxy_corr(len(galaxy_stocks))
+
+    # name -> (build the old content, build the new content)
+    cases = {
+        "/market-galaxy": (lambda: galaxy_payload(galaxy_stocks, corr), lambda: galaxy_payload(galaxy_stocks, corr)),
+        "/stock/{t}/history?period=2y": (lambda: history_before(hist), lambda: history_after(hist)),
+        "/compare": (lambda: compare_payload(compare_hists, True), lambda: compare_payload(compare_hists, False)),
+        "/stocks": (lambda: stocks, lambda: stocks),
+    }
+
+    print(f"best of {REPEATS}, build + encode, ms / bytes")
+    print(f"{'endpoint':<30}{'before ms':>10}{'after ms':>10}{'speedup':>9}{'json':>10}{'gzip':>9}{'br':>9}")
+    for name, (before, after) in cases.items():
+        old_ms, old_body = _timed(lambda: json.dumps(jsonable_encoder(before())).encode())
+        new_ms, new_body = _timed(lambda: FastJSONResponse(after()).body)
+        assert json.loads(old_body) == json.loads(new_body), name
+        gz = len(gzip.compress(new_body, compresslevel=GZIP_LEVEL))
+        br = len(brotli.compress(new_body, quality=BROTLI_QUALITY)) if brotli else "-"
+        print(f"{name:<30}{old_ms:>10.2f}{new_ms:>10.2f}{old_ms / new_ms:>8.1f}x{len(new_body):>10}{gz:>9}{br:>9}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,244 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+# warm chromium processes shared by every playwright consumer
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+
+# max pages open at once across the whole process
+MAX_CONCURRENT_PAGES = int(os.getenv("MAX_CONCURRENT_PAGES", "6"))
+
+# how long a caller waits for a free page before giving up (seconds)
+PAGE_WAIT_TIMEOUT = 30
+
+# default max time a page may be held before the lease is cancelled (seconds)
+PAGE_HOLD_TIMEOUT = 120
+
+# contexts are recycled after this many pages so cookies/cache don't grow forever
+CONTEXT_MAX_PAGES = 50
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled", # bypass bot detection (recaptcha)
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-infobars",
+    "--disable-gpu",
+    "--disable-accelerated-2d-canvas",
+    "--window-size=1920,1080",
+]
+
+# context settings per kind of consumer
+PROFILES = {
+    "default": {
+        "user_agent": USER_AGENT,
+    },
+    # google news needs to look like a real aussie desktop browser
+    "stealth": {
+        "user_agent": USER_AGENT,
+        "viewport": {"width": 1920, "height": 1080},
+        "device_scale_factor": 1,
+        "is_mobile": False,
+        "has_touch": False,
+        "locale": "en-AU",
+        "timezone_id": "Australia/Sydney",
+        "permissions": ["geolocation"],
+        "java_script_enabled": True,
+    },
+}
+
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+"""
+
+class _Slot:
+    """one warm browser and the contexts opened on it"""
+    def __init__(self):
+        self.browser: Browser | None = None
+        self.contexts: dict[str, BrowserContext] = {}
+        self.context_pages: dict[str, int] = {}
+        self.opening: dict[str, int] = {} # profile -> pages being opened (new_page in flight, not leased yet)
+
+    def healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+class BrowserPool:
+    def __init__(self):
+        self.playwright = None
+        self.slots = [_Slot() for _ in range(BROWSER_POOL_SIZE)]
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+        self.lock = asyncio.Lock()
+        self.next_slot = 0
+        self.leases: dict[Page, tuple[_Slot, str]] = {}
+        self.stats = {"leases": 0, "timeouts": 0, "relaunches": 0}
+
+    async def _launch(self, slot: _Slot):
+        if slot.browser is not None:
+            self.stats["relaunches"] += 1
+            print("[🌐] browser crashed or disconnected, relaunching...")
+            # a disconnected browser can still have a live chromium process behind it
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+            slot.browser = None
+        slot.contexts.clear()
+        slot.context_pages.clear()
+        slot.browser = await self.playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+
+    async def start(self):
+        """launches the warm browsers (safe to call more than once)"""
+        async with self.lock:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            for slot in self.slots:
+                if not slot.healthy():
+                    await self._launch(slot)
+        print(f"[🌐] browser pool ready ({len(self.slots)} browsers, {MAX_CONCURRENT_PAGES} pages max)")
+
+    async def warm_up(self):
+        """start() for the lifespan, a missing/broken chromium shouldn't stop the api booting"""
+        try:
+            await self.start()
+        except Exception as e:
+            print(f"[🌐] browser pool warm-up failed, will retry on first use: {e}")
+
+    async def stop(self):
+        async with self.lock:
+            for slot in self.slots:
+                if slot.browser:
+                    try:
+                        await slot.browser.close()
+                    except Exception:
+                        pass
+                slot.browser = None
+                slot.contexts.clear()
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
+
+    async def _context(self, profile: str) -> tuple[_Slot, BrowserContext]:
+        """round-robins over the browsers, relaunching crashed ones and reusing contexts"""
+        async with self.lock:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+
+            slot = self.slots[self.next_slot % len(self.slots)]
+            self.next_slot += 1
+            if not slot.healthy():
+                await self._launch(slot)
+
+            context = slot.contexts.get(profile)
+            if context is not None and slot.context_pages[profile] >= CONTEXT_MAX_PAGES and not slot.opening.get(profile) and not any(
+                s is slot and p == profile for s, p in self.leases.values()
+            ):
+                # recycle once nothing is using it (or opening a page on it)
+                await context.close()
+                context = None
+
+            if context is None:
+                context = await slot.browser.new_context(**PROFILES[profile])
+                if profile == "stealth":
+                    await context.add_init_script(STEALTH_SCRIPT)
+                slot.contexts[profile] = context
+                slot.context_pages[profile] = 0
+
+            slot.context_pages[profile] += 1
+            # reserved until acquire() has the page leased, so the context isn't recycled under it
+            slot.opening[profile] = slot.opening.get(profile, 0) + 1
+            return slot, context
+
+    def _opened(self, slot: _Slot, profile: str):
+        """drops the reservation _context() took"""
+        slot.opening[profile] = max(0, slot.opening.get(profile, 0) - 1)
+
+    async def _discard(self, slot: _Slot, profile: str, context: BrowserContext):
+        """a context that failed to open a page: relaunch the browser if it died, else drop the context"""
+        async with self.lock:
+            if slot.contexts.get(profile) is not context:
+                # someone already replaced it
+                return
+            if not slot.healthy():
+                await self._launch(slot)
+                return
+            slot.contexts.pop(profile, None)
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def acquire(self, profile: str = "default", wait_timeout: float = PAGE_WAIT_TIMEOUT) -> Page:
+        """
+        leases a fresh page on a warm browser
+        waits up to wait_timeout for a free slot under the global page cap
+        """
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=wait_timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise TimeoutError(f"no browser page free after {wait_timeout}s")
+
+        try:
+            slot, context = await self._context(profile)
+            try:
+                page = await context.new_page()
+            except Exception:
+                # browser or context died between the health check and now, retry once on a fresh one
+                self._opened(slot, profile)
+                await self._discard(slot, profile, context)
+                slot, context = await self._context(profile)
+                try:
+                    page = await context.new_page()
+                except BaseException:
+                    self._opened(slot, profile)
+                    raise
+            except BaseException:
+                self._opened(slot, profile)
+                raise
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+        self.leases[page] = (slot, profile)
+        self._opened(slot, profile)
+        self.stats["leases"] += 1
+        return page
+
+    async def release(self, page: Page):
+        """closes the page and frees its slot"""
+        if self.leases.pop(page, None) is None:
+            return
+        try:
+            await page.close()
+        except Exception:
+            pass
+        finally:
+            self.semaphore.release()
+
+    @asynccontextmanager
+    async def page(self, profile: str = "default", wait_timeout: float = PAGE_WAIT_TIMEOUT, hold_timeout: float | None = PAGE_HOLD_TIMEOUT):
+        """
+        async with browser_pool.page() as page: ...
+        the lease is cancelled (TimeoutError) if held longer than hold_timeout
+        """
+        page = await self.acquire(profile, wait_timeout)
+        try:
+            async with asyncio.timeout(hold_timeout):
+                yield page
+        finally:
+            await self.release(page)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "browsers": sum(1 for s in self.slots if s.healthy()),
+            "pages_in_use": len(self.leases),
+            "max_pages": MAX_CONCURRENT_PAGES
+        }
+
+browser_pool = BrowserPool()
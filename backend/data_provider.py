@@ -0,0 +1,317 @@
+"""
+where external data comes from: yahoo (history frames, .info, calendars, statements), rss feeds,
+plain http documents and the pages the browser scrapes
+
+DATA_PROVIDER picks the implementation:
+    live      talk to the network (default)
+    record    talk to the network and save every response under FIXTURES_DIR
+    fixtures  serve the saved responses, never touching the network
+
+record a set once, then benchmark / load test offline and deterministically:
+    DATA_PROVIDER=record python -m uvicorn main:app   # hit the endpoints you care about
+    DATA_PROVIDER=fixtures HISTORY_DB=./bench_history.db INFO_CACHE_DB=./bench_info.db python -m uvicorn main:app
+
+layout: FIXTURES_DIR/{bars,history,ticker,quote,rss,http,html}/<name>
+history frames are kept per symbol and interval, recordings of the same symbol merge, and requests
+are answered by trimming to the asked period counted back from the last recorded bar
+
+frames and ticker attributes are pickled (.info dicts, statements, holders... aren't all json/parquet
+friendly) and unpickling runs code, so only point FIXTURES_DIR at fixtures you recorded yourself
+"""
+import hashlib
+import json
+import os
+import re
+import urllib.parse
+from abc import ABC, abstractmethod
+import feedparser # type: ignore
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf # type: ignore
+
+DATA_PROVIDER = os.getenv("DATA_PROVIDER", "live").lower()
+FIXTURES_DIR = os.getenv("FIXTURES_DIR", "./fixtures")
+
+class FixtureMissing(LookupError):
+    """nothing recorded for a request in fixtures mode"""
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)
+
+def _url_name(url: str, ext: str) -> str:
+    """readable host/path prefix + hash of the full url"""
+    parts = urllib.parse.urlsplit(url)
+    slug = _safe(f"{parts.netloc}{parts.path}")[:60]
+    return f"{slug}-{hashlib.sha1(url.encode()).hexdigest()[:10]}.{ext}"
+
+def _bars_name(symbol: str, kwargs: dict) -> str:
+    """yf.download fixture per symbol, the options that change the bars are part of the name"""
+    name = f"{symbol}_{kwargs.get('interval', '1d')}"
+    if not kwargs.get("auto_adjust", True):
+        name += "_raw"
+    if kwargs.get("actions", False):
+        name += "_actions"
+    return _safe(name) + ".pkl"
+
+PERIOD_PATTERN = re.compile(r"(\d+)(d|wk|mo|y)$")
+
+def _trim(frame: pd.DataFrame, period: str | None = None, start=None, end=None) -> pd.DataFrame:
+    """the part of a recorded frame a request asks for"""
+    if frame.empty:
+        return frame
+    index = frame.index
+
+    def stamp(value):
+        ts = pd.Timestamp(value)
+        if index.tz is not None and ts.tz is None:
+            ts = ts.tz_localize(index.tz)
+        return ts
+
+    if start is not None or end is not None:
+        mask = np.ones(len(index), dtype=bool)
+        if start is not None:
+            mask &= index >= stamp(start)
+        if end is not None:
+            mask &= index < stamp(end)
+        return frame[mask]
+
+    if not period or period == "max":
+        return frame
+    if period == "ytd":
+        return frame[index >= stamp(f"{index[-1].year}-01-01")]
+    match = PERIOD_PATTERN.match(period)
+    if not match:
+        return frame
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        # trading days
+        days = index.normalize().unique()[-n:]
+        return frame[index.normalize() >= days[0]]
+    offset = {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}[unit]
+    return frame[index > index[-1] - offset]
+
+def _split_download(data: pd.DataFrame, symbols: list[str], group_by: str) -> dict[str, pd.DataFrame]:
+    """a yf.download result per symbol"""
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {symbols[0]: data}
+    level = 0 if group_by == "ticker" else 1
+    available = set(data.columns.get_level_values(level))
+    return {
+        s: data.xs(s, axis=1, level=level).dropna(how="all")
+        for s in symbols if s in available
+    }
+
+def _join_download(frames: dict[str, pd.DataFrame], group_by: str) -> pd.DataFrame:
+    """per symbol frames back into yf.download's shape (always multi-level columns)"""
+    data = pd.concat(frames, axis=1, names=["Ticker", "Price"])
+    if group_by != "ticker":
+        data = data.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+    return data
+
+class DataProvider(ABC):
+    """interface; yahoo.py wraps the yfinance calls (single-flight), the rest is called directly"""
+    name = "provider"
+
+    @abstractmethod
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        ...
+
+    @abstractmethod
+    def history(self, symbol: str, **kwargs) -> pd.DataFrame:
+        ...
+
+    @abstractmethod
+    def ticker_data(self, symbol: str, attr: str):
+        ...
+
+    @abstractmethod
+    def quote(self, symbol: str) -> dict:
+        ...
+
+    @abstractmethod
+    def rss(self, url: str):
+        """parsed feed (feedparser result)"""
+
+    @abstractmethod
+    def fetch(self, url: str, headers: dict | None = None, timeout: float = 10) -> bytes | None:
+        """response body, None for a non-200 answer, raises on network errors"""
+
+    @abstractmethod
+    async def goto(self, page, url: str, **kwargs):
+        """points a browser page at url"""
+
+    async def snapshot(self, page, url: str):
+        """called once the page has rendered what the scraper reads"""
+        pass
+
+class LiveProvider(DataProvider):
+    name = "live"
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        return yf.download(symbols, **kwargs)
+
+    def history(self, symbol: str, **kwargs) -> pd.DataFrame:
+        return yf.Ticker(symbol).history(**kwargs)
+
+    def ticker_data(self, symbol: str, attr: str):
+        return getattr(yf.Ticker(symbol), attr)
+
+    def quote(self, symbol: str) -> dict:
+        # fast_info is lazy, read it here
+        fast = yf.Ticker(symbol).fast_info
+        return {"last_price": fast.last_price, "previous_close": fast.previous_close}
+
+    def rss(self, url: str):
+        return feedparser.parse(url)
+
+    def fetch(self, url: str, headers: dict | None = None, timeout: float = 10) -> bytes | None:
+        response = requests.get(url, timeout=timeout, headers=headers)
+        return response.content if response.status_code == 200 else None
+
+    async def goto(self, page, url: str, **kwargs):
+        return await page.goto(url, **kwargs)
+
+class FixtureStore:
+    """reads and writes FIXTURES_DIR"""
+    def __init__(self, root: str = FIXTURES_DIR):
+        self.root = root
+
+    def path(self, kind: str, name: str) -> str:
+        return os.path.join(self.root, kind, name)
+
+    def exists(self, kind: str, name: str) -> bool:
+        return os.path.exists(self.path(kind, name))
+
+    def _require(self, kind: str, name: str) -> str:
+        path = self.path(kind, name)
+        if not os.path.exists(path):
+            raise FixtureMissing(f"no fixture recorded at {path}")
+        return path
+
+    def load_pickle(self, kind: str, name: str):
+        # unpickling runs whatever the file says, fixtures have to be trusted (see the module docstring)
+        return pd.read_pickle(self._require(kind, name))
+
+    def load_bytes(self, kind: str, name: str) -> bytes:
+        with open(self._require(kind, name), "rb") as f:
+            return f.read()
+
+    def save_pickle(self, kind: str, name: str, value):
+        os.makedirs(os.path.join(self.root, kind), exist_ok=True)
+        pd.to_pickle(value, self.path(kind, name))
+
+    def save_bytes(self, kind: str, name: str, value: bytes):
+        os.makedirs(os.path.join(self.root, kind), exist_ok=True)
+        with open(self.path(kind, name), "wb") as f:
+            f.write(value)
+
+    def merge_frame(self, kind: str, name: str, frame: pd.DataFrame):
+        """adds bars to a recorded frame, newer recordings win on overlap"""
+        if frame.empty:
+            return
+        if self.exists(kind, name):
+            frame = pd.concat([self.load_pickle(kind, name), frame])
+            frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+        self.save_pickle(kind, name, frame)
+
+class FixtureProvider(DataProvider):
+    """answers from FIXTURES_DIR, raises FixtureMissing for anything not recorded"""
+    name = "fixtures"
+
+    def __init__(self, store: FixtureStore | None = None):
+        self.store = store or FixtureStore()
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        frames = {}
+        for symbol in symbols:
+            name = _bars_name(symbol, kwargs)
+            if self.store.exists("bars", name):
+                frames[symbol] = _trim(self.store.load_pickle("bars", name), kwargs.get("period"), kwargs.get("start"), kwargs.get("end"))
+        if not frames:
+            # like yf.download when every symbol fails
+            raise FixtureMissing(f"no bars recorded for {', '.join(symbols)}")
+        return _join_download(frames, kwargs.get("group_by", "column"))
+
+    def history(self, symbol: str, **kwargs) -> pd.DataFrame:
+        name = _safe(f"{symbol}_{kwargs.get('interval', '1d')}") + ".pkl"
+        return _trim(self.store.load_pickle("history", name), kwargs.get("period", "1mo"), kwargs.get("start"), kwargs.get("end"))
+
+    def ticker_data(self, symbol: str, attr: str):
+        return self.store.load_pickle("ticker", _safe(f"{symbol}_{attr}") + ".pkl")
+
+    def quote(self, symbol: str) -> dict:
+        return json.loads(self.store.load_bytes("quote", _safe(symbol) + ".json"))
+
+    def rss(self, url: str):
+        return feedparser.parse(self.store.load_bytes("rss", _url_name(url, "xml")))
+
+    def fetch(self, url: str, headers: dict | None = None, timeout: float = 10) -> bytes | None:
+        return self.store.load_bytes("http", _url_name(url, "bin"))
+
+    async def goto(self, page, url: str, **kwargs):
+        # the recorded dom goes straight into the page, the scraping code runs unchanged
+        html = self.store.load_bytes("html", _url_name(url, "html")).decode("utf-8")
+        await page.set_content(html, wait_until="domcontentloaded")
+
+class RecordingProvider(LiveProvider):
+    """live, saving every successful response in the layout FixtureProvider reads"""
+    name = "record"
+
+    def __init__(self, store: FixtureStore | None = None):
+        self.store = store or FixtureStore()
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        data = super().download(symbols, **kwargs)
+        if not data.empty:
+            symbol_list = [symbols] if isinstance(symbols, str) else list(symbols)
+            for symbol, frame in _split_download(data, symbol_list, kwargs.get("group_by", "column")).items():
+                self.store.merge_frame("bars", _bars_name(symbol, kwargs), frame)
+        return data
+
+    def history(self, symbol: str, **kwargs) -> pd.DataFrame:
+        frame = super().history(symbol, **kwargs)
+        self.store.merge_frame("history", _safe(f"{symbol}_{kwargs.get('interval', '1d')}") + ".pkl", frame)
+        return frame
+
+    def ticker_data(self, symbol: str, attr: str):
+        value = super().ticker_data(symbol, attr)
+        self.store.save_pickle("ticker", _safe(f"{symbol}_{attr}") + ".pkl", value)
+        return value
+
+    def quote(self, symbol: str) -> dict:
+        value = super().quote(symbol)
+        self.store.save_bytes("quote", _safe(symbol) + ".json", json.dumps(value).encode())
+        return value
+
+    def rss(self, url: str):
+        # feedparser doesn't keep the raw feed, fetch it ourselves
+        response = requests.get(url, timeout=15, headers={"User-Agent": feedparser.USER_AGENT})
+        # an error page / rate limit isn't a feed, don't let it overwrite a good recording
+        if response.status_code == 200:
+            self.store.save_bytes("rss", _url_name(url, "xml"), response.content)
+        return feedparser.parse(response.content)
+
+    def fetch(self, url: str, headers: dict | None = None, timeout: float = 10) -> bytes | None:
+        content = super().fetch(url, headers, timeout)
+        if content is not None:
+            self.store.save_bytes("http", _url_name(url, "bin"), content)
+        return content
+
+    async def snapshot(self, page, url: str):
+        self.store.save_bytes("html", _url_name(url, "html"), (await page.content()).encode("utf-8"))
+
+def create_data_provider() -> DataProvider:
+    """picks the provider from DATA_PROVIDER"""
+    if DATA_PROVIDER == "fixtures":
+        print(f"[📦] serving external data from fixtures in {FIXTURES_DIR}")
+        return FixtureProvider()
+    if DATA_PROVIDER == "record":
+        print(f"[📦] recording external data to {FIXTURES_DIR}")
+        return RecordingProvider()
+    if DATA_PROVIDER != "live":
+        raise ValueError(f"unknown DATA_PROVIDER '{DATA_PROVIDER}', pick live, record or fixtures")
+    return LiveProvider()
+
+provider = create_data_provider()
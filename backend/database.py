@@ -1,10 +1,12 @@
+import os
 from sqlalchemy import create_engine # type: ignore
 from sqlalchemy.ext.declarative import declarative_base # type: ignore
 from sqlalchemy.orm import sessionmaker # type: ignore
 
 # create kangaroo.db 
 # (this url will later be changed to point to supabase).
-SQLALCHEMY_DATABASE_URL = "sqlite:///./kangaroo.db"
+# DATABASE_URL points a run somewhere else, e.g. a scratch db for simulation.py
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./kangaroo.db")
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
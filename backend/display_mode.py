@@ -3,6 +3,9 @@ import time
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session # type: ignore
 from database import SessionLocal
+from order_book import session_order_book
+from alerts import session_alert_index
+from event_bus import publish_on_commit
 import models
 
 # session ttl 24h
@@ -52,6 +55,12 @@ def _cleanup_session_data(session_id: str):
     """removes all DB rows for an expired session"""
     db = SessionLocal()
     try:
+        pending = db.query(models.SessionPendingOrder.id).filter_by(session_id=session_id, status="PENDING").all()
+        for (order_id,) in pending:
+            session_order_book.remove(order_id)
+        active = db.query(models.SessionAlert.id).filter_by(session_id=session_id, status="ACTIVE").all()
+        for (alert_id,) in active:
+            session_alert_index.remove(alert_id)
         db.query(models.SessionHolding).filter_by(session_id=session_id).delete()
         db.query(models.SessionTransaction).filter_by(session_id=session_id).delete()
         db.query(models.SessionPendingOrder).filter_by(session_id=session_id).delete()
@@ -72,6 +81,18 @@ def session_execute_trade(db: Session, session_id: str, ticker: str, shares: int
         account = models.SessionAccount(session_id=session_id, balance=100000.0)
         db.add(account)
 
+    holding = db.query(models.SessionHolding).filter_by(
+        session_id=session_id, ticker=ticker
+    ).first()
+    holdings = {ticker: holding} if holding else {}
+    _apply_trade(db, session_id, account, holdings, ticker, shares, price, trade_type)
+
+
+def _apply_trade(db: Session, session_id: str, account, holdings: dict, ticker: str, shares: int, price: float, trade_type: str):
+    """
+    applies a trade to an already loaded account and {ticker: holding} map
+    holdings is updated in place so a batch of fills can share one load
+    """
     total_cost = shares * price
 
     if trade_type == "BUY":
@@ -80,9 +101,7 @@ def session_execute_trade(db: Session, session_id: str, ticker: str, shares: int
 
         account.balance -= total_cost
 
-        holding = db.query(models.SessionHolding).filter_by(
-            session_id=session_id, ticker=ticker
-        ).first()
+        holding = holdings.get(ticker)
         if holding:
             current_total = holding.shares * holding.avg_cost
             new_total = current_total + total_cost
@@ -90,15 +109,15 @@ def session_execute_trade(db: Session, session_id: str, ticker: str, shares: int
             holding.shares = total_shares
             holding.avg_cost = new_total / total_shares
         else:
-            db.add(models.SessionHolding(
+            holding = models.SessionHolding(
                 session_id=session_id, ticker=ticker,
                 shares=shares, avg_cost=price
-            ))
+            )
+            db.add(holding)
+            holdings[ticker] = holding
 
     elif trade_type == "SELL":
-        holding = db.query(models.SessionHolding).filter_by(
-            session_id=session_id, ticker=ticker
-        ).first()
+        holding = holdings.get(ticker)
         if not holding or holding.shares < shares:
             raise ValueError("Insufficient Shares")
 
@@ -106,9 +125,79 @@ def session_execute_trade(db: Session, session_id: str, ticker: str, shares: int
         holding.shares -= shares
         if holding.shares == 0:
             db.delete(holding)
+            del holdings[ticker]
 
     # record tx
     db.add(models.SessionTransaction(
         session_id=session_id, ticker=ticker,
         type=trade_type, shares=shares, price=price
     ))
+
+
+def match_session_orders(db: Session, prices: dict[str, float]) -> int:
+    """
+    fills demo limit/stop orders triggered by the simulator's latest prices
+    prices is ticker -> price for the tickers that just moved
+    accounts and holdings for every affected session are loaded in bulk,
+    the caller commits the fills together with the price tick
+    returns the number of fills
+    """
+    triggered = {}
+    for ticker, price in prices.items():
+        for order_id in session_order_book.triggered(ticker, price):
+            triggered[order_id] = price
+    if not triggered:
+        return 0
+
+    # oldest orders fill first
+    orders = (
+        db.query(models.SessionPendingOrder)
+        .filter(models.SessionPendingOrder.id.in_(triggered), models.SessionPendingOrder.status == "PENDING")
+        .order_by(models.SessionPendingOrder.id)
+        .all()
+    )
+    for order_id in set(triggered) - {o.id for o in orders}:
+        session_order_book.remove(order_id)
+    if not orders:
+        return 0
+
+    session_ids = {o.session_id for o in orders}
+    accounts = {
+        a.session_id: a
+        for a in db.query(models.SessionAccount).filter(models.SessionAccount.session_id.in_(session_ids)).all()
+    }
+    holdings: dict[str, dict] = {sid: {} for sid in session_ids}
+    for h in db.query(models.SessionHolding).filter(
+        models.SessionHolding.session_id.in_(session_ids),
+        models.SessionHolding.ticker.in_({o.ticker for o in orders})
+    ).all():
+        holdings[h.session_id][h.ticker] = h
+
+    now = datetime.now()
+    filled = 0
+    for order in orders:
+        price = triggered[order.id]
+        account = accounts.get(order.session_id)
+        if account is None:
+            account = models.SessionAccount(session_id=order.session_id, balance=100000.0)
+            db.add(account)
+            accounts[order.session_id] = account
+        try:
+            exec_type = "BUY" if "BUY" in order.order_type else "SELL"
+            _apply_trade(db, order.session_id, account, holdings[order.session_id], order.ticker, order.shares, price, exec_type)
+            order.status = "FILLED"
+            order.filled_at = now
+            session_order_book.remove_on_commit(db, order.id)
+            publish_on_commit(db, f"account:{order.session_id}", "fill", {
+                "order_id": order.id,
+                "ticker": order.ticker,
+                "order_type": order.order_type,
+                "shares": order.shares,
+                "price": price,
+            })
+            filled += 1
+        except ValueError:
+            # not enough cash/shares right now, stays in the book
+            pass
+
+    return filled
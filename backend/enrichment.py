@@ -0,0 +1,177 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_ # type: ignore
+from info_cache import get_info
+from database import SessionLocal
+from market_version import market_version
+import models
+
+# number of concurrent yfinance lookups
+ENRICH_WORKERS = 3
+
+# retries for network failures (backoff doubles each attempt)
+MAX_ATTEMPTS = 4
+RETRY_BACKOFF = 30 # seconds
+
+# how long a ticker yahoo has no sector for stays 'Unknown' before we ask again
+NEGATIVE_TTL = timedelta(days=7)
+
+# how long to back off after running out of retries (yahoo down / rate limited)
+FAILED_TTL = timedelta(hours=6)
+
+# how long a successful lookup is trusted
+METADATA_TTL = timedelta(days=30)
+
+# how often tickers whose back-off / ttl ran out are queued again (seconds)
+# the ingestor only queues sector-less rows, and a miss is stored as 'Unknown'
+SWEEP_INTERVAL = 600
+
+_queue: asyncio.Queue = asyncio.Queue()
+_pending: set[str] = set() # queued or in flight
+
+def fetch_metadata(ticker: str) -> dict:
+    """
+    blocking yfinance lookup for sector/industry/shares
+    raises on network errors (or an empty answer) so the caller can retry
+    """
+    info = get_info(f"{ticker}.AX", ("sector", "industry", "sharesOutstanding"))
+    return {
+        "sector": info.get('sector'),
+        "industry": info.get('industry'),
+        "shares_outstanding": info.get('sharesOutstanding')
+    }
+
+def cached_sectors(db, tickers) -> dict[str, str]:
+    """returns {ticker: sector} for tickers already in the metadata cache"""
+    if not tickers:
+        return {}
+    rows = db.query(models.TickerMetadata).filter(
+        models.TickerMetadata.ticker.in_(list(tickers)),
+        models.TickerMetadata.sector != None
+    ).all()
+    return {r.ticker: r.sector for r in rows}
+
+def due_tickers(db) -> list[str]:
+    """stocks whose metadata should be looked up again: a miss whose retry_after passed, or a lookup past METADATA_TTL"""
+    now = datetime.now()
+    meta = models.TickerMetadata
+    rows = (
+        db.query(meta.ticker)
+        .join(models.Stock, models.Stock.ticker == meta.ticker)
+        .filter(
+            or_(meta.retry_after == None, meta.retry_after <= now),
+            or_(meta.status == "UNKNOWN", and_(meta.status == "OK", meta.fetched_at < now - METADATA_TTL)),
+        )
+        .all()
+    )
+    return [ticker for (ticker,) in rows]
+
+def enqueue(ticker: str):
+    """schedules a metadata backfill (no-op if already queued)"""
+    if ticker in _pending:
+        return
+    _pending.add(ticker)
+    _queue.put_nowait(ticker)
+
+def _is_fresh(meta: models.TickerMetadata) -> bool:
+    now = datetime.now()
+    if meta.retry_after and meta.retry_after > now:
+        # backing off after a failure, or a negative cache entry
+        return True
+    if meta.status == "UNKNOWN":
+        return False
+    return bool(meta.sector and meta.fetched_at and now - meta.fetched_at.replace(tzinfo=None) < METADATA_TTL)
+
+async def _enrich(ticker: str):
+    db = SessionLocal()
+    try:
+        meta = db.get(models.TickerMetadata, ticker)
+        if meta is None:
+            meta = models.TickerMetadata(ticker=ticker, attempts=0)
+            db.add(meta)
+
+        if not _is_fresh(meta):
+            try:
+                result = await asyncio.to_thread(fetch_metadata, ticker)
+            except Exception as e:
+                meta.attempts = (meta.attempts or 0) + 1
+                if meta.attempts < MAX_ATTEMPTS:
+                    delay = RETRY_BACKOFF * (2 ** (meta.attempts - 1))
+                    print(f"[🏷️] metadata fetch failed for {ticker} ({e}), retrying in {delay}s")
+                    # the ingestor re-enqueues sector-less rows every tick, this keeps them waiting
+                    meta.retry_after = datetime.now() + timedelta(seconds=delay)
+                    db.commit()
+                    asyncio.get_running_loop().call_later(delay + 1, enqueue, ticker) # just past retry_after
+                    return
+
+                # give up for now, cache the miss
+                print(f"[🏷️] giving up on metadata for {ticker} after {meta.attempts} attempts")
+                result = None
+
+            if result is None:
+                meta.sector = meta.sector or "Unknown"
+                meta.status = "UNKNOWN"
+                meta.attempts = 0
+                meta.retry_after = datetime.now() + FAILED_TTL
+            else:
+                meta.sector = result["sector"] or "Unknown"
+                meta.industry = result["industry"]
+                meta.shares_outstanding = result["shares_outstanding"]
+                meta.fetched_at = datetime.now()
+                meta.attempts = 0
+
+                if result["sector"]:
+                    meta.status = "OK"
+                    meta.retry_after = None
+                else:
+                    # negative result, don't refetch every session
+                    meta.status = "UNKNOWN"
+                    meta.retry_after = datetime.now() + NEGATIVE_TTL
+
+        # backfill the stock row
+        if meta.sector:
+            stock = db.query(models.Stock).filter(models.Stock.ticker == ticker).first()
+            if stock and stock.sector != meta.sector:
+                stock.sector = meta.sector
+                stock.version = market_version.next(db)
+                print(f"[🏷️] sector for {ticker}: {meta.sector}")
+
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[🏷️] enrichment error for {ticker}: {e}")
+    finally:
+        db.close()
+
+async def _worker():
+    while True:
+        ticker = await _queue.get()
+        try:
+            await _enrich(ticker)
+        finally:
+            _pending.discard(ticker)
+            _queue.task_done()
+
+async def _sweep():
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        db = SessionLocal()
+        try:
+            due = due_tickers(db)
+        except Exception as e:
+            print(f"[🏷️] metadata sweep failed: {e}")
+            due = []
+        finally:
+            db.close()
+        if due:
+            print(f"[🏷️] re-queueing {len(due)} tickers for a metadata refresh")
+        for ticker in due:
+            enqueue(ticker)
+
+async def run_enrichment_workers():
+    """
+    background pool that backfills sector/industry for new tickers
+    so the ingestor never blocks on yfinance, plus a sweep that re-queues misses once they're due
+    """
+    print(f"[🏷️] metadata enrichment started ({ENRICH_WORKERS} workers)")
+    await asyncio.gather(_sweep(), *[_worker() for _ in range(ENRICH_WORKERS)])
@@ -0,0 +1,155 @@
+import asyncio
+from collections import OrderedDict
+from sqlalchemy import event # type: ignore
+from database import SessionLocal
+
+# live updates for /stream
+# channels:
+#   quotes:<TICKER>                     quote   price/change/volume for a ticker
+#   account / account:<session_id>      fill    a pending order filled
+#   alerts / alerts:<session_id>        alert   a price alert triggered
+
+# max events buffered per subscriber, the oldest are dropped past this
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# event types where only the latest one per key matters, type -> data field
+# a newer quote for a ticker overwrites the one still waiting in the queue
+COALESCE_BY = {
+    "quote": "ticker",
+}
+
+class Subscription:
+    """
+    bounded per-client queue
+    coalescable events overwrite their pending predecessor, so a slow client's
+    queue is capped at one quote per ticker plus the non-coalescable events
+    """
+    def __init__(self, bus: "EventBus", channels: set[str], maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.bus = bus
+        self.channels = channels
+        self.maxsize = maxsize
+        self.pending: OrderedDict = OrderedDict()
+        self.ready = asyncio.Event()
+        self.seq = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def depth(self) -> int:
+        return len(self.pending)
+
+    def put(self, event: dict):
+        field = COALESCE_BY.get(event["type"])
+        if field is not None:
+            key = (event["type"], event["data"].get(field))
+            if key in self.pending:
+                # keep the queue position, deliver the newest data
+                self.pending[key] = event
+                self.coalesced += 1
+                self.bus.coalesced += 1
+                return
+        else:
+            self.seq += 1
+            key = self.seq
+
+        if len(self.pending) >= self.maxsize:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+            self.bus.dropped += 1
+
+        self.pending[key] = event
+        self.ready.set()
+
+    async def next_batch(self, timeout: float) -> list[dict]:
+        """waits up to `timeout` for events, then takes everything queued"""
+        if not self.pending:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        batch = list(self.pending.values())
+        self.pending.clear()
+        self.ready.clear()
+        self.delivered += len(batch)
+        self.bus.delivered += len(batch)
+        return batch
+
+class EventBus:
+    """
+    in-process pub/sub, publish() never blocks the publisher
+    must be called from the event loop thread
+    """
+    def __init__(self):
+        self.subscribers: dict[str, set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def subscribe(self, channels: set[str]) -> Subscription:
+        sub = Subscription(self, channels)
+        for channel in channels:
+            self.subscribers.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        for channel in sub.channels:
+            subs = self.subscribers.get(channel)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self.subscribers[channel]
+
+    def publish(self, channel: str, event_type: str, data: dict):
+        self.published += 1
+        subs = self.subscribers.get(channel)
+        if not subs:
+            return
+        event = {"type": event_type, "data": data}
+        for sub in subs:
+            sub.put(event)
+
+    def get_metrics(self) -> dict:
+        subs = {sub for channel_subs in self.subscribers.values() for sub in channel_subs}
+        depths = [sub.depth() for sub in subs]
+        return {
+            "subscribers": len(subs),
+            "channels": len(self.subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "queue_capacity": SUBSCRIBER_QUEUE_SIZE,
+        }
+
+event_bus = EventBus()
+
+def stream_channels(tickers: set[str], session_id: str | None, account: bool = True, alerts: bool = True) -> set[str]:
+    """what a /stream client subscribes to, a display-mode session only sees its own fills and alerts"""
+    channels = {f"quotes:{t}" for t in tickers}
+    if account:
+        channels.add(f"account:{session_id}" if session_id else "account")
+    if alerts:
+        channels.add(f"alerts:{session_id}" if session_id else "alerts")
+    return channels
+
+def publish_on_commit(db, channel: str, event_type: str, data: dict):
+    """queues an event on the db session, it's published only once the session commits"""
+    if not db.in_transaction():
+        # tie the event to a transaction so a rollback discards it
+        db.begin()
+    db.info.setdefault("pending_events", []).append((channel, event_type, data))
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_pending(session):
+    for channel, event_type, data in session.info.pop("pending_events", ()):
+        event_bus.publish(channel, event_type, data)
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _drop_pending(session, previous_transaction):
+    session.info.pop("pending_events", None)
@@ -1,7 +1,8 @@
 
 import os
 import asyncio
-from playwright.async_api import async_playwright
+from browser_pool import browser_pool
+from data_provider import provider
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import json
@@ -80,16 +81,13 @@ async def get_recent_filings(ticker: str):
     
     filings = []
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+    # page leased from the shared pool
+    async with browser_pool.page() as page:
         
         try:
             # navigate to the stock page
             url = f"https://www.marketindex.com.au/asx/{ticker.lower()}"
-            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            await provider.goto(page, url, wait_until="domcontentloaded", timeout=60000)
             
             # wait 
             await page.wait_for_timeout(2000)
@@ -108,6 +106,7 @@ async def get_recent_filings(ticker: str):
             
             # wait for announcements section load
             await page.wait_for_selector("a.announcement-pdf-link", timeout=20000)
+            await provider.snapshot(page, url)
             
             # get pdf links
             pdf_links = await page.query_selector_all("a.announcement-pdf-link")
@@ -187,8 +186,6 @@ async def get_recent_filings(ticker: str):
             
         except Exception as e:
             print(f"Scraper Error: {e}")
-        finally:
-            await browser.close()
     
     # return structured response with metadata
     return {
@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, time as dtime
+import pandas as pd
+import pytz
+import yahoo
+
+# local daily bar store
+# one sqlite file (separate from kangaroo.db, like the tick store) with split/dividend adjusted
+# OHLCV per symbol, so the analytics read a year of bars from disk and only download what's new
+
+HISTORY_DB = os.getenv("HISTORY_DB", "./history.db")
+
+# a symbol checked more recently than this isn't re-checked for new bars (seconds)
+HISTORY_TTL = int(os.getenv("HISTORY_TTL", "900"))
+
+# how far back "max" goes
+MAX_START = date(1990, 1, 1)
+
+SYDNEY_TZ = pytz.timezone("Australia/Sydney")
+
+# today's bar is a live session until the closing auction is done, it's stored but never anchors a rebase
+SESSION_CLOSE = dtime(16, 15)
+
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,         -- YYYY-MM-DD
+    open REAL, high REAL, low REAL, close REAL,
+    volume INTEGER,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT PRIMARY KEY,
+    covered_from TEXT NOT NULL, -- earliest date asked for (a newer listing just has no bars before its first)
+    last_date TEXT,             -- newest stored bar of a finished session (today's live bar is stored past it)
+    checked_at REAL NOT NULL    -- epoch seconds of the last download
+);
+"""
+
+def period_start(period: str) -> date:
+    """first date a yfinance period covers"""
+    today = datetime.now(SYDNEY_TZ).date()
+    if period.endswith("d") and period[:-1].isdigit():
+        # trading days, give weekends/holidays room, the read trims to the last n bars
+        return today - timedelta(days=int(period[:-1]) * 2 + 7)
+    if period == "ytd":
+        return today.replace(month=1, day=1)
+    if period in PERIOD_OFFSETS:
+        return (pd.Timestamp(today) - PERIOD_OFFSETS[period]).date()
+    return MAX_START
+
+def _frames(data: pd.DataFrame, symbols: list[str]) -> dict[str, pd.DataFrame]:
+    """splits a yf.download(group_by='ticker') result per symbol, dropping empty rows"""
+    if not isinstance(data.columns, pd.MultiIndex):
+        per_symbol = {symbols[0]: data}
+    else:
+        available = set(data.columns.get_level_values(0))
+        per_symbol = {s: data[s] for s in symbols if s in available}
+    return {s: frame.dropna(subset=["Close"]) for s, frame in per_symbol.items() if not frame.dropna(subset=["Close"]).empty}
+
+def _last_complete(frame: pd.DataFrame) -> str | None:
+    """newest bar of a finished session, None if the only bar is today's live one"""
+    now = datetime.now(SYDNEY_TZ)
+    dates = frame.index.strftime("%Y-%m-%d")
+    if now.time() < SESSION_CLOSE:
+        dates = dates[dates < now.date().isoformat()]
+    return dates[-1] if len(dates) else None
+
+class HistoryStore:
+    def __init__(self, path: str = HISTORY_DB):
+        self.path = path
+        self.conn = None
+        self.lock = threading.Lock()
+        self.stats = {"reads": 0, "full_downloads": 0, "incremental_downloads": 0, "symbols_downloaded": 0, "rebased": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+        return self.conn
+
+    def _download(self, symbols: list[str], start: date) -> dict[str, pd.DataFrame]:
+        data = yahoo.download(
+            symbols, start=start.isoformat(), interval="1d", auto_adjust=True, actions=True,
+            group_by="ticker", threads=True,
+        )
+        self.stats["symbols_downloaded"] += len(symbols)
+        return _frames(data, symbols) if not data.empty else {}
+
+    def _rows(self, symbol: str, frame: pd.DataFrame) -> list[tuple]:
+        return [
+            (symbol, day.strftime("%Y-%m-%d"), o, h, l, c, int(v) if v == v else 0)
+            for day, o, h, l, c, v in zip(frame.index, frame["Open"], frame["High"], frame["Low"], frame["Close"], frame["Volume"])
+        ]
+
+    def _store_full(self, conn: sqlite3.Connection, symbol: str, frame: pd.DataFrame, covered_from: date):
+        conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+        conn.executemany("INSERT INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", self._rows(symbol, frame))
+        conn.execute(
+            "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)",
+            (symbol, covered_from.isoformat(), _last_complete(frame), time.time()),
+        )
+
+    def _store_increment(self, conn: sqlite3.Connection, symbol: str, frame: pd.DataFrame, last_date: str) -> bool:
+        """
+        rewrites bars from last_date (the last finished session stored) on, False if the stored history can't be rebased
+        yahoo re-adjusts the whole history after a split or dividend; when the new bars carry one, the stored bars
+        get the same multiplier (every bar before an event is scaled the same), read off the re-downloaded last_date bar
+        without an event a different last_date close is just a revision, the stored history is left alone
+        """
+        dates = frame.index.strftime("%Y-%m-%d")
+        if last_date not in dates:
+            return False
+        new = dates > last_date
+        splits = frame.loc[new, "Stock Splits"] if "Stock Splits" in frame else pd.Series(dtype=float)
+        dividends = frame.loc[new, "Dividends"] if "Dividends" in frame else pd.Series(dtype=float)
+        splits = splits[splits > 0]
+
+        if len(splits) or (dividends > 0).any():
+            overlap = frame.iloc[list(dates).index(last_date)]
+            stored = conn.execute("SELECT close FROM bars WHERE symbol = ? AND date = ?", (symbol, last_date)).fetchone()
+            if not stored or not stored[0]:
+                return False
+            ratio = overlap["Close"] / stored[0]
+            # splits also change the share count the volume is in
+            split_ratio = float(splits.prod()) if len(splits) else 1.0
+            conn.execute(
+                "UPDATE bars SET open = open * ?, high = high * ?, low = low * ?, close = close * ?, volume = CAST(volume * ? AS INTEGER) WHERE symbol = ? AND date < ?",
+                (ratio, ratio, ratio, ratio, split_ratio, symbol, last_date),
+            )
+            self.stats["rebased"] += 1
+            print(f"[📚] {symbol}: history rebased x{ratio:.6f} (split/dividend)")
+
+        conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", self._rows(symbol, frame[dates >= last_date]))
+        conn.execute(
+            "UPDATE coverage SET last_date = ?, checked_at = ? WHERE symbol = ?",
+            (_last_complete(frame) or last_date, time.time(), symbol),
+        )
+        return True
+
+    def _last_date(self, conn: sqlite3.Connection, symbol: str) -> str | None:
+        row = conn.execute("SELECT last_date FROM coverage WHERE symbol = ?", (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, symbols: list[str], start: date):
+        """
+        makes sure the store covers `start`..today for each symbol, downloading only what's missing
+        the lock is only held to read coverage and to write, never across a download, so reads of
+        symbols that are already stored don't wait on yahoo
+        """
+        with self.lock:
+            conn = self._connect()
+            placeholders = ",".join("?" * len(symbols))
+            coverage = {
+                row[0]: row[1:]
+                for row in conn.execute(f"SELECT symbol, covered_from, last_date, checked_at FROM coverage WHERE symbol IN ({placeholders})", symbols)
+            }
+        now = time.time()
+        stale = {s for s in coverage if now - coverage[s][2] > HISTORY_TTL}
+        # never downloaded, asked for further back than before, or came back empty last time
+        full = [s for s in symbols if s not in coverage or coverage[s][0] > start.isoformat() or (not coverage[s][1] and s in stale)]
+        incremental = [s for s in symbols if s not in full and coverage[s][1] and s in stale]
+
+        if incremental:
+            # one download from the oldest last bar among them, each symbol keeps its own part
+            since = min(coverage[s][1] for s in incremental)
+            frames = self._download(incremental, date.fromisoformat(since))
+            self.stats["incremental_downloads"] += 1
+            with self.lock:
+                conn = self._connect()
+                for symbol in incremental:
+                    frame = frames.get(symbol)
+                    # a concurrent refresh may have moved it on while we downloaded, rebase off what's stored now
+                    last_date = self._last_date(conn, symbol) or coverage[symbol][1]
+                    if frame is None:
+                        # nothing new (e.g. suspended), don't ask again until the ttl is up
+                        conn.execute("UPDATE coverage SET checked_at = ? WHERE symbol = ?", (now, symbol))
+                    elif not self._store_increment(conn, symbol, frame, last_date):
+                        full.append(symbol)
+                conn.commit()
+
+        if full:
+            earliest = min([start] + [date.fromisoformat(coverage[s][0]) for s in full if s in coverage])
+            frames = self._download(full, earliest)
+            self.stats["full_downloads"] += 1
+            with self.lock:
+                conn = self._connect()
+                for symbol in full:
+                    if symbol in frames:
+                        self._store_full(conn, symbol, frames[symbol], earliest)
+                    elif not self._last_date(conn, symbol):
+                        # unknown / delisted, remember it so it's only retried once the ttl is up
+                        conn.execute("INSERT OR REPLACE INTO coverage VALUES (?, ?, NULL, ?)", (symbol, earliest.isoformat(), now))
+                conn.commit()
+
+    def bars(self, symbols: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:
+        """daily OHLCV per symbol (yfinance-shaped, Date index), symbols with no data are left out"""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        start = period_start(period)
+        try:
+            self.refresh(symbols, start)
+        except Exception as e:
+            # serve whatever is stored
+            print(f"[📚] history refresh failed: {e}")
+
+        with self.lock:
+            placeholders = ",".join("?" * len(symbols))
+            rows = self._connect().execute(
+                f"SELECT symbol, date, open, high, low, close, volume FROM bars WHERE symbol IN ({placeholders}) AND date >= ? ORDER BY symbol, date",
+                [*symbols, start.isoformat()],
+            ).fetchall()
+        self.stats["reads"] += 1
+
+        if not rows:
+            return {}
+        frame = pd.DataFrame(rows, columns=["Symbol", "Date", "Open", "High", "Low", "Close", "Volume"])
+        frame["Date"] = pd.to_datetime(frame["Date"]).dt.tz_localize(SYDNEY_TZ)
+        result = {symbol: group.drop(columns="Symbol").set_index("Date") for symbol, group in frame.groupby("Symbol", sort=False)}
+        if period.endswith("d") and period[:-1].isdigit():
+            result = {symbol: bars.tail(int(period[:-1])) for symbol, bars in result.items()}
+        return result
+
+    def closes(self, symbols: list[str], period: str = "1y") -> pd.DataFrame:
+        """close per symbol, one column each"""
+        return pd.DataFrame({symbol: bars["Close"] for symbol, bars in self.bars(symbols, period).items()})
+
+    def get_stats(self) -> dict:
+        return dict(self.stats)
+
+history_store = HistoryStore()
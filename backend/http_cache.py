@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+
+# conditional GET + server-side body cache for slow-changing endpoints
+# path regex -> (fresh for n seconds, then served stale for up to n more seconds while it refreshes)
+CACHE_RULES = [
+    (re.compile(r"^/stock/[^/]+/info$"), 3600, 86400),
+    (re.compile(r"^/stock/[^/]+/financials$"), 21600, 86400),
+    (re.compile(r"^/stock/[^/]+/corporate$"), 21600, 86400),
+    (re.compile(r"^/stock/[^/]+/valuation$"), 900, 3600),  # has the current price in it
+    (re.compile(r"^/analysis/sectors$"), 300, 3600),
+    (re.compile(r"^/macro/calendar$"), 1800, 3600),
+]
+
+# most responses kept in memory
+HTTP_CACHE_SIZE = 512
+
+# the installed middleware, for /metrics
+_middleware = None
+
+def _match(path: str) -> tuple[int, int] | None:
+    for pattern, max_age, stale in CACHE_RULES:
+        if pattern.match(path):
+            return max_age, stale
+    return None
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+class CachedResponse:
+    def __init__(self, body: bytes, content_type: bytes):
+        self.body = body
+        self.content_type = content_type
+        self.etag = _etag(body)
+        self.stored_at = time.monotonic()
+
+class ConditionalGetMiddleware:
+    """
+    for GETs on CACHE_RULES routes:
+    - keeps the last good body per url, serves it without hitting the endpoint while fresh
+    - after that, serves it stale and refreshes in the background (stale-while-revalidate)
+    - strong ETag from the body, If-None-Match -> 304
+    - Cache-Control so browsers / a reverse proxy can skip us entirely
+    """
+    def __init__(self, app):
+        self.app = app
+        self.cache: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.refreshing: set[str] = set()
+        self.tasks: set[asyncio.Task] = set() # the loop only keeps weak refs to tasks
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "not_modified": 0}
+        global _middleware
+        _middleware = self
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        rule = _match(scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        max_age, stale = rule
+        key = scope["path"] + "?" + scope.get("query_string", b"").decode()
+        headers = {k.decode().lower(): v.decode() for k, v in scope["headers"]}
+        no_cache = "no-cache" in headers.get("cache-control", "") # hard reload
+
+        entry = self.cache.get(key)
+        age = time.monotonic() - entry.stored_at if entry else None
+
+        if entry and not no_cache and age < max_age + stale:
+            self.cache.move_to_end(key)
+            if age < max_age:
+                self.stats["hits"] += 1
+            else:
+                self.stats["stale_hits"] += 1
+                if key not in self.refreshing:
+                    self.refreshing.add(key)
+                    task = asyncio.create_task(self._refresh(scope, key))
+                    self.tasks.add(task)
+                    task.add_done_callback(self._refresh_done)
+        else:
+            self.stats["misses"] += 1
+            status, response_headers, body = await self._fetch(scope, receive)
+            entry = self._store(key, status, response_headers, body)
+            if entry is None:
+                # errors, non-json and per-client responses aren't cached, pass them through untouched
+                await send({"type": "http.response.start", "status": status, "headers": response_headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+            age = 0
+
+        await self._respond(send, entry, headers.get("if-none-match"), max_age, stale, int(age))
+
+    async def _fetch(self, scope, receive) -> tuple[int, list, bytes]:
+        """runs the endpoint and collects the whole response"""
+        status = 500
+        response_headers = []
+        chunks = []
+
+        async def capture(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return status, response_headers, b"".join(chunks)
+
+    def _store(self, key: str, status: int, response_headers: list, body: bytes) -> CachedResponse | None:
+        headers = {k.lower(): v.lower() for k, v in response_headers}
+        content_type = dict(response_headers).get(b"content-type", b"")
+        # endpoints report failures as 200 {"error": ...}, don't pin those for hours
+        if status != 200 or not content_type.startswith(b"application/json") or body.startswith(b'{"error"'):
+            return None
+        # per-client responses (a display-mode session cookie, Vary on anything but the encoding) are never shared
+        vary = {v.strip() for v in headers.get(b"vary", b"").split(b",") if v.strip()}
+        cache_control = headers.get(b"cache-control", b"")
+        if b"set-cookie" in headers or vary - {b"accept-encoding"} or b"private" in cache_control or b"no-store" in cache_control:
+            return None
+        entry = CachedResponse(body, content_type)
+        self.cache[key] = entry
+        self.cache.move_to_end(key)
+        while len(self.cache) > HTTP_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return entry
+
+    def _refresh_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # _refresh logs its own errors, this is anything that got past it
+            print(f"[http cache] refresh task failed: {task.exception()!r}")
+
+    async def _refresh(self, scope, key: str):
+        """re-runs the endpoint in the background, keeps the stale body if it fails"""
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+        try:
+            status, response_headers, body = await self._fetch(dict(scope), receive)
+            self._store(key, status, response_headers, body)
+        except Exception as e:
+            print(f"[http cache] refresh failed for {key}: {e}")
+        finally:
+            self.refreshing.discard(key)
+
+    async def _respond(self, send, entry: CachedResponse, if_none_match: str | None, max_age: int, stale: int, age: int):
+        headers = [
+            (b"etag", entry.etag.encode()),
+            (b"cache-control", f"public, max-age={max_age}, stale-while-revalidate={stale}".encode()),
+            (b"age", str(age).encode()),
+        ]
+        if _etag_matches(if_none_match, entry.etag):
+            self.stats["not_modified"] += 1
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers += [
+            (b"content-type", entry.content_type),
+            (b"content-length", str(len(entry.body)).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "entries": len(self.cache)}
+
+def get_cache_stats() -> dict:
+    return _middleware.get_stats() if _middleware else {}
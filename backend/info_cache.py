@@ -0,0 +1,176 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import yahoo
+
+# cache for yf.Ticker(symbol).info
+# an in-memory lru in front of a sqlite file, so restarts don't refetch every company
+# each field has a ttl (quotes go stale in minutes, a company's sector in weeks), a lookup is
+# fresh enough if the entry is younger than the shortest ttl among the fields the caller reads
+
+INFO_CACHE_DB = os.getenv("INFO_CACHE_DB", "./info_cache.db")
+INFO_LRU_SIZE = int(os.getenv("INFO_LRU_SIZE", "256"))
+
+QUOTE_TTL = 15 * 60
+FUNDAMENTALS_TTL = 24 * 3600
+PROFILE_TTL = 7 * 24 * 3600
+
+FIELD_TTLS = {
+    # moves with the price
+    "currentPrice": QUOTE_TTL,
+    "regularMarketPrice": QUOTE_TTL,
+    "previousClose": QUOTE_TTL,
+    "marketCap": QUOTE_TTL,
+    "trailingPE": QUOTE_TTL,
+    "forwardPE": QUOTE_TTL,
+    "dividendYield": QUOTE_TTL,
+    "fiftyTwoWeekHigh": QUOTE_TTL,
+    "fiftyTwoWeekLow": QUOTE_TTL,
+    # company profile
+    "longName": PROFILE_TTL,
+    "shortName": PROFILE_TTL,
+    "sector": PROFILE_TTL,
+    "industry": PROFILE_TTL,
+    "longBusinessSummary": PROFILE_TTL,
+    "website": PROFILE_TTL,
+    "fullTimeEmployees": PROFILE_TTL,
+    "companyOfficers": PROFILE_TTL,
+    "currency": PROFILE_TTL,
+    "country": PROFILE_TTL,
+}
+# anything else (margins, growth, targets, share count, beta, ...) is FUNDAMENTALS_TTL
+
+# past this fraction of its ttl an entry is still served, but refreshed in the background
+REFRESH_AHEAD = 0.75
+
+# background refreshes run here, a couple at a time so yahoo isn't hit in bursts
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="info-refresh")
+
+def ttl_for(fields) -> float:
+    """shortest ttl among fields, None means any field"""
+    if fields is None:
+        return QUOTE_TTL
+    return min((FIELD_TTLS.get(f, FUNDAMENTALS_TTL) for f in fields), default=FUNDAMENTALS_TTL)
+
+class EmptyInfo(LookupError):
+    """yahoo answered without any data (unknown symbol, throttled, ...)"""
+
+def _has_fields(info) -> bool:
+    # unknown / throttled symbols come back as {} or {"trailingPegRatio": None}
+    return isinstance(info, dict) and any(value is not None for key, value in info.items() if key != "trailingPegRatio")
+
+class InfoCache:
+    def __init__(self, path: str = INFO_CACHE_DB, size: int = INFO_LRU_SIZE):
+        self.path = path
+        self.size = size
+        self.conn = None
+        self.lock = threading.Lock()
+        self.lru: OrderedDict[str, tuple[float, dict]] = OrderedDict() # symbol -> (fetched_at, info)
+        self.refreshing: set[str] = set()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "fetches": 0, "refresh_ahead": 0, "stale_served": 0, "errors": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS info (symbol TEXT PRIMARY KEY, fetched_at REAL NOT NULL, payload TEXT NOT NULL)")
+        return self.conn
+
+    def _remember(self, symbol: str, fetched_at: float, info: dict):
+        """caller holds the lock"""
+        self.lru[symbol] = (fetched_at, info)
+        self.lru.move_to_end(symbol)
+        while len(self.lru) > self.size:
+            self.lru.popitem(last=False)
+
+    def _lookup(self, symbol: str) -> tuple[float, dict] | None:
+        with self.lock:
+            entry = self.lru.get(symbol)
+            if entry is not None:
+                self.lru.move_to_end(symbol)
+                self.stats["memory_hits"] += 1
+                return entry
+            row = self._connect().execute("SELECT fetched_at, payload FROM info WHERE symbol = ?", (symbol,)).fetchone()
+            if row is None:
+                return None
+            entry = (row[0], json.loads(row[1]))
+            self._remember(symbol, *entry)
+            self.stats["disk_hits"] += 1
+            return entry
+
+    def _fetch(self, symbol: str) -> dict:
+        info = yahoo.info(symbol) # coalesces concurrent misses for the same symbol
+        if not _has_fields(info):
+            # not cached, so the next call retries and get() can fall back to a stale copy
+            raise EmptyInfo(f"no info returned for {symbol}")
+        fetched_at = time.time()
+        with self.lock:
+            self.stats["fetches"] += 1
+            self._remember(symbol, fetched_at, info)
+            self._connect().execute(
+                "INSERT OR REPLACE INTO info VALUES (?, ?, ?)",
+                (symbol, fetched_at, json.dumps(info, default=str)),
+            )
+            self.conn.commit()
+        return info
+
+    def _refresh(self, symbol: str):
+        try:
+            self._fetch(symbol)
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            print(f"[ℹ️] background info refresh failed for {symbol}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(symbol)
+
+    def _refresh_ahead(self, symbol: str):
+        with self.lock:
+            if symbol in self.refreshing:
+                return
+            self.refreshing.add(symbol)
+            self.stats["refresh_ahead"] += 1
+        _refresher.submit(self._refresh, symbol)
+
+    def get(self, symbol: str, fields=None) -> dict:
+        """
+        symbol's .info, refetched once older than the ttl of `fields` (the keys the caller reads)
+        raises if yahoo fails and nothing is cached, a stale copy is served otherwise
+        """
+        symbol = symbol.upper()
+        ttl = ttl_for(fields)
+        entry = self._lookup(symbol)
+
+        if entry is not None:
+            fetched_at, info = entry
+            age = time.time() - fetched_at
+            if age < ttl:
+                if age > ttl * REFRESH_AHEAD:
+                    self._refresh_ahead(symbol)
+                return dict(info)
+
+        try:
+            return dict(self._fetch(symbol))
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            if entry is None:
+                raise
+            with self.lock:
+                self.stats["stale_served"] += 1
+            print(f"[ℹ️] serving {time.time() - entry[0]:.0f}s old info for {symbol}: {e}")
+            return dict(entry[1])
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {**self.stats, "memory_entries": len(self.lru), "refreshing": len(self.refreshing)}
+
+info_cache = InfoCache()
+
+def get_info(symbol: str, fields=None) -> dict:
+    return info_cache.get(symbol, fields)
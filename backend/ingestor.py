@@ -1,17 +1,17 @@
 import asyncio
-import json
-from datetime import datetime, time
-import pytz
+from datetime import datetime
 from sqlalchemy.orm import Session # type: ignore
 from database import SessionLocal
 import models
-from scraper import ASXScraper
-import yfinance as yf # type: ignore
+from market_data import MarketDataSource, TickRecorder, create_market_data_source, is_market_open, SYDNEY_TZ, RECORD_TICKS
 from trade_engine import internal_execute_trade
-
-# sydney timezone
-
-SYDNEY_TZ = pytz.timezone("Australia/Sydney")
+from tick_store import tick_store
+from bar_aggregator import bar_aggregator
+from order_book import order_book
+from alerts import check_alerts, alert_index
+from event_bus import publish_on_commit
+from market_version import market_version
+import enrichment
 
 # global status
 ENGINE_STATUS = {
@@ -24,179 +24,301 @@ ENGINE_STATUS = {
 def get_engine_status():
     return ENGINE_STATUS
 
-def is_market_open() -> bool:
+async def clean_price(price_str: str) -> float:
     """
-    checks if it is currently between 10:00 AM and 4:15 PM sydney time, mon-fri 
-    w/ 15 mins buffer to catch the 'closing auction' final price
+    converts price to float
+    for eg '$123.45' or '1,234' to 123.45
     """
-    now = datetime.now(SYDNEY_TZ)
-
-    # check weekend (5=sat, 6=sun)
-    if now.weekday() > 4:
-        return False
+    try:
+        clean = price_str.replace('$', '').replace(',', '')
+        return float(clean)
+    except:
+        return 0.0
     
-    current_time = now.time()
-    market_open = time(10, 0)
-    market_close = time(16, 15) # 4:15 PM buffer
-
-    return market_open <= current_time <= market_close
+def parse_volume(volume_str: str) -> int:
+    """
+    converts volume to int
+    for eg '336,595' to 336595
+    """
+    try:
+        return int(float(str(volume_str).replace(',', '')))
+    except:
+        return 0
 
-def get_sector_info(ticker: str) -> str:
+def parse_cap(cap_str: str) -> float | None:
     """
-    fetches sector from yfinance on the fly
-    used when a new stock appears in the index
+    converts market cap to float
+    for eg '$200B' to 200000000000.0
     """
+    if not cap_str:
+        return None
+    s = str(cap_str).upper().replace('$', '').replace(',', '').strip()
     try:
-        # add .AX suffix
-        stock = yf.Ticker(f"{ticker}.AX")
-        return stock.info.get('sector', 'Unknown')
+        if 'T' in s: return float(s.replace('T', '')) * 1_000_000_000_000
+        if 'B' in s: return float(s.replace('B', '')) * 1_000_000_000
+        if 'M' in s: return float(s.replace('M', '')) * 1_000_000
+        if 'K' in s: return float(s.replace('K', '')) * 1_000
+        return float(s)
     except:
-        return 'Unknown'
+        return None
 
-async def clean_price(price_str: str) -> float:
+def parse_percent(percent_str: str) -> float:
     """
-    converts price to float
-    for eg '$123.45' or '1,234' to 123.45
+    converts change percent to float
+    for eg '+1.23%' to 1.23
     """
     try:
-        clean = price_str.replace('$', '').replace(',', '')
-        return float(clean)
+        return float(str(percent_str).replace('%', '').replace('+', '').replace(',', '').strip())
     except:
         return 0.0
-    
-async def update_database(data: list[dict]):
+
+# columns the scraper writes on every tick
+QUOTE_FIELDS = (
+    "price", "change_amount", "change_percent", "market_cap", "volume",
+    "change_percent_value", "market_cap_value", "volume_value"
+)
+
+# every field the scraper returns for a row (used to detect changed rows)
+SCRAPED_FIELDS = ("name", "price", "change_amount", "change_percent", "high", "low", "volume", "market_cap")
+
+class TickDiffer:
+    """
+    remembers the last quote seen per ticker and returns only the rows
+    that changed since the previous tick
+    """
+    def __init__(self):
+        self.last_quotes: dict[str, tuple] = {}
+
+    def diff(self, data: list[dict]) -> list[dict]:
+        changed = []
+        for item in data:
+            quote = tuple(item.get(f) for f in SCRAPED_FIELDS)
+            if self.last_quotes.get(item['ticker']) != quote:
+                self.last_quotes[item['ticker']] = quote
+                changed.append(item)
+        return changed
+
+    def reset(self):
+        self.last_quotes.clear()
+
+async def update_database(data: list[dict], ts: float | None = None) -> bool:
+    """
+    bulk upsert of a scraped tick (usually just the rows TickDiffer flagged)
+    loads the stocks table once, diffs it against the tick and writes
+    the changed rows with bulk statements in a single transaction
+    ts is when the tick was observed (epoch seconds, e.g. a replayed recording), defaults to now
+    """
     db: Session = SessionLocal()
     try:
-        print(f"[🦘] saving {len(data)} stocks to DB...")
+        # ticker -> (id, sector, *quote fields), one SELECT for the whole tick
+        existing = {
+            row.ticker: row
+            for row in db.query(
+                models.Stock.id,
+                models.Stock.ticker,
+                models.Stock.sector,
+                models.Stock.price,
+                models.Stock.change_amount,
+                models.Stock.change_percent,
+                models.Stock.market_cap,
+                models.Stock.volume,
+                models.Stock.change_percent_value,
+                models.Stock.market_cap_value,
+                models.Stock.volume_value,
+            ).all()
+        }
+
+        # sectors we already know for tickers that are new to the stocks table
+        known_sectors = enrichment.cached_sectors(db, [item['ticker'] for item in data if item['ticker'] not in existing])
+
+        now = datetime.fromtimestamp(ts) if ts is not None else datetime.now()
+        ts_ms = int(now.timestamp() * 1000)
+        inserts = []
+        updates = []
+        ticks = []
+        prices = {}
+
         for item in data:
-            # check if stock exists
-            stock = db.query(models.Stock).filter(models.Stock.ticker == item['ticker']).first()
-            
-            p_val = await clean_price(item['price'])
-            c_val = await clean_price(item['change_amount'])
+            day_volume = parse_volume(item['volume'])
+            quote = {
+                "price": await clean_price(item['price']),
+                "change_amount": await clean_price(item['change_amount']),
+                "change_percent": item['change_percent'],
+                "market_cap": item['market_cap'],
+                "volume": item['volume'],
+                "change_percent_value": parse_percent(item['change_percent']),
+                "market_cap_value": parse_cap(item['market_cap']),
+                "volume_value": day_volume,
+            }
 
-            if not stock:
-                # fetch sector immediately so heatmap works
-                print(f"[+] new stock found: {item['ticker']}, fetching sector...")
-                sector_name = get_sector_info(item['ticker'])
-                
-                # create new
-                stock = models.Stock(
-                    ticker=item['ticker'],
-                    name=item['name'],
-                    sector=sector_name, # save the fetched sector
-                    price=p_val,
-                    change_amount=c_val,
-                    change_percent=item['change_percent'],
-                    market_cap=item['market_cap'],
-                    volume=item['volume']
-                )
-                db.add(stock)
-            else:
-                # UPDATE EXISTING
-                # self-healing: if sector is missing, fix it (but don't loop on 'Unknown' if we already tried)
-                if not stock.sector:
-                     print(f"[+] fixing missing sector for {item['ticker']}...")
-                     stock.sector = get_sector_info(item['ticker'])
-
-                stock.price = p_val
-                stock.change_amount = c_val
-                stock.change_percent = item['change_percent']
-                stock.market_cap = item['market_cap']
-                stock.volume = item['volume']
-                stock.last_updated = datetime.now()
-        
-        db.commit()
+            prices[item['ticker']] = quote["price"]
+            publish_on_commit(db, f"quotes:{item['ticker']}", "quote", {
+                "ticker": item['ticker'],
+                "price": quote["price"],
+                "change_amount": quote["change_amount"],
+                "change_percent": quote["change_percent"],
+                "volume": quote["volume"],
+            })
+            ticks.append((item['ticker'], ts_ms, quote["price"], quote["change_amount"], day_volume))
+            bar_aggregator.on_tick(item['ticker'], ts_ms / 1000, quote["price"], day_volume)
+
+            row = existing.get(item['ticker'])
+            if row is None:
+                # write the price now, the sector gets backfilled by the enrichment queue
+                sector = known_sectors.get(item['ticker'])
+                if not sector:
+                    print(f"[+] new stock found: {item['ticker']}, queueing sector lookup...")
+                    enrichment.enqueue(item['ticker'])
+                inserts.append({
+                    "ticker": item['ticker'],
+                    "name": item['name'],
+                    "sector": sector,
+                    "last_updated": now,
+                    **quote
+                })
+                continue
+
+            changes = {f: quote[f] for f in QUOTE_FIELDS if getattr(row, f) != quote[f]}
+
+            # self-healing: if sector is missing, queue a fix (misses are cached as 'Unknown' so this doesn't loop)
+            if not row.sector:
+                enrichment.enqueue(item['ticker'])
+
+            if changes:
+                changes["id"] = row.id
+                changes["last_updated"] = now
+                updates.append(changes)
+
+        if inserts or updates:
+            # one version per tick, /stocks?since= picks these rows up
+            version = market_version.next(db)
+            for mapping in inserts + updates:
+                mapping["version"] = version
+            print(f"[🦘] saving {len(updates)} updated / {len(inserts)} new stocks to DB...")
+            if updates:
+                db.bulk_update_mappings(models.Stock, updates)
+            if inserts:
+                db.bulk_insert_mappings(models.Stock, inserts)
+            db.commit()
+
+        # intraday history (written in the background by the tick store)
+        tick_store.record(ticks)
+        bar_aggregator.roll(ts_ms / 1000)
         
-        # after prices update, check if any orders were triggered
-        await check_matching_engine(db)
+        # after prices update, check if any orders on the moved tickers were triggered
+        await check_matching_engine(db, prices)
+
+        # price alerts on the same tick, no separate price fetch
+        if check_alerts(db, alert_index, prices):
+            db.commit()
+        return True
 
     except Exception as e:
+        db.rollback()
         print(f"db error: {e}")
+        return False
     finally:
         db.close()
 
-async def check_matching_engine(db: Session):
+async def check_matching_engine(db: Session, prices: dict[str, float] | None = None):
     """
-    checks all pending orders against current market prices
+    fills pending orders whose trigger the latest prices crossed
+    prices is ticker -> price for the tickers that just moved (every booked ticker when None)
+    the order book narrows it down to the triggered orders, so untouched orders cost nothing
     """
-    orders = db.query(models.PendingOrder).filter(models.PendingOrder.status == "PENDING").all()
-    if not orders:
+    if prices is None:
+        prices = dict(
+            db.query(models.Stock.ticker, models.Stock.price)
+            .filter(models.Stock.ticker.in_(order_book.tickers()))
+            .all()
+        )
+
+    triggered = {}
+    for ticker, price in prices.items():
+        for order_id in order_book.triggered(ticker, price):
+            triggered[order_id] = price
+    if not triggered:
         return
 
+    # oldest orders fill first
+    orders = (
+        db.query(models.PendingOrder)
+        .filter(models.PendingOrder.id.in_(triggered), models.PendingOrder.status == "PENDING")
+        .order_by(models.PendingOrder.id)
+        .all()
+    )
+    # anything the book had that isn't pending anymore is stale
+    for order_id in set(triggered) - {o.id for o in orders}:
+        order_book.remove(order_id)
+
     for order in orders:
-        stock = db.query(models.Stock).filter(models.Stock.ticker == order.ticker).first()
-        if not stock:
-            continue
-        
-        current_price = stock.price
-        triggered = False
-        
-        # execution logic
-        if order.order_type == "LIMIT_BUY" and current_price <= order.limit_price:
-            triggered = True
-        elif order.order_type == "LIMIT_SELL" and current_price >= order.limit_price:
-            triggered = True
-        elif order.order_type == "STOP_LOSS" and current_price <= order.limit_price:
-            triggered = True
+        current_price = triggered[order.id]
+        try:
+            # convert internal type
+            exec_type = "BUY" if "BUY" in order.order_type else "SELL"
+            # use the current_price for the fill 
+            internal_execute_trade(db, order.ticker, order.shares, current_price, exec_type)
             
-        if triggered:
-            try:
-                # convert internal type
-                exec_type = "BUY" if "BUY" in order.order_type else "SELL"
-                # use the current_price for the fill 
-                internal_execute_trade(db, order.ticker, order.shares, current_price, exec_type)
-                
-                order.status = "FILLED"
-                order.filled_at = datetime.now()
-                print(f"[✏️] OMS: order filled - {order.order_type} {order.shares} {order.ticker} @ {current_price}")
-            except Exception as e:
-                print(f"[✏️] OMS: fill failed for {order.ticker} - {e}")
+            order.status = "FILLED"
+            order.filled_at = datetime.now()
+            order_book.remove_on_commit(db, order.id)
+            publish_on_commit(db, "account", "fill", {
+                "order_id": order.id,
+                "ticker": order.ticker,
+                "order_type": order.order_type,
+                "shares": order.shares,
+                "price": current_price,
+            })
+            print(f"[✏️] OMS: order filled - {order.order_type} {order.shares} {order.ticker} @ {current_price}")
+        except Exception as e:
+            # stays in the book, retried on the next tick
+            print(f"[✏️] OMS: fill failed for {order.ticker} - {e}")
     
     db.commit()
 
-async def run_market_engine():
+async def run_market_engine(source: MarketDataSource | None = None):
     """main loop w/ check for market open"""
-    print("[🦘] market engine started")
+    source = source or create_market_data_source()
+    recorder = TickRecorder() if RECORD_TICKS else None
+
+    print(f"[🦘] market engine started ({source.name})")
     ENGINE_STATUS["status"] = "Standing By"
     ENGINE_STATUS["active"] = True
     
     while True:
-        if is_market_open():
-            print("[🦘] the market is open, starting scraper..")
+        if source.is_open():
+            print(f"[🦘] the market is open, starting {source.name}..")
             ENGINE_STATUS["status"] = "Active"
-            ENGINE_STATUS["details"] = "Scraping Live Markets"
-            
-            # start scraper only when required
-            scraper = ASXScraper()
-            await scraper.start()
+            ENGINE_STATUS["details"] = "Scraping Live Markets" if source.name == "scraper" else "Replaying Recorded Ticks"
             
-            previous_snapshot = ""
+            # start the source only when required
+            await source.start()
+            differ = TickDiffer()
             
             try:
                 # inner loop: runs while market is open
-                while is_market_open():
-                    # get the current state of the table 
-                    data = await scraper.get_current_data()
+                while source.is_open():
+                    data = await source.next_batch()
+                    if data is None:
+                        break
                     ENGINE_STATUS["last_run"] = datetime.now().isoformat()
                     
                     if data:
-                        # serialise to string to compare easily 
-                        current_snapshot = json.dumps(data, sort_keys=True)
+                        # only the rows that changed since the last tick
+                        changed = differ.diff(data)
                         
-                        # ONLY SAVE IF somethpchanged 
-                        if current_snapshot != previous_snapshot:
-                            print(f"[🦘] price update detected! writing to DB...")
-                            await update_database(data)
-                            previous_snapshot = current_snapshot
+                        if changed:
+                            print(f"[🦘] price update detected on {len(changed)} stocks! writing to DB...")
+                            if recorder:
+                                recorder.write(changed)
+                            if not await update_database(changed, source.batch_time()):
+                                # write failed, resend the full table next tick
+                                differ.reset()
                         else:
                             # print a dot so yk it's alive
                             print(".", end="", flush=True)
-
-                    # wait 1s
-                    await asyncio.sleep(1)
                 
-                print("\n[🦘] the market just closed, stopping scraper..")
+                print(f"\n[🦘] the market just closed, stopping {source.name}..")
                 ENGINE_STATUS["status"] = "Closed"
                 ENGINE_STATUS["details"] = "Market Closed"
                 
@@ -205,8 +327,7 @@ async def run_market_engine():
                 ENGINE_STATUS["status"] = "Error"
                 ENGINE_STATUS["details"] = str(e)
             finally:
-                # kill chromium process
-                await scraper.stop()
+                await source.stop()
                 
         else:
             # market is closed
@@ -214,4 +335,4 @@ async def run_market_engine():
             print(f"[💤] market closed ({now}). checking again in 60s...")
             ENGINE_STATUS["status"] = "Sleeping"
             ENGINE_STATUS["details"] = f"Market Closed (Time: {now})"
-            await asyncio.sleep(60)
\ No newline at end of file
+            await asyncio.sleep(60)
@@ -6,15 +6,26 @@ from sqlalchemy.orm import Session # type: ignore
 from database import engine, get_db, SessionLocal
 from ingestor import run_market_engine, is_market_open, get_engine_status
 from scanner_engine import scan_market
+from enrichment import run_enrichment_workers
+from alerts import run_alert_monitor, check_alerts, alert_index, session_alert_index
+from event_bus import event_bus, stream_channels
+from market_version import market_version
+from http_cache import ConditionalGetMiddleware, get_cache_stats
+from responses import FastJSONResponse, CompressionMiddleware
+from tick_store import tick_store, run_tick_writer
+from bar_aggregator import bar_aggregator, BAR_INTERVALS
+from migrations import run_migrations
+import market_history
+import yahoo
+from data_provider import provider
+from info_cache import get_info, info_cache
+from order_book import order_book, session_order_book
 import models
 import asyncio
-import yfinance as yf # type: ignore
 import pandas as pd
 import numpy as np 
-import feedparser # type: ignore 
 import re 
 import urllib.parse
-import requests
 from openai import OpenAI, AsyncOpenAI
 import os
 import json
@@ -36,7 +47,7 @@ logging.getLogger("uvicorn.access").addFilter(PollingFilter())
 from newspaper import Article, Config  # type: ignore
 from readability import Document # type: ignore
 from contextlib import asynccontextmanager
-from playwright.async_api import async_playwright
+from browser_pool import browser_pool
 from stream_utils import set_stream_queue 
 from stream_utils import set_stream_queue 
 import briefing 
@@ -76,6 +87,18 @@ async_client = AsyncOpenAI(
 
 # create tables upon startup
 models.Base.metadata.create_all(bind=engine)
+run_migrations()
+
+# resting limit/stop orders, matched by the ingestor (live) or the price simulator (display mode)
+order_book.rebuild()
+session_order_book.rebuild()
+
+# active price alerts, fired by the same price updates
+alert_index.rebuild()
+session_alert_index.rebuild()
+
+# resume the market-data version so clients' ?since= values stay valid
+market_version.load()
 
 # global scan cache
 SCAN_CACHE = []
@@ -92,59 +115,10 @@ SPARKLINE_CACHE = {
     "data": {},
     "timestamp": 0
 }
-SPARKLINE_CACHE_DURATION = 1800  
-
-async def alert_monitor_task():
-    """
-    background loop that checks active alerts every 10 seconds
-    """
-    print("🔔 [Alerts] monitor starting...")
-    while True:
-        try:
-            # create dedicated session
-            db = SessionLocal()
-            try:
-                active_alerts = db.query(models.Alert).filter(models.Alert.status == "ACTIVE").all()
-                
-                if active_alerts:
-                    # tickers to check
-                    tickers = list(set([a.ticker for a in active_alerts]))
-                    
-                    for ticker in tickers:
-                        # fetch price
-                        try:
-                            t_obj = yf.Ticker(f"{ticker}.AX")
-                            current_price = t_obj.fast_info['last_price']
-                        except:
-                            # fallback
-                            try:
-                                current_price = t_obj.history(period='1d')['Close'].iloc[-1]
-                            except:
-                                print(f"⚠️ [Alerts] failed to fetch price for {ticker}")
-                                continue
-                        
-                        # check conditions
-                        relevant_alerts = [a for a in active_alerts if a.ticker == ticker]
-                        for alert in relevant_alerts:
-                            triggered = False
-                            if alert.condition == "ABOVE" and current_price >= alert.target_price:
-                                triggered = True
-                            elif alert.condition == "BELOW" and current_price <= alert.target_price:
-                                triggered = True
-                                
-                            if triggered:
-                                print(f"🚨 [Alerts] triggered: {alert.ticker} is {alert.condition} {alert.target_price} (Current: {current_price})")
-                                alert.status = "TRIGGERED"
-                                db.commit()
-                                
-            finally:
-                db.close()
+SPARKLINE_CACHE_DURATION = 1800
 
-            await asyncio.sleep(10) # check every 10s
-            
-        except Exception as e:
-            print(f"[Alerts] monitor error: {e}")
-            await asyncio.sleep(10)
+# seconds between keepalive comments on an idle /stream connection
+STREAM_KEEPALIVE = 15  
 
 async def scanner_background_task():
     """
@@ -189,6 +163,9 @@ async def lifespan(app: FastAPI):
     # start the scraper in the background
     print("[🦘] kangaroo engine starting...")
 
+    # launch the shared chromium instances off the startup path
+    browser_warmup_task = asyncio.create_task(browser_pool.warm_up())
+
     if DISPLAY_MODE:
         # skip real scraper
         print("[🎭] running in display mode, price simulator active")
@@ -207,23 +184,38 @@ async def lifespan(app: FastAPI):
             pass
     else:
         scraper_task = asyncio.create_task(run_market_engine())
+        enrichment_task = asyncio.create_task(run_enrichment_workers())
+        tick_writer_task = asyncio.create_task(run_tick_writer())
         scanner_task = asyncio.create_task(scanner_background_task())
-        alerts_task = asyncio.create_task(alert_monitor_task())
+        alerts_task = asyncio.create_task(run_alert_monitor())
         
         yield 
         
         print("[🦘] kangaroo engine shutting down...")
         scraper_task.cancel()
+        enrichment_task.cancel()
+        tick_writer_task.cancel()
         scanner_task.cancel()
         alerts_task.cancel()
         try:
             await scraper_task
+            await enrichment_task
+            await tick_writer_task
             await scanner_task
             await alerts_task
         except asyncio.CancelledError:
             pass # cancelled 
 
-app = FastAPI(lifespan=lifespan)
+    browser_warmup_task.cancel()
+    await browser_pool.stop()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# ETag / conditional GET for slow-changing endpoints (added before cors so cached hits still get cors headers)
+app.add_middleware(ConditionalGetMiddleware)
+
+# gzip/brotli, outside the cache so cached bodies are stored uncompressed and compressed per client
+app.add_middleware(CompressionMiddleware)
 
 # cors 
 app.add_middleware(
@@ -281,9 +273,94 @@ async def get_scraper_status_endpoint():
     return get_engine_status()
 
 @app.get("/stocks")
-def get_stocks(db: Session = Depends(get_db)):
-    # returns stocks sorted by market cap (biggest first)
-    return db.query(models.Stock).order_by(models.Stock.market_cap.desc()).all()
+def get_stocks(since: int | None = None, db: Session = Depends(get_db)):
+    """
+    returns stocks sorted by market cap (biggest first)
+    ?since=<version> returns {"version", "full", "stocks"} with only the rows changed after
+    that version, the X-Market-Version header carries the version to send next time
+    """
+    # read before the rows: everything at or below it is committed, so the query sees it
+    # (rows from a tick landing in between are just sent again next poll)
+    version = market_version.current()
+    headers = {"X-Market-Version": str(version)}
+
+    # rows go straight to orjson, skipping jsonable_encoder
+    query = db.query(models.Stock).order_by(models.Stock.market_cap_value.desc().nulls_last())
+    if since is None:
+        return FastJSONResponse(query.all(), headers=headers)
+
+    # a version from the future (e.g. db reset) can't be diffed, send everything
+    full = since <= 0 or since > version
+    if not full:
+        query = query.filter(models.Stock.version > since)
+    return FastJSONResponse({"version": version, "full": full, "stocks": query.all()}, headers=headers)
+
+@app.get("/stream")
+async def stream_updates(request: Request, response: Response, tickers: str = "", watchlist: bool = False, account: bool = True, alerts: bool = True):
+    """
+    server-sent events instead of polling
+    ?tickers=BHP,CBA (and/or watchlist=true) -> quote events for those tickers
+    account=true -> fill events, alerts=true -> triggered alert events
+    starts with a snapshot of the subscribed quotes, then pushes changes as they happen
+    """
+    sid = _get_session_id(request, response)
+
+    symbols = {t.strip().upper() for t in tickers.split(",") if t.strip()}
+
+    # a short session of our own, a Depends(get_db) one would stay checked out until the stream ends
+    with SessionLocal() as db:
+        if watchlist:
+            if sid:
+                symbols |= {w.ticker for w in db.query(models.SessionWatchlist).filter_by(session_id=sid).all()}
+            else:
+                symbols |= {t for (t,) in db.query(models.Stock.ticker).filter(models.Stock.is_watched == True).all()}
+
+        snapshot = [
+            {
+                "ticker": s.ticker,
+                "price": s.price,
+                "change_amount": s.change_amount,
+                "change_percent": s.change_percent,
+                "volume": s.volume,
+            }
+            for s in db.query(models.Stock).filter(models.Stock.ticker.in_(symbols)).all()
+        ] if symbols else []
+
+    sub = event_bus.subscribe(stream_channels(symbols, sid, account, alerts))
+
+    async def event_generator():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps({'quotes': snapshot})}\n\n"
+            while not await request.is_disconnected():
+                events = await sub.next_batch(timeout=STREAM_KEEPALIVE)
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                for e in events:
+                    yield f"event: {e['type']}\ndata: {json.dumps(e['data'], default=str)}\n\n"
+        finally:
+            event_bus.unsubscribe(sub)
+
+    stream = StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # the session cookie set by _get_session_id lives on the placeholder response
+    for cookie in response.headers.getlist("set-cookie"):
+        stream.headers.append("set-cookie", cookie)
+    return stream
+
+@app.get("/metrics")
+async def get_metrics():
+    """internal counters for the live-update broker, the browser pool, the http cache and the yfinance layers"""
+    return {
+        "event_bus": event_bus.get_metrics(),
+        "browser_pool": browser_pool.get_stats(),
+        "http_cache": get_cache_stats(),
+        "yahoo": yahoo.get_stats(),
+        "info_cache": info_cache.get_stats(),
+    }
 
 @app.get("/stocks/sparklines")
 def get_stocks_sparklines(db: Session = Depends(get_db)):
@@ -298,7 +375,7 @@ def get_stocks_sparklines(db: Session = Depends(get_db)):
     if SPARKLINE_CACHE["data"] and (current_time - SPARKLINE_CACHE["timestamp"]) < SPARKLINE_CACHE_DURATION:
         return SPARKLINE_CACHE["data"]
     
-    stocks = db.query(models.Stock).order_by(models.Stock.market_cap.desc()).limit(50).all()
+    stocks = db.query(models.Stock).order_by(models.Stock.market_cap_value.desc().nulls_last()).limit(50).all()
     if not stocks:
         return {}
     
@@ -306,17 +383,14 @@ def get_stocks_sparklines(db: Session = Depends(get_db)):
     
     try:
         # batch download 5 days of daily data for sparkline
-        data = yf.download(tickers, period="5d", interval="1d", progress=False, threads=True)['Close']
+        data = market_history.get_closes(tickers, period="5d", interval="1d")
         
         result = {}
         
         for stock in stocks:
             symbol = f"{stock.ticker}.AX"
             try:
-                if len(tickers) > 1:
-                    series = data[symbol] if symbol in data.columns else None
-                else:
-                    series = data
+                series = data[symbol] if symbol in data.columns else None
                 
                 if series is None:
                     continue
@@ -391,9 +465,14 @@ def get_stock_history(ticker: str, period: str = "1mo", interval: str = "1d"):
     try:
         symbol = f"{ticker.upper()}.AX" if not ticker.endswith(".AX") else ticker.upper()
         
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period=period, interval=interval)
-        hist.reset_index(inplace=True) 
+        # intraday charts for today come from the live bar aggregator when it covers the session
+        hist = None
+        if period == "1d" and interval in BAR_INTERVALS:
+            hist = bar_aggregator.session_frame(symbol.replace(".AX", ""), interval)
+
+        if hist is None:
+            hist = market_history.get_history(symbol, period=period, interval=interval)
+            hist.reset_index(inplace=True) 
         
         # check for invalid stock
         if hist.empty:
@@ -409,33 +488,32 @@ def get_stock_history(ticker: str, period: str = "1mo", interval: str = "1d"):
             std_dev = hist['Close'].rolling(window=20).std()
             hist['BB_Upper'] = hist['BB_Middle'] + (2 * std_dev)
             hist['BB_Lower'] = hist['BB_Middle'] - (2 * std_dev)
-            
-            hist = hist.replace({float('nan'): None})
-
-        data = []
-        for index, row in hist.iterrows():
-            if 'Datetime' in row:
-                t = int(row['Datetime'].timestamp())
-            elif 'Date' in row:
-                t = row['Date'].strftime('%Y-%m-%d')
-            else:
-                continue
-            
-            data.append({
-                "time": t,
-                "open": row['Open'],
-                "high": row['High'],
-                "low": row['Low'],
-                "close": row['Close'],
-                "volume": row['Volume'],
-                "sma50": row.get('SMA_50'),
-                "sma200": row.get('SMA_200'),
-                "ema20": row.get('EMA_20'),
-                "bb_upper": row.get('BB_Upper'),
-                "bb_lower": row.get('BB_Lower')
-            })
-            
-        return data
+
+        # whole columns at once, NaN (indicator warm-up) is written as null by orjson
+        if 'Datetime' in hist:
+            stamps = hist['Datetime']
+            if stamps.dt.tz is None:
+                stamps = stamps.dt.tz_localize('UTC')
+            t = (stamps - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+        elif 'Date' in hist:
+            t = hist['Date'].dt.strftime('%Y-%m-%d')
+        else:
+            return FastJSONResponse([])
+
+        data = pd.DataFrame({
+            "time": t,
+            "open": hist['Open'],
+            "high": hist['High'],
+            "low": hist['Low'],
+            "close": hist['Close'],
+            "volume": hist['Volume'],
+            "sma50": hist['SMA_50'],
+            "sma200": hist['SMA_200'],
+            "ema20": hist['EMA_20'],
+            "bb_upper": hist['BB_Upper'],
+            "bb_lower": hist['BB_Lower'],
+        })
+        return FastJSONResponse(data)
 
     # re-raise 404s
     except HTTPException as http_e:
@@ -446,16 +524,42 @@ def get_stock_history(ticker: str, period: str = "1mo", interval: str = "1d"):
         print(f"error fetching the history: {e}")
         raise HTTPException(status_code=500, detail="failed to fetch the history")
     
+@app.get("/stock/{ticker}/ticks")
+def get_stock_ticks(ticker: str, minutes: int = 60):
+    """raw intraday ticks captured by the scraper (from the local tick store)"""
+    start_ms = int((datetime.now(timezone.utc).timestamp() - minutes * 60) * 1000)
+    rows = tick_store.query(ticker.upper(), start_ms)
+    return [
+        {"time": ts // 1000, "price": price, "change": change, "volume": volume}
+        for ts, price, change, volume in rows
+    ]
+
+@app.get("/stock/{ticker}/bars")
+def get_stock_bars(ticker: str, interval: str = "1m", limit: int = 120):
+    """recent intraday OHLCV bars built from live ticks, plus the bar currently forming"""
+    if interval not in BAR_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {list(BAR_INTERVALS)}")
+
+    since = int(datetime.now(timezone.utc).timestamp()) - limit * BAR_INTERVALS[interval]
+    bars, partial = bar_aggregator.get_bars(ticker.upper(), interval, since)
+
+    def fmt(b):
+        return {"time": b[0], "open": b[1], "high": b[2], "low": b[3], "close": b[4], "volume": b[5]}
+
+    return {
+        "interval": interval,
+        "bars": [fmt(b) for b in bars[-limit:]],
+        "partial": fmt(partial) if partial else None
+    }
+
 @app.get("/stock/{ticker}/info")
 def get_stock_info(ticker: str):
     """gets static company profile data (description, sector, industry, website)"""
     try:
         # .AX for aussie stocks once again
         symbol = f"{ticker.upper()}.AX"
-        dat = yf.Ticker(symbol)
-
         # .info dictionary
-        info = dat.info
+        info = get_info(symbol, ("longBusinessSummary", "sector", "industry", "website", "fullTimeEmployees"))
 
         return {
             "description": info.get('longBusinessSummary', 'No description available.'),
@@ -516,7 +620,7 @@ async def get_stock_news(ticker: str):
         rss_url = f"https://news.google.com/rss/search?q={encoded_query}&ceid=AU:en&hl=en-AU&gl=AU"
         
         loop = asyncio.get_event_loop()
-        feed = await loop.run_in_executor(None, lambda: feedparser.parse(rss_url))
+        feed = await loop.run_in_executor(None, lambda: provider.rss(rss_url))
         
         for entry in feed.entries[:12]:
             # clean title (remove website name)
@@ -569,9 +673,7 @@ def get_stock_financials(ticker: str):
     """fetches annual income statement for the stock"""
     try:
         symbol = f"{ticker.upper()}.AX"
-        stock = yf.Ticker(symbol)
-        
-        financials = stock.income_stmt
+        financials = yahoo.ticker_data(symbol, "income_stmt")
         
         # clean up data: NaN/Inf -> None
         financials = financials.replace({float('nan'): None, float('inf'): None, float('-inf'): None})
@@ -592,10 +694,8 @@ def get_corporate_data(ticker: str):
     """
     try:
         symbol = f"{ticker.upper()}.AX"
-        stock = yf.Ticker(symbol)
-        
         # dividends
-        divs = stock.dividends
+        divs = yahoo.ticker_data(symbol, "dividends")
         div_history = []
         if not divs.empty:
             recent_divs = divs.sort_index(ascending=False).head(10)
@@ -607,7 +707,8 @@ def get_corporate_data(ticker: str):
                 })
 
         # company officers
-        officers = stock.info.get('companyOfficers', [])
+        info = get_info(symbol, ("companyOfficers", "sharesOutstanding"))
+        officers = info.get('companyOfficers', [])
         clean_officers = []
         for o in officers[:5]:
             clean_officers.append({
@@ -625,7 +726,7 @@ def get_corporate_data(ticker: str):
         }
         
         try:
-            holders = stock.major_holders
+            holders = yahoo.ticker_data(symbol, "major_holders")
             if holders is not None and not holders.empty:
                 for index, row in holders.iterrows():
                     label = str(row.iloc[1]) 
@@ -648,14 +749,14 @@ def get_corporate_data(ticker: str):
         # top institutions
         institutions = []
         try:
-            inst_df = stock.institutional_holders
+            inst_df = yahoo.ticker_data(symbol, "institutional_holders")
             if inst_df is not None and not inst_df.empty:
                 for idx, row in inst_df.head(5).iterrows():
                     institutions.append({
                         "holder": row.get('Holder', 'Unknown'),
                         "shares": row.get('Shares', 0),
                         "value": row.get('Value', 0),
-                        "percent": (row.get('Shares', 0) / stock.info.get('sharesOutstanding', 1)) * 100
+                        "percent": (row.get('Shares', 0) / info.get('sharesOutstanding', 1)) * 100
                     })
         except Exception as e:
             print(f"Inst holders error: {e}")
@@ -673,17 +774,10 @@ def get_corporate_data(ticker: str):
 
 @app.get("/read-article")
 async def read_article(url: str):
-    browser = None
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
-            page = await context.new_page()
-            
+        async with browser_pool.page() as page:
             print(f"navigating to: {url}")
-            await page.goto(url, timeout=20000)
+            await provider.goto(page, url, timeout=20000)
             
             # wait for redirect angd content load
             try:
@@ -692,10 +786,10 @@ async def read_article(url: str):
                     await page.wait_for_timeout(3000)
             except Exception:
                 pass
+            await provider.snapshot(page, url)
 
             final_url = page.url
             html_content = await page.content()
-            await browser.close()
 
             #  newspaper3k for metadata extraction
             article_meta = Article(final_url)
@@ -718,8 +812,6 @@ async def read_article(url: str):
 
     except Exception as e:
         print(f"error reading the article: {e}")
-        if browser:
-            await browser.close()
         raise HTTPException(status_code=500, detail="failed to process the article")
     
 @app.get("/stock/{ticker}/analyse")
@@ -792,12 +884,14 @@ def get_stock_valuation(ticker: str):
     """
     try:
         symbol = f"{ticker.upper()}.AX"
-        stock = yf.Ticker(symbol)
-        info = stock.info
+        info = get_info(symbol, (
+            "targetLowPrice", "targetHighPrice", "targetMeanPrice", "targetMedianPrice", "recommendationKey",
+            "sharesOutstanding", "beta", "currentPrice", "currency",
+        ))
         
         # get cash flow and balance sheet
-        cf = stock.cashflow.fillna(0)
-        bs = stock.balance_sheet.fillna(0)
+        cf = yahoo.ticker_data(symbol, "cashflow").fillna(0)
+        bs = yahoo.ticker_data(symbol, "balance_sheet").fillna(0)
         
         try:
             latest_ocf = cf.loc['Operating Cash Flow'].iloc[0]
@@ -844,24 +938,11 @@ def get_stock_valuation(ticker: str):
 def get_market_movers(db: Session = Depends(get_db)):
     """returns top 5 gainers & losers"""
 
-    all_stocks = db.query(models.Stock).all()
-    
-    # clean percentage string
-    def parse_change(s):
-        try:
-            return float(s.ticker.replace('%', '').replace(',', '')) if s.change_percent else 0.0
-        except:
-            try:
-                return float(str(s.change_percent).replace('%', ''))
-            except:
-                return 0.0
-
-    # sort
-    sorted_stocks = sorted(all_stocks, key=parse_change, reverse=True)
+    movers = db.query(models.Stock).filter(models.Stock.change_percent_value.isnot(None))
     
     return {
-        "gainers": sorted_stocks[:5],
-        "losers": sorted_stocks[-5:][::-1] # reverse to show worst first
+        "gainers": movers.order_by(models.Stock.change_percent_value.desc()).limit(5).all(),
+        "losers": movers.order_by(models.Stock.change_percent_value.asc()).limit(5).all() # worst first
     }
 
 @app.get("/sector-performance")
@@ -870,55 +951,37 @@ def get_sector_performance(db: Session = Depends(get_db)):
     nested tree: sector -> stocks
     for the heatmap
     """
-    all_stocks = db.query(models.Stock).all()
-    
-    def parse_cap(cap_str):
-        if not cap_str: return 0.0
-        s = str(cap_str).upper().replace('$', '').replace(',', '')
-        try:
-            if 'T' in s: return float(s.replace('T', '')) * 1_000_000_000_000
-            if 'B' in s: return float(s.replace('B', '')) * 1_000_000_000
-            if 'M' in s: return float(s.replace('M', '')) * 1_000_000
-            if 'K' in s: return float(s.replace('K', '')) * 1_000
-            return float(s)
-        except:
-            return 0.0
+    # filter junk data and tiny stocks (under 100m market cap) to make the map clean, biggest first
+    all_stocks = db.query(
+        models.Stock.ticker,
+        models.Stock.name,
+        models.Stock.sector,
+        models.Stock.change_percent_value,
+        models.Stock.market_cap_value,
+    ).filter(
+        models.Stock.sector.isnot(None),
+        models.Stock.sector != "",
+        models.Stock.sector != "Unknown",
+        models.Stock.market_cap_value >= 100_000_000,
+    ).order_by(models.Stock.market_cap_value.desc()).all()
 
     sectors = {}
     
     for stock in all_stocks:
-        # filter junk data
-        if not stock.sector or stock.sector == "Unknown":
-            continue
-        
-        # parse numbers
-        try:
-            change = float(str(stock.change_percent).replace('%', ''))
-        except:
-            change = 0.0
-        
-        mcap = parse_cap(stock.market_cap)
-        
-        # filter out tiny stocks to make the map clean (skip under 100m market cap)
-        if mcap < 100_000_000: 
-            continue
-
         if stock.sector not in sectors:
             sectors[stock.sector] = []
         
         # add stock as a child
         sectors[stock.sector].append({
             "name": stock.ticker,
-            "size": mcap,       # box size
-            "change": change,   # box color
+            "size": stock.market_cap_value,         # box size
+            "change": stock.change_percent_value or 0.0, # box color
             "fullName": stock.name
         })
     
     # format for recharts
     results = []
     for sec_name, stocks in sectors.items():
-        stocks.sort(key=lambda x: x['size'], reverse=True)
-        
         # total sector size
         total_sector_size = sum(s['size'] for s in stocks)
         
@@ -951,6 +1014,7 @@ async def toggle_watchlist(ticker: str, request: Request, response: Response, db
             return {"is_watched": True}
     else:
         stock.is_watched = not stock.is_watched
+        stock.version = market_version.next(db)
         db.commit()
         return {"is_watched": stock.is_watched}
 
@@ -1043,8 +1107,7 @@ def get_upcoming_calendar(request: Request, response: Response, db: Session = De
     for ticker in tickers:
         try:
             symbol = f"{ticker}.AX"
-            stock = yf.Ticker(symbol)
-            cal = stock.calendar
+            cal = yahoo.ticker_data(symbol, "calendar")
             
             # earnings 
             earnings_date = None
@@ -1082,7 +1145,7 @@ def get_upcoming_calendar(request: Request, response: Response, db: Session = De
             # if there isn't an ex-div date then estimate based on dividend history
             if not ex_div or ex_div < today:
                 try:
-                    divs = stock.dividends
+                    divs = yahoo.ticker_data(symbol, "dividends")
                     if not divs.empty:
                         last_div_date = divs.index[-1].date()
                         # +6 months (182 days) prediction for interim/final dividend
@@ -1142,13 +1205,13 @@ async def get_macro_calendar():
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        response = requests.get(url, timeout=10, headers=headers)
+        content = provider.fetch(url, headers=headers, timeout=10)
         
-        if response.status_code != 200:
+        if content is None:
             return macro_cache["data"] # return stale cache if error
             
         import xml.etree.ElementTree as ET
-        root = ET.fromstring(response.content)
+        root = ET.fromstring(content)
         
         events = []
         # currencies relevant to ASX
@@ -1296,7 +1359,7 @@ async def get_portfolio_risk(request: Request, response: Response, db: Session =
         yf_tickers = [f"{t}.AX" if not t.startswith("^") else t for t in tickers]
         
         # 1y of history for all assets
-        data = yf.download(yf_tickers, period="1y", interval="1d", progress=False)['Close']
+        data = market_history.get_closes(yf_tickers, period="1y", interval="1d")
         
         if data.empty:
             return {"error": "Could not fetch data"}
@@ -1396,7 +1459,7 @@ async def get_portfolio_benchmark(request: Request, response: Response, db: Sess
         yf_tickers = [f"{t}.AX" if not t.startswith("^") else t for t in tickers]
         
         # 1y of daily close data
-        data = yf.download(yf_tickers, period="1y", interval="1d", progress=False)['Close']
+        data = market_history.get_closes(yf_tickers, period="1y", interval="1d")
         if data.empty:
             return {"error": "Could not fetch data"}
 
@@ -1580,6 +1643,7 @@ async def execute_trade(order: Order, request: Request, response: Response, db:
             if stock:
                 stock.price = order.price
                 stock.last_updated = datetime.now()
+                stock.version = market_version.next(db)
 
         db.commit()
         return {"message": "Order Filled"}
@@ -1611,6 +1675,7 @@ async def create_pending_order(order: Order, request: Request, response: Respons
         )
     db.add(new_order)
     db.commit()
+    (session_order_book if sid else order_book).add(new_order)
     return {"message": "Order Created", "order_id": new_order.id}
 
 @app.get("/orders/pending")
@@ -1686,6 +1751,7 @@ async def cancel_order(order_id: int, request: Request, response: Response, db:
     
     order.status = "CANCELLED"
     db.commit()
+    (session_order_book if sid else order_book).remove(order.id)
     return {"message": "Order Cancelled"}
 
 @app.get("/orders/history")
@@ -1738,7 +1804,7 @@ def get_global_markets():
     
     try:
         symbols = [c["symbol"] for c in config]
-        data = yf.download(symbols, period="5d", interval="1h", progress=False, threads=False)['Close']
+        data = yahoo.download(symbols, period="5d", interval="1h", threads=False)['Close']
         
         results = []
         
@@ -1785,11 +1851,13 @@ def compare_stocks(t1: str, t2: str):
     try:
         def get_data(ticker):
             sym = f"{ticker.upper()}.AX"
-            stock = yf.Ticker(sym)
-            info = stock.info
+            info = get_info(sym, (
+                "longName", "currentPrice", "marketCap", "trailingPE", "dividendYield",
+                "profitMargins", "debtToEquity", "revenueGrowth",
+            ))
             
             # get 1y history for performance calc and correlation
-            hist = stock.history(period="1y")
+            hist = market_history.get_history(sym, period="1y")
             if hist.empty: return None
             
             start_price = hist['Close'].iloc[0]
@@ -1842,8 +1910,8 @@ def compare_stocks(t1: str, t2: str):
                 "debt_to_equity": info.get('debtToEquity', 0),
                 "revenue_growth": info.get('revenueGrowth', 0),
                 "performance_1y": perf_1y,
-                "history": hist['Close'].tolist(), # for the sparkline/chart
-                "dates": hist.index.strftime('%Y-%m-%d').tolist(),
+                "history": hist['Close'], # for the sparkline/chart
+                "dates": hist.index.strftime('%Y-%m-%d'),
                 "radar_data": radar
             }
 
@@ -1856,7 +1924,7 @@ def compare_stocks(t1: str, t2: str):
         # calc correlation
         try:
             # fetch as a pair to get aligned index easily
-            pair = yf.download([f"{t1}.AX", f"{t2}.AX"], period="6mo", interval="1d", progress=False)['Close']
+            pair = market_history.get_closes([f"{t1.upper()}.AX", f"{t2.upper()}.AX"], period="6mo", interval="1d")
             pair = pair.dropna()
             # if pair is empty or only 1 col, correlation = fail
             if pair.shape[1] < 2:
@@ -1903,8 +1971,8 @@ def compare_stocks(t1: str, t2: str):
             
         winner = t1 if s1_wins > s2_wins else t2 if s2_wins > s1_wins else "TIE"
 
-        # transform metrics for frontend         
-        return {
+        # transform metrics for frontend, history/dates are still pandas objects for orjson
+        return FastJSONResponse({
             "stock_1": {
                 "ticker": data1['ticker'],
                 "company_name": data1['name'],
@@ -1942,7 +2010,7 @@ def compare_stocks(t1: str, t2: str):
                 "color": corr_color
             },
             "winner": winner
-        }
+        })
     except Exception as e:
         print(f"Comparison error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1961,8 +2029,7 @@ async def compare_ai_verdict(req: CompareRequest):
         # get data 
         def get_data_internal(ticker):
             sym = f"{ticker.upper()}.AX"
-            stock = yf.Ticker(sym)
-            info = stock.info
+            info = get_info(sym, ("longName", "trailingPE", "dividendYield", "revenueGrowth", "debtToEquity", "longBusinessSummary"))
             return {
                 "name": info.get('longName', ticker),
                 "pe": info.get('trailingPE', "N/A"),
@@ -2083,19 +2150,6 @@ def get_relative_value(sector: str, x_metric: str, y_metric: str, db: Session =
         if not x_col or not y_col:
             raise HTTPException(status_code=400, detail="Invalid metric selected")
         
-        #parse market cap
-        def parse_cap(cap_str):
-            if not cap_str: return 0.0
-            s = str(cap_str).upper().replace('$', '').replace(',', '')
-            try:
-                if 'T' in s: return float(s.replace('T', '')) * 1_000_000_000_000
-                if 'B' in s: return float(s.replace('B', '')) * 1_000_000_000
-                if 'M' in s: return float(s.replace('M', '')) * 1_000_000
-                if 'K' in s: return float(s.replace('K', '')) * 1_000
-                return float(s)
-            except:
-                return 0.0
-        
         points = []
         x_vals = []
         y_vals = []
@@ -2115,7 +2169,7 @@ def get_relative_value(sector: str, x_metric: str, y_metric: str, db: Session =
             if not is_valid_number(x_display) or not is_valid_number(y_display):
                 continue
             
-            mcap = parse_cap(stock.market_cap)
+            mcap = stock.market_cap_value or 0.0
             
             points.append({
                 "ticker": stock.ticker,
@@ -2264,6 +2318,14 @@ async def create_alert(alert: AlertRequest, request: Request, response: Response
     db.add(db_alert)
     db.commit()
     db.refresh(db_alert)
+
+    # from here on it fires when a price update crosses it, but it may already be met
+    index = session_alert_index if sid else alert_index
+    index.add(db_alert)
+    stock = db.query(models.Stock).filter(models.Stock.ticker == db_alert.ticker).first()
+    if stock and check_alerts(db, index, {stock.ticker: stock.price}):
+        db.commit()
+        db.refresh(db_alert)
     return db_alert
 
 @app.delete("/alerts/{alert_id}")
@@ -2278,6 +2340,7 @@ async def delete_alert(alert_id: int, request: Request, response: Response, db:
     
     db.delete(alert)
     db.commit()
+    (session_alert_index if sid else alert_index).remove(alert_id)
     return {"status": "deleted"}
 
 
@@ -2616,7 +2679,7 @@ async def get_market_galaxy(db: Session = Depends(get_db), threshold: float = 0.
     links = correlations above threshold
     """
     try:
-        stocks = db.query(models.Stock).order_by(models.Stock.market_cap.desc()).limit(100).all()
+        stocks = db.query(models.Stock).order_by(models.Stock.market_cap_value.desc().nulls_last()).limit(100).all()
         if not stocks:
             return {"nodes": [], "links": []}
         
@@ -2624,7 +2687,7 @@ async def get_market_galaxy(db: Session = Depends(get_db), threshold: float = 0.
         yf_tickers = [f"{t}.AX" for t in tickers]
         
         # fetch 6m daily data for calc
-        data = yf.download(yf_tickers, period="6mo", interval="1d", progress=False)['Close']
+        data = market_history.get_closes(yf_tickers, period="6mo", interval="1d")
         
         if data.empty:
             return {"nodes": [], "links": []}
@@ -2635,19 +2698,6 @@ async def get_market_galaxy(db: Session = Depends(get_db), threshold: float = 0.
         corr_matrix = returns.corr()
 
         
-        # helper to parse market cap strings
-        def parse_cap(cap_str):
-            if not cap_str: return 0.0
-            s = str(cap_str).upper().replace('$', '').replace(',', '').strip()
-            try:
-                if 'T' in s: return float(s.replace('T', '')) * 1_000_000_000_000
-                if 'B' in s: return float(s.replace('B', '')) * 1_000_000_000
-                if 'M' in s: return float(s.replace('M', '')) * 1_000_000
-                if 'K' in s: return float(s.replace('K', '')) * 1_000
-                return float(s)
-            except:
-                return 0.0
-        
         # build nodes
         nodes = []
         ticker_to_idx = {}
@@ -2659,16 +2709,9 @@ async def get_market_galaxy(db: Session = Depends(get_db), threshold: float = 0.
             
             ticker_to_idx[stock.ticker] = len(nodes)
             
-            # parse market cap for sizing
-            mc_val = parse_cap(stock.market_cap)
-            
-            # get change %
-            change_pct = 0
-            try:
-                change_str = stock.change_percent or "0%"
-                change_pct = float(change_str.replace("%", "").replace("+", "").strip())
-            except:
-                change_pct = 0
+            # market cap for sizing
+            mc_val = stock.market_cap_value or 0.0
+            change_pct = stock.change_percent_value or 0.0
             
             sector = stock.sector or "Other"
             
@@ -2721,11 +2764,11 @@ async def get_market_galaxy(db: Session = Depends(get_db), threshold: float = 0.
                 except:
                     continue
         
-        return {
+        return FastJSONResponse({
             "nodes": nodes,
             "links": links,
             "threshold": threshold
-        }
+        })
         
     except Exception as e:
         print(f"market galaxy error: {e}")
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, time as dtime
+import pytz
+from scraper import ASXScraper
+
+# sydney timezone
+SYDNEY_TZ = pytz.timezone("Australia/Sydney")
+
+# which source feeds run_market_engine: "scraper" (live marketindex), "replay" (recorded ticks) or "simulated" (seeded, see simulation.py)
+MARKET_DATA_SOURCE = os.getenv("MARKET_DATA_SOURCE", "scraper").lower()
+
+# replay settings
+REPLAY_FILE = os.getenv("REPLAY_FILE", "")
+REPLAY_SPEED = os.getenv("REPLAY_SPEED", "1") # 1-100, or "max" to replay without waiting
+
+# set RECORD_TICKS=true to capture live sessions for replay
+RECORD_TICKS = os.getenv("RECORD_TICKS", "false").lower() == "true"
+RECORDING_DIR = os.getenv("RECORDING_DIR", "./recordings")
+
+# in push mode, re-read the whole table this often (seconds)
+# catches anything the observer missed, or the observer being lost if the page re-renders the table
+PUSH_RESYNC_INTERVAL = 15
+
+def is_market_open() -> bool:
+    """
+    checks if it is currently between 10:00 AM and 4:15 PM sydney time, mon-fri 
+    w/ 15 mins buffer to catch the 'closing auction' final price
+    """
+    now = datetime.now(SYDNEY_TZ)
+
+    # check weekend (5=sat, 6=sun)
+    if now.weekday() > 4:
+        return False
+    
+    current_time = now.time()
+    market_open = dtime(10, 0)
+    market_close = dtime(16, 15) # 4:15 PM buffer
+
+    return market_open <= current_time <= market_close
+
+class MarketDataSource(ABC):
+    """
+    interface run_market_engine consumes
+    next_batch() returns scraped-style rows (ticker, name, price, ...) for the
+    quotes it has, [] when nothing changed, or None once the source is exhausted
+    batch_time() is when that batch was observed (epoch seconds), None for now
+    """
+    name = "source"
+
+    def is_open(self) -> bool:
+        return True
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def next_batch(self) -> list[dict] | None:
+        ...
+
+    def batch_time(self) -> float | None:
+        return None
+
+class ScraperSource(MarketDataSource):
+    """live marketindex table (push mode w/ polling fallback)"""
+    name = "scraper"
+
+    def __init__(self):
+        self.scraper = None
+        self.push = False
+        self.last_resync = 0.0
+
+    def is_open(self) -> bool:
+        return is_market_open()
+
+    async def start(self):
+        self.scraper = ASXScraper()
+        await self.scraper.start()
+        self.push = await self.scraper.enable_push()
+        self.last_resync = 0.0 # forces a full read on the first tick
+
+    async def stop(self):
+        # kill chromium process
+        if self.scraper:
+            await self.scraper.stop()
+
+    async def next_batch(self) -> list[dict] | None:
+        if not self.push:
+            # wait 1s, then get the current state of the table
+            await asyncio.sleep(1)
+            return await self.scraper.get_current_data()
+
+        # rows arrive as the page updates them
+        wait = PUSH_RESYNC_INTERVAL - (time.monotonic() - self.last_resync)
+        data = await self.scraper.wait_for_updates(timeout=wait) if wait > 0 else []
+        if time.monotonic() - self.last_resync >= PUSH_RESYNC_INTERVAL:
+            # resync the full table and re-arm the observer
+            data = await self.scraper.get_current_data()
+            self.push = await self.scraper.enable_push()
+            self.last_resync = time.monotonic()
+        return data
+
+class ReplaySource(MarketDataSource):
+    """
+    plays back a recorded tick file at 1x-100x speed
+    file format: one json object per line, {"ts": epoch seconds, "rows": [scraped rows]}
+    """
+    name = "replay"
+
+    def __init__(self, path: str, speed: str | float = 1):
+        self.path = path
+        if str(speed).lower() == "max":
+            self.speed = None
+        else:
+            self.speed = min(100.0, max(1.0, float(speed)))
+        self.file = None
+        self.last_ts = None
+        self.finished = False
+        self.batches = 0
+
+    def is_open(self) -> bool:
+        return not self.finished
+
+    async def start(self):
+        print(f"[📼] replaying {self.path} at {'max' if self.speed is None else f'{self.speed:g}x'} speed")
+        self.file = open(self.path, "r", encoding="utf-8")
+
+    async def stop(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    async def next_batch(self) -> list[dict] | None:
+        line = self.file.readline()
+        while line and not line.strip():
+            line = self.file.readline()
+        if not line:
+            self.finished = True
+            print(f"[📼] replay finished ({self.batches} batches)")
+            return None
+
+        record = json.loads(line)
+        if self.last_ts is not None and self.speed is not None:
+            await asyncio.sleep(max(0.0, record["ts"] - self.last_ts) / self.speed)
+        elif self.speed is None:
+            # still yield to the loop so the api stays responsive
+            await asyncio.sleep(0)
+        self.last_ts = record["ts"]
+        self.batches += 1
+        return record["rows"]
+
+    def batch_time(self) -> float | None:
+        # ticks, bars and last_updated keep the recorded time, not the time of the replay
+        return self.last_ts
+
+class TickRecorder:
+    """appends changed rows to recordings/session-YYYY-MM-DD.jsonl in the replay format"""
+    def __init__(self):
+        self.file = None
+        self.day = None
+
+    def write(self, rows: list[dict]):
+        day = datetime.now().strftime("%Y-%m-%d")
+        if day != self.day:
+            self.close()
+            os.makedirs(RECORDING_DIR, exist_ok=True)
+            self.file = open(os.path.join(RECORDING_DIR, f"session-{day}.jsonl"), "a", encoding="utf-8")
+            self.day = day
+        self.file.write(json.dumps({"ts": time.time(), "rows": rows}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+def create_market_data_source() -> MarketDataSource:
+    """picks the source from MARKET_DATA_SOURCE"""
+    if MARKET_DATA_SOURCE == "simulated":
+        # seeded synthetic market, see simulation.py
+        from simulation import SimulatedSource
+        return SimulatedSource()
+    if MARKET_DATA_SOURCE == "replay":
+        if not REPLAY_FILE:
+            raise ValueError("MARKET_DATA_SOURCE=replay needs REPLAY_FILE")
+        return ReplaySource(REPLAY_FILE, REPLAY_SPEED)
+    return ScraperSource()
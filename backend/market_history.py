@@ -0,0 +1,47 @@
+import os
+import pandas as pd
+import yahoo
+
+# where the analytics get price history from
+# symbols are yfinance symbols ("BHP.AX", "^AXJO"), periods/intervals are yfinance's ("1y", "1d", "5m")
+# daily bars come from the local history store (history_store.py), which only downloads what it's missing
+# intraday intervals go straight to yfinance
+# display mode answers from generated histories (synthetic_history.py) so the demo never needs the network
+
+DISPLAY_MODE = os.getenv("DISPLAY_MODE", "false").lower() == "true"
+
+if DISPLAY_MODE:
+    from synthetic_history import synthetic_history
+else:
+    from history_store import history_store
+
+def get_history(symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+    """one symbol's OHLCV, shaped like yf.Ticker(symbol).history()"""
+    if DISPLAY_MODE:
+        return synthetic_history.history(symbol, period, interval)
+    if interval == "1d":
+        return history_store.bars([symbol], period).get(symbol, pd.DataFrame())
+    return yahoo.history(symbol, period=period, interval=interval)
+
+def get_bars(symbols: list[str], period: str = "1y", interval: str = "1d") -> dict[str, pd.DataFrame]:
+    """OHLCV per symbol, symbols with no data are left out"""
+    if DISPLAY_MODE:
+        return synthetic_history.bars(symbols, period, interval)
+    if interval == "1d":
+        return history_store.bars(symbols, period)
+    data = yahoo.download(symbols, period=period, interval=interval, group_by='ticker', threads=True)
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {symbols[0]: data}
+    available = set(data.columns.get_level_values(0))
+    return {symbol: data[symbol] for symbol in symbols if symbol in available}
+
+def get_closes(symbols: list[str], period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+    """close prices, one column per symbol (a frame even for a single symbol)"""
+    if DISPLAY_MODE:
+        return synthetic_history.closes(symbols, period, interval)
+    if interval == "1d":
+        return history_store.closes(symbols, period)
+    data = yahoo.download(symbols, period=period, interval=interval)['Close']
+    if isinstance(data, pd.Series):
+        data = data.to_frame(symbols[0])
+    return data
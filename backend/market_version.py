@@ -0,0 +1,54 @@
+import threading
+from sqlalchemy import event, func # type: ignore
+from database import SessionLocal
+import models
+
+class MarketVersion:
+    """
+    monotonically increasing market-data version
+    every write to a stocks row stamps the row with the next version, so
+    /stocks?since=<version> is just "WHERE version > since"
+    a version is pending until the session that took it commits (or rolls back), and current()
+    never goes past the oldest pending one, so a client can't be handed a version whose rows
+    aren't visible yet (writers commit out of order)
+    """
+    def __init__(self):
+        self.value = 0
+        self.pending: set[int] = set()
+        self.lock = threading.Lock()
+
+    def load(self):
+        """resumes from the highest stamped row (startup) so client versions stay valid across restarts"""
+        db = SessionLocal()
+        try:
+            self.value = db.query(func.max(models.Stock.version)).scalar() or 0
+        finally:
+            db.close()
+
+    def current(self) -> int:
+        """highest version with every write at or below it committed"""
+        with self.lock:
+            return min(self.pending) - 1 if self.pending else self.value
+
+    def next(self, db) -> int:
+        """a new version for rows written in db's transaction"""
+        if not db.in_transaction():
+            # tie it to a transaction so it's released when that ends
+            db.begin()
+        with self.lock:
+            self.value += 1
+            self.pending.add(self.value)
+            db.info.setdefault("market_versions", []).append(self.value)
+            return self.value
+
+    def release(self, versions):
+        with self.lock:
+            self.pending.difference_update(versions)
+
+market_version = MarketVersion()
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _release_versions(session, transaction):
+    # commit, rollback or close, once the outermost transaction is over the versions aren't in flight
+    if transaction.parent is None and "market_versions" in session.info:
+        market_version.release(session.info.pop("market_versions"))
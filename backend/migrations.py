@@ -0,0 +1,71 @@
+from sqlalchemy import inspect, or_, text # type: ignore
+from database import engine, SessionLocal
+from ingestor import parse_cap, parse_percent, parse_volume
+import models
+
+# create_all() only creates missing tables, columns added to existing tables go here
+# table -> {column: sql type}
+ADDED_COLUMNS = {
+    "stocks": {
+        "change_percent_value": "FLOAT DEFAULT 0.0",
+        "market_cap_value": "FLOAT",
+        "volume_value": "INTEGER",
+        "version": "INTEGER DEFAULT 0",
+    },
+}
+
+def _add_missing_columns() -> set[str]:
+    """ALTER TABLE for any column the db doesn't have yet, returns the columns added"""
+    added = set()
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            for column, sql_type in columns.items():
+                if column not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"))
+                    added.add(f"{table}.{column}")
+                # same name sqlalchemy gives index=True columns
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+    return added
+
+def _backfill_stock_values(all_rows: bool):
+    """parses the string quote fields into the numeric columns"""
+    db = SessionLocal()
+    try:
+        query = db.query(
+            models.Stock.id,
+            models.Stock.change_percent,
+            models.Stock.market_cap,
+            models.Stock.volume,
+        )
+        if not all_rows:
+            # rows written before the ingestor filled these in
+            query = query.filter(or_(
+                (models.Stock.market_cap.isnot(None)) & (models.Stock.market_cap_value.is_(None)),
+                (models.Stock.volume.isnot(None)) & (models.Stock.volume_value.is_(None)),
+                models.Stock.change_percent_value.is_(None),
+            ))
+
+        updates = [
+            {
+                "id": row.id,
+                "change_percent_value": parse_percent(row.change_percent),
+                "market_cap_value": parse_cap(row.market_cap),
+                "volume_value": parse_volume(row.volume) if row.volume else None,
+            }
+            for row in query.all()
+        ]
+        if updates:
+            db.bulk_update_mappings(models.Stock, updates)
+            db.commit()
+            print(f"[🦘] backfilled numeric quote fields for {len(updates)} stocks")
+    finally:
+        db.close()
+
+def run_migrations():
+    """brings an existing kangaroo.db up to the current models, safe to run on every startup"""
+    added = _add_missing_columns()
+    if added:
+        print(f"[🦘] added columns: {', '.join(sorted(added))}")
+    _backfill_stock_values(all_rows=any(c.startswith("stocks.") for c in added))
@@ -17,6 +17,14 @@ class Stock(Base):
     change_percent = Column(String, default="0%")    # "+1.23%"
     market_cap = Column(String, nullable=True)       # "200B"
     volume = Column(String, nullable=True)
+
+    # numeric copies parsed once at ingest, for sorting/filtering in sql
+    change_percent_value = Column(Float, default=0.0, index=True)  # 1.23
+    market_cap_value = Column(Float, nullable=True, index=True)     # 200000000000.0
+    volume_value = Column(Integer, nullable=True, index=True)       # 336595
+
+    # market version of the last write to this row (see market_version.py)
+    version = Column(Integer, default=0, index=True)
     
     # relative value 
     pe_ratio = Column(Float, nullable=True)          # price to earnings
@@ -29,6 +37,18 @@ class Stock(Base):
     last_updated = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     is_watched = Column(Boolean, default=False)
 
+class TickerMetadata(Base):
+    __tablename__ = "ticker_metadata"
+
+    ticker = Column(String, primary_key=True)        # "BHP"
+    sector = Column(String, nullable=True)
+    industry = Column(String, nullable=True)
+    shares_outstanding = Column(Float, nullable=True)
+    status = Column(String, default="OK")            # "OK" or "UNKNOWN" (no usable answer, see retry_after)
+    attempts = Column(Integer, default=0)            # failed fetches in a row
+    fetched_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    retry_after = Column(DateTime, nullable=True)    # don't refetch before this
+
 class Account(Base):
     __tablename__ = "account"
     
@@ -1,6 +1,7 @@
 from newspaper import Article # type: ignore
 import asyncio
-from playwright.async_api import async_playwright
+from browser_pool import browser_pool
+from data_provider import provider
 from datetime import datetime, timedelta
 import re
 
@@ -45,44 +46,9 @@ async def scrape_google_news(ticker: str, max_results: int = 5):
     """
     print(f"🕵️ [News Scraper] starting playwright scan for {ticker}...")
     
-    async with async_playwright() as p:
-        try:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    "--disable-blink-features=AutomationControlled", # bypass bot detection (recaptcha)
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-infobars",
-                    "--window-position=0,0",
-                    "--ignore-certifcate-errors",
-                    "--ignore-certifcate-errors-spki-list",
-                    "--disable-accelerated-2d-canvas",
-                    "--disable-gpu",
-                    "--window-size=1920,1080",
-                ]
-            )
-            
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                viewport={"width": 1920, "height": 1080},
-                device_scale_factor=1,
-                is_mobile=False,
-                has_touch=False,
-                locale="en-AU",
-                timezone_id="Australia/Sydney",
-                permissions=["geolocation"],
-                java_script_enabled=True,
-            )
-            
-            # bypass bot detection (recaptcha)
-            await context.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """)
-            
-            page = await context.new_page()
+    try:
+        # stealth context (en-AU, webdriver flag hidden) leased from the shared pool
+        async with browser_pool.page("stealth") as page:
             
             query = f"{ticker} ASX" # eg 'BHP ASX'
             # tbs=qdr:m filters to filter for only past month
@@ -95,7 +61,7 @@ async def scrape_google_news(ticker: str, max_results: int = 5):
                 current_url = f"{base_url}&start={page_idx * 10}" if page_idx > 0 else base_url
                 print(f"📖 [News Scraper] scanning page {page_idx+1} for {ticker}...")
                 
-                await page.goto(current_url, timeout=30000)
+                await provider.goto(page, current_url, timeout=30000)
                 
                 # wait for search results with multiple fallback selectors
                 try:
@@ -110,6 +76,7 @@ async def scrape_google_news(ticker: str, max_results: int = 5):
                         except:
                             print(f"⚠️ [News Scraper] timeout waiting for results on page {page_idx+1}")
                             break
+                await provider.snapshot(page, current_url)
                 
                 cards = await page.query_selector_all('div.SoaBEf')
                 if not cards:
@@ -190,7 +157,8 @@ async def scrape_google_news(ticker: str, max_results: int = 5):
                 top_item = found_items[0]
                 print(f"📖 [News Scraper] reading full content for: {top_item['title']}")
                 try:
-                    await page.goto(top_item['link'], timeout=15000, wait_until="domcontentloaded")                    
+                    await provider.goto(page, top_item['link'], timeout=15000, wait_until="domcontentloaded")
+                    await provider.snapshot(page, top_item['link'])
                     html_content = await page.content()
                 
                     article = Article(top_item['link'])
@@ -208,9 +176,8 @@ async def scrape_google_news(ticker: str, max_results: int = 5):
             else:
                 articles = []
             
-            await browser.close()
             return articles
             
-        except Exception as e:
-            print(f"❌ [News Scraper] critical failure for {ticker}: {e}")
-            return []
+    except Exception as e:
+        print(f"❌ [News Scraper] critical failure for {ticker}: {e}")
+        return []
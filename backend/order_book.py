@@ -0,0 +1,128 @@
+from bisect import bisect_left, bisect_right, insort
+from sqlalchemy import event # type: ignore
+from database import SessionLocal
+import models
+
+# which side of the trigger price fires each order type
+# "above": fires once the market is at or below the threshold (threshold >= price)
+# "below": fires once the market is at or above the threshold (threshold <= price)
+TRIGGER_SIDE = {
+    "LIMIT_BUY": "above",   # buy when price <= limit
+    "STOP_LOSS": "above",   # sell when price <= stop
+    "LIMIT_SELL": "below",  # sell when price >= limit
+}
+
+class PriceLevels:
+    """
+    sorted (price, id) thresholds for one ticker
+    lookups are a bisect plus the k entries returned
+    """
+    def __init__(self):
+        self.levels: list[tuple[float, int]] = []
+
+    def __len__(self):
+        return len(self.levels)
+
+    def add(self, price: float, item_id: int):
+        insort(self.levels, (price, item_id))
+
+    def remove(self, price: float, item_id: int) -> bool:
+        i = bisect_left(self.levels, (price, item_id))
+        if i < len(self.levels) and self.levels[i] == (price, item_id):
+            del self.levels[i]
+            return True
+        return False
+
+    def at_or_above(self, price: float) -> list[int]:
+        """ids with threshold >= price"""
+        i = bisect_left(self.levels, (price, float("-inf")))
+        return [item_id for _, item_id in self.levels[i:]]
+
+    def at_or_below(self, price: float) -> list[int]:
+        """ids with threshold <= price"""
+        i = bisect_right(self.levels, (price, float("inf")))
+        return [item_id for _, item_id in self.levels[:i]]
+
+def remove_on_commit(db, index, item_id: int):
+    """index.remove(item_id) once db's transaction commits, a rollback leaves it indexed"""
+    if not db.in_transaction():
+        db.begin()
+    db.info.setdefault("book_removals", []).append((index, item_id))
+
+class OrderBook:
+    """
+    in-memory index of PENDING orders, ticker -> side -> PriceLevels
+    the db stays the source of truth, this only answers "which orders does
+    this price trigger" without scanning every resting order
+    """
+    def __init__(self, model):
+        self.model = model
+        self.books: dict[str, dict[str, PriceLevels]] = {}
+        self.orders: dict[int, tuple[str, str, float]] = {} # id -> (ticker, side, price)
+
+    def __len__(self):
+        return len(self.orders)
+
+    def tickers(self) -> set[str]:
+        return set(self.books)
+
+    def add(self, order):
+        """indexes a PENDING order (unknown order types are ignored, they never trigger)"""
+        side = TRIGGER_SIDE.get(order.order_type)
+        if side is None or order.limit_price is None or order.id in self.orders:
+            return
+        book = self.books.setdefault(order.ticker, {"above": PriceLevels(), "below": PriceLevels()})
+        book[side].add(order.limit_price, order.id)
+        self.orders[order.id] = (order.ticker, side, order.limit_price)
+
+    def remove(self, order_id: int):
+        """drops an order once it's filled or cancelled"""
+        entry = self.orders.pop(order_id, None)
+        if entry is None:
+            return
+        ticker, side, price = entry
+        book = self.books.get(ticker)
+        if book is None:
+            return
+        book[side].remove(price, order_id)
+        if not book["above"] and not book["below"]:
+            del self.books[ticker]
+
+    def remove_on_commit(self, db, order_id: int):
+        """remove() once db's transaction commits, a fill that's rolled back stays in the book"""
+        remove_on_commit(db, self, order_id)
+
+    def triggered(self, ticker: str, price: float) -> list[int]:
+        """ids of the orders on `ticker` that `price` fills"""
+        book = self.books.get(ticker)
+        if book is None or not price:
+            return []
+        return book["above"].at_or_above(price) + book["below"].at_or_below(price)
+
+    def rebuild(self, db=None):
+        """reloads the book from the PENDING rows (startup)"""
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            self.books.clear()
+            self.orders.clear()
+            for order in db.query(self.model).filter(self.model.status == "PENDING").all():
+                self.add(order)
+        finally:
+            if own_session:
+                db.close()
+        print(f"[✏️] OMS: order book loaded ({len(self.orders)} resting orders on {len(self.books)} tickers)")
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_removals(session):
+    for index, item_id in session.info.pop("book_removals", ()):
+        index.remove(item_id)
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _drop_removals(session, previous_transaction):
+    session.info.pop("book_removals", None)
+
+order_book = OrderBook(models.PendingOrder)
+
+# display mode demo orders, matched by the price simulator
+session_order_book = OrderBook(models.SessionPendingOrder)
@@ -1,63 +1,221 @@
 import asyncio
-import random
+import os
+import time
 from datetime import datetime
+import numpy as np
+from sqlalchemy import bindparam, update # type: ignore
 from database import SessionLocal
+from display_mode import match_session_orders
+from alerts import check_alerts, session_alert_index
+from event_bus import publish_on_commit
+from market_version import market_version
 import models
 
-# how often to tick (seconds)
-TICK_INTERVAL = 2
+# how often to tick (seconds), fine to go sub-second
+TICK_INTERVAL = float(os.getenv("SIM_TICK_INTERVAL", "2"))
 
-# price movement range per tick
-MIN_MOVE_PCT = 0.002   # 0.2%
-MAX_MOVE_PCT = 0.012   # 1.2%
+# std dev of a stock's move over a 2s tick, shorter ticks scale with sqrt(time)
+TICK_VOLATILITY = 0.006   # 0.6%
+REFERENCE_TICK = 2.0
 
-# what fraction of stocks move each tick (30-60%)
+# how a stock's variance splits between the whole market, its sector and itself (sums to 1)
+MARKET_WEIGHT = 0.35
+SECTOR_WEIGHT = 0.30
+IDIO_WEIGHT = 0.35
+
+# per-stock volatility multiplier, some names are just jumpier
+MIN_VOL_SCALE = 0.6
+MAX_VOL_SCALE = 1.6
+
+# what fraction of stocks trade each tick (30-60%)
 MIN_MOVE_RATIO = 0.3
 MAX_MOVE_RATIO = 0.6
 
+# executemany'd for every flush, core rather than orm bulk_update_mappings (half the cost at 1k+ rows)
+_stocks = models.Stock.__table__
+UPDATE_QUOTE = (
+    update(_stocks)
+    .where(_stocks.c.id == bindparam("_id"))
+    .values({
+        "price": bindparam("price"),
+        "change_amount": bindparam("change_amount"),
+        "change_percent": bindparam("change_percent"),
+        "change_percent_value": bindparam("change_percent_value"),
+        "last_updated": bindparam("last_updated"),
+        "version": bindparam("version"),
+    })
+)
+
+# re-read the stock list (new listings, sector backfill) this often (seconds)
+UNIVERSE_REFRESH = 60
+
+
+class PriceSimulator:
+    """
+    display mode prices, held in numpy arrays between ticks
+    each tick draws one market factor, one factor per sector and an idiosyncratic
+    shock per stock, and moves the traders as geometric brownian motion
+    so stocks in the same sector (and the market as a whole) move together
+    """
+    def __init__(self, seed=None, volatility: float = TICK_VOLATILITY, drift: float = 0.0):
+        self.rng = np.random.default_rng(seed)
+        self.volatility = volatility
+        self.drift = drift  # mean log return per 2s tick
+        self.vol_scales: dict[int, float] = {}  # stock id -> multiplier, kept across reloads
+        self.ids = np.empty(0, dtype=np.int64)
+        self.tickers: list[str] = []
+        self.volumes: list[str | None] = []
+        self.prices = np.empty(0)
+        self.prev_close = np.empty(0)
+        self.scale = np.empty(0)
+        self.sector_idx = np.empty(0, dtype=np.int64)
+        self.sector_count = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def load(self, db):
+        """(re)reads the universe, the db is the source of truth since every tick is flushed"""
+        rows = (
+            db.query(
+                models.Stock.id,
+                models.Stock.ticker,
+                models.Stock.sector,
+                models.Stock.price,
+                models.Stock.change_amount,
+                models.Stock.volume,
+            )
+            .filter(models.Stock.price > 0)
+            .order_by(models.Stock.id)
+            .all()
+        )
+        self.set_universe(
+            ids=[r.id for r in rows],
+            tickers=[r.ticker for r in rows],
+            sectors=[r.sector for r in rows],
+            prices=[r.price for r in rows],
+            change_amounts=[r.change_amount or 0.0 for r in rows],
+            volumes=[r.volume for r in rows],
+        )
+
+    def set_universe(self, ids: list[int], tickers: list[str], sectors: list[str | None], prices: list[float], change_amounts: list[float], volumes: list[str | None]):
+        """replaces the simulated stocks, load() from the db or a generated universe (simulation.py)"""
+        self.ids = np.array(ids, dtype=np.int64)
+        self.tickers = list(tickers)
+        self.volumes = list(volumes)
+        self.prices = np.array(prices, dtype=np.float64)
+        self.prev_close = self.prices - np.array(change_amounts, dtype=np.float64)
+        # a bad change_amount would put the reference at/below zero
+        bad = self.prev_close <= 0
+        self.prev_close[bad] = self.prices[bad]
+
+        for stock_id in self.ids.tolist():
+            if stock_id not in self.vol_scales:
+                self.vol_scales[stock_id] = self.rng.uniform(MIN_VOL_SCALE, MAX_VOL_SCALE)
+        self.scale = np.array([self.vol_scales[i] for i in self.ids.tolist()])
+
+        sectors = np.array([s or "Other" for s in sectors], dtype=object)
+        if len(sectors):
+            _, self.sector_idx = np.unique(sectors, return_inverse=True)
+            self.sector_count = int(self.sector_idx.max()) + 1
+        else:
+            self.sector_idx = np.empty(0, dtype=np.int64)
+            self.sector_count = 0
+
+    def step(self, dt: float = TICK_INTERVAL) -> np.ndarray:
+        """moves a random subset of stocks, returns the indices whose (rounded) price changed"""
+        n = len(self.ids)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+
+        move_ratio = self.rng.uniform(MIN_MOVE_RATIO, MAX_MOVE_RATIO)
+        movers = np.flatnonzero(self.rng.random(n) < move_ratio)
+        if len(movers) == 0:
+            return movers
+
+        market = self.rng.standard_normal()
+        sector = self.rng.standard_normal(self.sector_count)[self.sector_idx[movers]]
+        own = self.rng.standard_normal(len(movers))
+        shock = np.sqrt(MARKET_WEIGHT) * market + np.sqrt(SECTOR_WEIGHT) * sector + np.sqrt(IDIO_WEIGHT) * own
+
+        sigma = self.volatility * self.scale[movers] * np.sqrt(dt / REFERENCE_TICK)
+        drift = self.drift * dt / REFERENCE_TICK
+        old = self.prices[movers]
+        new = np.round(old * np.exp(drift + sigma * shock - 0.5 * sigma ** 2), 4)
+
+        changed = new != old
+        self.prices[movers[changed]] = new[changed]
+        return movers[changed]
+
+    def flush(self, db, moved: np.ndarray) -> dict[str, float]:
+        """one bulk UPDATE for the moved rows plus their quote events, returns {ticker: price}"""
+        if len(moved) == 0:
+            return {}
+
+        price = self.prices[moved]
+        change = np.round(price - self.prev_close[moved], 4)
+        change_pct = np.round(change / self.prev_close[moved] * 100, 2)
+        now = datetime.now()
+        version = market_version.next(db)
+
+        updates = []
+        prices = {}
+        for i, p, c, pct in zip(moved.tolist(), price.tolist(), change.tolist(), change_pct.tolist()):
+            ticker = self.tickers[i]
+            change_percent = f"{'+' if pct >= 0 else ''}{pct:.2f}%"
+            updates.append({
+                "_id": int(self.ids[i]),
+                "price": p,
+                "change_amount": c,
+                "change_percent": change_percent,
+                "change_percent_value": pct,
+                "last_updated": now,
+                "version": version,
+            })
+            prices[ticker] = p
+            publish_on_commit(db, f"quotes:{ticker}", "quote", {
+                "ticker": ticker,
+                "price": p,
+                "change_amount": c,
+                "change_percent": change_percent,
+                "volume": self.volumes[i],
+            })
+
+        db.execute(UPDATE_QUOTE, updates)
+        return prices
+
+    def tick(self, db, dt: float = TICK_INTERVAL) -> tuple[dict[str, float], int]:
+        """one simulated tick: prices, then demo orders and alerts, all committed together"""
+        prices = self.flush(db, self.step(dt))
+        filled = match_session_orders(db, prices)
+        check_alerts(db, session_alert_index, prices)
+        db.commit()
+        return prices, filled
+
 
 async def run_price_simulator():
     """
-    background loop that nudges stock prices 
+    background loop that nudges stock prices
     only runs in display mode
     """
     print("[🎭] price simulator starting...")
+    simulator = PriceSimulator()
+    loaded_at = None
 
     while True:
         try:
             db = SessionLocal()
             try:
-                stocks = db.query(models.Stock).all()
-                if not stocks:
+                if loaded_at is None or time.monotonic() - loaded_at > UNIVERSE_REFRESH or not len(simulator):
+                    simulator.load(db)
+                    loaded_at = time.monotonic()
+                if not len(simulator):
                     await asyncio.sleep(10)
                     continue
 
-                # random subset 
-                move_count = max(1, int(len(stocks) * random.uniform(MIN_MOVE_RATIO, MAX_MOVE_RATIO)))
-                movers = random.sample(stocks, min(move_count, len(stocks)))
-
-                for stock in movers:
-                    if not stock.price or stock.price <= 0:
-                        continue
-
-                    # random direction
-                    direction = random.choice([-1, 1])
-                    magnitude = random.uniform(MIN_MOVE_PCT, MAX_MOVE_PCT)
-                    move = stock.price * magnitude * direction
-
-                    new_price = round(stock.price + move, 4)
-                    if new_price <= 0:
-                        new_price = stock.price  
-
-                    change = new_price - (stock.price - (stock.change_amount or 0))
-                    change_pct = (change / (new_price - change)) * 100 if (new_price - change) != 0 else 0
-
-                    stock.price = new_price
-                    stock.change_amount = round(change, 4)
-                    stock.change_percent = f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%"
-                    stock.last_updated = datetime.now()
-
-                db.commit()
+                _, filled = simulator.tick(db)
+                if filled:
+                    print(f"[🎭] filled {filled} demo orders")
             finally:
                 db.close()
 
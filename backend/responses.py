@@ -0,0 +1,121 @@
+import gzip
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+import orjson
+import pandas as pd
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+# brotli is optional, gzip is always available
+try:
+    import brotli # type: ignore
+except ImportError:
+    brotli = None
+
+# bodies smaller than this aren't worth compressing (bytes)
+COMPRESS_MIN_SIZE = 1024
+
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4 # fast enough to do per request
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(obj):
+    """everything orjson doesn't serialize natively"""
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict("records")
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.to_numpy()
+    if isinstance(obj, np.ndarray):
+        # object/str arrays orjson can't take directly
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if hasattr(obj, "__table__"):
+        # sqlalchemy row
+        return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-encoded json
+    takes numpy arrays/scalars, pandas frames/series/timestamps and ORM rows as-is
+    and writes NaN/inf as null, so endpoints can return them without converting
+    """
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def _pick_encoding(accept_encoding: str) -> str | None:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+class CompressionMiddleware:
+    """
+    gzip (or brotli when installed and accepted) for complete json/text bodies over COMPRESS_MIN_SIZE
+    streamed responses (sse, ndjson chat) go through untouched so nothing gets buffered
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = _pick_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        started = False
+
+        async def compressing_send(message):
+            nonlocal start, started
+            if message["type"] == "http.response.start":
+                start = message # hold until we see the body
+                return
+            if message["type"] != "http.response.body" or started:
+                return await send(message)
+
+            started = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            content_type = headers.get("content-type", "")
+            compressible = content_type.startswith(("application/json", "text/")) and not content_type.startswith("text/event-stream")
+
+            if message.get("more_body", False) or len(body) < COMPRESS_MIN_SIZE or not compressible or "content-encoding" in headers:
+                await send(start)
+                return await send(message)
+
+            body = brotli.compress(body, quality=BROTLI_QUALITY) if encoding == "br" else gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # different bytes than the identity body, so only weakly equal
+                headers["etag"] = "W/" + etag
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, compressing_send)
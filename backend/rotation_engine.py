@@ -1,7 +1,7 @@
-import yfinance as yf # type: ignore
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import market_history
 
 # default asx sector indices
 SECTOR_MAPPING = {
@@ -55,11 +55,8 @@ def calculate_rrg(tickers=None, benchmark="^AXJO", period="6mo", step=5, tail_le
     # fetch data for all tickers + benchmark
     all_symbols = target_tickers + [benchmark]
     
-    # stringify for yf
-    tickers_str = " ".join(all_symbols)
-    
     try:
-        data = yf.download(tickers_str, period=period, progress=False)['Close']
+        data = market_history.get_closes(all_symbols, period=period)
     except Exception as e:
         print(f"error fetching data: {e}")
         return []
@@ -1,4 +1,4 @@
-import yfinance as yf # type: ignore
+import market_history
 import pandas as pd
 import numpy as np
 import asyncio
@@ -105,7 +105,7 @@ def scan_market(tickers):
     
     # bulk download data
     try:
-        data = yf.download(tickers, period="1y", interval="1d", group_by='ticker', progress=False, threads=True)
+        data = market_history.get_bars(tickers, period="1y", interval="1d")
     except Exception as e:
         print(f"Download failed: {e}")
         return []
@@ -115,8 +115,8 @@ def scan_market(tickers):
     # process each ticker
     for ticker in tickers:
         try:
-            # handle multi-index dataframe from yfinance
-            hist = data[ticker]
+            hist = data.get(ticker)
+            if hist is None: continue
             # drop NaN rows to ensure calculations are valid
             hist = hist.dropna(subset=['Close'])
             
@@ -1,32 +1,117 @@
 import asyncio
-from playwright.async_api import async_playwright, Page
+from playwright.async_api import Page
+from browser_pool import browser_pool
+from data_provider import provider
 import pandas as pd
 from datetime import datetime
 
+# how long to collect pushed rows before handing them to the ingestor (seconds)
+PUSH_BATCH_WINDOW = 0.25
+
+# parses a single <tr> of the marketindex table into a quote dict
+PARSE_ROW_JS = """
+window.__kangarooParseRow = (row) => {
+    const cells = row.querySelectorAll('td');
+    if (cells.length < 8) return null;
+
+    const codeCell = cells[1];
+    const code = codeCell.querySelector('a')?.textContent?.trim() || codeCell.textContent?.trim() || '';
+    let company = cells[2]?.textContent?.trim() || '';
+    
+    // avoid (e.g. "BHPBHP Group")
+    if (code && company.startsWith(code) && company.length > code.length) {
+        company = company.substring(code.length).trim();
+    }
+    
+    // clean price strings ("$10.50" -> 10.50)
+    const getVal = (i) => cells[i]?.textContent?.trim() || '0';
+    
+    if (!code || code.length > 5) return null;
+    return {
+        ticker: code,
+        name: company,
+        price: getVal(3),
+        change_amount: getVal(4),
+        change_percent: getVal(5),
+        high: getVal(6),
+        low: getVal(7),
+        volume: getVal(8),
+        market_cap: getVal(9)
+    };
+};
+"""
+
+# watches the table and pushes changed rows to python via the kangarooPush binding
+INSTALL_OBSERVER_JS = """
+() => {
+    const table = document.querySelector('table.mi-table.company-table') || 
+                  document.querySelector('table.mi-table.quoteapi-even-items');
+    if (!table) return false;
+    if (window.__kangarooObserver) window.__kangarooObserver.disconnect();
+
+    const dirty = new Set();
+    let scheduled = false;
+
+    const flush = () => {
+        scheduled = false;
+        const rows = [];
+        dirty.forEach(tr => {
+            const parsed = window.__kangarooParseRow(tr);
+            if (parsed) rows.push(parsed);
+        });
+        dirty.clear();
+        if (rows.length) window.kangarooPush(rows);
+    };
+
+    const observer = new MutationObserver(mutations => {
+        for (const m of mutations) {
+            const el = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+            const tr = el && el.closest('tbody tr');
+            if (tr) {
+                dirty.add(tr);
+            } else if (m.type === 'childList') {
+                // rows added to the tbody (e.g. table expanded)
+                m.addedNodes.forEach(n => { if (n.nodeType === 1 && n.tagName === 'TR') dirty.add(n); });
+            }
+        }
+        // batch bursts of cell updates into one push
+        if (!scheduled && dirty.size) {
+            scheduled = true;
+            setTimeout(flush, 50);
+        }
+    });
+
+    observer.observe(table, { subtree: true, childList: true, characterData: true });
+    window.__kangarooObserver = observer;
+    return true;
+}
+"""
+
 class ASXScraper:
     def __init__(self):
-        self.browser = None
-        self.context = None
         self.page = None
 
+        # push mode state: latest pushed row per ticker
+        self.pushed: dict[str, dict] = {}
+        self.push_event = asyncio.Event()
+        self.push_enabled = False
+
     async def start(self):
-        """start playwright session"""
-        p = await async_playwright().start()
-        self.browser = await p.chromium.launch(headless=True)
-        self.context = await self.browser.new_context(
-             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        self.page = await self.context.new_page()
+        """lease a long-lived page from the shared browser pool"""
+        self.page = await browser_pool.acquire()
+        await self.page.add_init_script(PARSE_ROW_JS)
         await self._setup_page()
 
     async def stop(self):
-        """close browser"""
-        if self.browser:
-            await self.browser.close()
+        """hand the page back to the pool"""
+        if self.page:
+            await browser_pool.release(self.page)
+            self.page = None
 
     async def _setup_page(self):
         print("[🦘] navigating to marketindex...")
-        await self.page.goto("https://www.marketindex.com.au/asx200", wait_until="domcontentloaded", timeout=60000)
+        url = "https://www.marketindex.com.au/asx200"
+        await provider.goto(self.page, url, wait_until="domcontentloaded", timeout=60000)
         
         # click the "cboe live" button (to get live data rather than the default asx delayed)
         try:
@@ -55,6 +140,8 @@ class ASXScraper:
         except Exception as e:
             print(f"[🦘] couldn't expand table: {e}")
 
+        await provider.snapshot(self.page, url)
+
     async def get_current_data(self) -> list[dict]:
         """scrapes the table and returns a list of dictionaries"""
         return await self.page.evaluate("""
@@ -63,39 +150,52 @@ class ASXScraper:
                               document.querySelector('table.mi-table.quoteapi-even-items');
                 if (!table) return [];
                 
-                const rows = table.querySelectorAll('tbody tr');
                 const results = [];
-                
-                rows.forEach(row => {
-                    const cells = row.querySelectorAll('td');
-                    if (cells.length >= 8) {
-                        const codeCell = cells[1];
-                        const code = codeCell.querySelector('a')?.textContent?.trim() || codeCell.textContent?.trim() || '';
-                        let company = cells[2]?.textContent?.trim() || '';
-                        
-                        // avoid (e.g. "BHPBHP Group")
-                        if (code && company.startsWith(code) && company.length > code.length) {
-                            company = company.substring(code.length).trim();
-                        }
-                        
-                        // clean price strings ("$10.50" -> 10.50)
-                        const getVal = (i) => cells[i]?.textContent?.trim() || '0';
-                        
-                        if (code && code.length <= 5) {
-                            results.push({
-                                ticker: code,
-                                name: company,
-                                price: getVal(3),
-                                change_amount: getVal(4),
-                                change_percent: getVal(5),
-                                high: getVal(6),
-                                low: getVal(7),
-                                volume: getVal(8),
-                                market_cap: getVal(9)
-                            }); 
-                       }
-                    }
+                table.querySelectorAll('tbody tr').forEach(row => {
+                    const parsed = window.__kangarooParseRow(row);
+                    if (parsed) results.push(parsed);
                 });
                 return results;
             }
-        """)
\ No newline at end of file
+        """)
+
+    def _on_push(self, source, rows: list[dict]):
+        """called from the page by the MutationObserver"""
+        for row in rows:
+            self.pushed[row['ticker']] = row
+        self.push_event.set()
+
+    async def enable_push(self) -> bool:
+        """
+        installs a MutationObserver on the table so changed rows are pushed
+        to python as they happen instead of re-walking the whole table
+        returns False if the table couldn't be found (stay in polling mode)
+        """
+        try:
+            if not self.push_enabled:
+                await self.page.expose_binding("kangarooPush", self._on_push)
+            self.push_enabled = await self.page.evaluate(INSTALL_OBSERVER_JS)
+        except Exception as e:
+            print(f"[🦘] couldn't enable push mode: {e}")
+            self.push_enabled = False
+
+        if self.push_enabled:
+            print("[🦘] push mode active (MutationObserver)")
+        return self.push_enabled
+
+    async def wait_for_updates(self, timeout: float) -> list[dict]:
+        """
+        waits for pushed rows and returns them (latest per ticker)
+        returns [] if nothing changed within the timeout
+        """
+        try:
+            await asyncio.wait_for(self.push_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        # let a burst of updates land so we write one batch
+        await asyncio.sleep(PUSH_BATCH_WINDOW)
+        self.push_event.clear()
+        rows = list(self.pushed.values())
+        self.pushed.clear()
+        return rows
@@ -0,0 +1,312 @@
+"""
+seeded, reproducible market simulation
+
+SimulatedSource is a MarketDataSource (like the scraper / replay sources) that
+generates the price path from a seed, so the same seed, tick count, universe
+and regime always produce the same ticks
+
+run headless as a benchmark / regression workload, against a scratch db:
+    DATABASE_URL=sqlite:///./sim.db python simulation.py --seed 42 --ticks 500 --universe 2000 --regime volatile
+or feed a running app on a scratch db with MARKET_DATA_SOURCE=simulated (SIM_SEED, SIM_TICKS, SIM_UNIVERSE, SIM_REGIME)
+both refuse kangaroo.db, and ticks go to SIM_TICK_DIR unless TICK_DIR already points away from ./ticks
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import os
+import time
+import numpy as np
+from database import Base, engine, SessionLocal
+from market_data import MarketDataSource
+from ingestor import TickDiffer, update_database
+from order_book import order_book
+from alerts import alert_index
+from market_version import market_version
+import tick_store as tick_store_module
+from tick_store import tick_store
+from price_simulator import PriceSimulator, REFERENCE_TICK, TICK_INTERVAL, TICK_VOLATILITY
+import models
+
+# volatility (std dev of a 2s move) and drift (mean log return per 2s tick) per regime
+REGIMES = {
+    "calm": {"volatility": 0.002, "drift": 0.0},
+    "normal": {"volatility": TICK_VOLATILITY, "drift": 0.0},
+    "volatile": {"volatility": 0.015, "drift": 0.0},
+    "crash": {"volatility": 0.02, "drift": -0.001},
+}
+
+# yfinance sector names, weighted roughly like the asx
+SECTORS = {
+    "Basic Materials": 0.22,
+    "Financial Services": 0.17,
+    "Industrials": 0.11,
+    "Consumer Cyclical": 0.10,
+    "Real Estate": 0.09,
+    "Healthcare": 0.08,
+    "Energy": 0.06,
+    "Technology": 0.06,
+    "Communication Services": 0.04,
+    "Utilities": 0.04,
+    "Consumer Defensive": 0.03,
+}
+
+SIM_SEED = int(os.getenv("SIM_SEED", "42"))
+SIM_TICKS = int(os.getenv("SIM_TICKS", "1000"))
+SIM_UNIVERSE = int(os.getenv("SIM_UNIVERSE", "500"))
+SIM_REGIME = os.getenv("SIM_REGIME", "normal")
+
+# where simulated ticks go while TICK_DIR is still the live default
+SIM_TICK_DIR = os.getenv("SIM_TICK_DIR", "./sim_ticks")
+LIVE_TICK_DIR = "./ticks"
+
+def ensure_scratch_target():
+    """
+    the simulation inserts fake stocks (and run_simulation wipes every table), so it refuses to touch
+    kangaroo.db, and moves the tick store off the live tick directory
+    """
+    database = engine.url.database
+    if database and os.path.basename(database) == "kangaroo.db":
+        raise ValueError("refusing to simulate into kangaroo.db, point DATABASE_URL at a scratch db (e.g. sqlite:///./sim.db)")
+    if os.path.abspath(tick_store_module.TICK_DIR) == os.path.abspath(LIVE_TICK_DIR):
+        with tick_store.lock:
+            for conn in tick_store.connections.values():
+                conn.close()
+            tick_store.connections.clear()
+        tick_store_module.TICK_DIR = SIM_TICK_DIR
+        print(f"[🎲] simulated ticks go to {SIM_TICK_DIR}")
+
+def _format_cap(value: float) -> str:
+    """200e9 -> '$200B', what the scraper shows"""
+    for suffix, size in (("T", 1e12), ("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        if value >= size:
+            return f"${value / size:.1f}{suffix}"
+    return f"${value:.0f}"
+
+class SimulatedSource(MarketDataSource):
+    """
+    scraped-style rows from the correlated price model in price_simulator
+    the universe (tickers, sectors, prices, share counts) and every move come from `seed`
+    the first batch is the whole table, after that only the stocks that moved
+    """
+    name = "simulated"
+
+    def __init__(self, seed: int = SIM_SEED, ticks: int = SIM_TICKS, universe: int = SIM_UNIVERSE, regime: str = SIM_REGIME, interval: float = TICK_INTERVAL):
+        if regime not in REGIMES:
+            raise ValueError(f"unknown regime '{regime}', pick one of {', '.join(REGIMES)}")
+        self.seed = seed
+        self.ticks = ticks
+        self.regime = regime
+        self.interval = interval  # seconds between batches, 0 = as fast as the consumer goes
+        self.tick = 0
+        self.path_hash = hashlib.blake2b(digest_size=16)
+
+        # separate streams so the universe doesn't shift the path (and vice versa)
+        universe_seed, path_seed = np.random.SeedSequence(seed).spawn(2)
+        rng = np.random.default_rng(universe_seed)
+        self.sim = PriceSimulator(seed=path_seed, **REGIMES[regime])
+
+        self.tickers = [f"S{i:04d}" for i in range(universe)]
+        self.sectors = rng.choice(list(SECTORS), size=universe, p=list(SECTORS.values())).tolist()
+        prices = np.round(np.clip(np.exp(rng.normal(np.log(4), 1.3, universe)), 0.01, 300), 3)
+        self.shares = np.exp(rng.normal(np.log(3e8), 1.2, universe))
+        self.volume = np.zeros(universe, dtype=np.int64)
+        self.sim.set_universe(
+            ids=list(range(universe)),
+            tickers=self.tickers,
+            sectors=self.sectors,
+            prices=prices.tolist(),
+            change_amounts=[0.0] * universe,
+            volumes=[None] * universe,
+        )
+        self.high = self.sim.prices.copy()
+        self.low = self.sim.prices.copy()
+
+    def is_open(self) -> bool:
+        return self.tick < self.ticks
+
+    async def start(self):
+        ensure_scratch_target()
+        print(f"[🎲] simulating {len(self.tickers)} stocks for {self.ticks} ticks (seed {self.seed}, {self.regime})")
+        db = SessionLocal()
+        try:
+            # stocks go in with their sectors, so the ingestor never queues a metadata lookup for them
+            known = {t for (t,) in db.query(models.Stock.ticker).filter(models.Stock.ticker.in_(self.tickers)).all()}
+            db.bulk_insert_mappings(models.Stock, [
+                {"ticker": t, "name": f"Simulated {t}", "sector": sector, "price": 0.0}
+                for t, sector in zip(self.tickers, self.sectors) if t not in known
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+    def rows(self, idx: np.ndarray) -> list[dict]:
+        price = self.sim.prices[idx]
+        prev = self.sim.prev_close[idx]
+        change = np.round(price - prev, 4)
+        pct = change / prev * 100
+        cap = price * self.shares[idx]
+        return [
+            {
+                "ticker": self.tickers[i],
+                "name": f"Simulated {self.tickers[i]}",
+                "price": str(p),
+                "change_amount": str(c),
+                "change_percent": f"{pc:+.2f}%",
+                "high": str(h),
+                "low": str(lo),
+                "volume": f"{v:,}",
+                "market_cap": _format_cap(mc),
+            }
+            for i, p, c, pc, h, lo, v, mc in zip(
+                idx.tolist(), price.tolist(), change.tolist(), pct.tolist(),
+                self.high[idx].tolist(), self.low[idx].tolist(), self.volume[idx].tolist(), cap.tolist()
+            )
+        ]
+
+    async def next_batch(self) -> list[dict] | None:
+        if not self.is_open():
+            return None
+        await asyncio.sleep(self.interval) # 0 still yields to the loop
+
+        if self.tick == 0:
+            moved = np.arange(len(self.tickers))
+        else:
+            # simulated time always advances a full interval, however fast we run
+            moved = self.sim.step(self.interval or REFERENCE_TICK)
+            self.volume[moved] += self.sim.rng.lognormal(7, 1, len(moved)).astype(np.int64)
+            self.high[moved] = np.maximum(self.high[moved], self.sim.prices[moved])
+            self.low[moved] = np.minimum(self.low[moved], self.sim.prices[moved])
+
+        self.tick += 1
+        self.path_hash.update(self.sim.prices.tobytes())
+        return self.rows(moved)
+
+    def digest(self) -> str:
+        """hash of the price path so far, equal across runs with the same settings"""
+        return self.path_hash.hexdigest()
+
+def _seed_orders_and_alerts(source: SimulatedSource, orders: int, alerts: int):
+    """resting orders and price alerts a few % either side of the opening prices, from the same seed"""
+    rng = np.random.default_rng(np.random.SeedSequence(source.seed).spawn(3)[2])
+    universe = len(source.tickers)
+    db = SessionLocal()
+    try:
+        # enough cash and stock that every fill goes through
+        db.add(models.Account(balance=1e15))
+        db.bulk_insert_mappings(models.Holding, [{"ticker": t, "shares": 10**9, "avg_cost": 1.0} for t in source.tickers])
+
+        idx = rng.integers(0, universe, orders)
+        types = rng.choice(["LIMIT_BUY", "LIMIT_SELL", "STOP_LOSS"], orders)
+        offsets = rng.uniform(0.005, 0.05, orders)
+        db.bulk_insert_mappings(models.PendingOrder, [
+            {
+                "ticker": source.tickers[i],
+                "order_type": order_type,
+                "shares": int(shares),
+                "limit_price": round(float(source.sim.prices[i] * (1 + off if order_type == "LIMIT_SELL" else 1 - off)), 4),
+                "status": "PENDING",
+            }
+            for i, order_type, off, shares in zip(idx.tolist(), types.tolist(), offsets.tolist(), rng.integers(1, 500, orders).tolist())
+        ])
+
+        idx = rng.integers(0, universe, alerts)
+        conditions = rng.choice(["ABOVE", "BELOW"], alerts)
+        offsets = rng.uniform(0.005, 0.05, alerts)
+        db.bulk_insert_mappings(models.Alert, [
+            {
+                "ticker": source.tickers[i],
+                "condition": condition,
+                "target_price": round(float(source.sim.prices[i] * (1 + off if condition == "ABOVE" else 1 - off)), 4),
+                "status": "ACTIVE",
+            }
+            for i, condition, off in zip(idx.tolist(), conditions.tolist(), offsets.tolist())
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def run_simulation(seed: int, ticks: int, universe: int, regime: str, orders: int = 0, alerts: int = 0, verbose: bool = False) -> dict:
+    """
+    resets the db, then pushes every tick through the live pipeline as fast as it goes:
+    TickDiffer -> update_database (stocks upsert, tick store, bars, order matching, alerts)
+    returns timings and the price path digest
+    """
+    ensure_scratch_target()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    market_version.load()
+
+    source = SimulatedSource(seed=seed, ticks=ticks, universe=universe, regime=regime, interval=0)
+    await source.start()
+    _seed_orders_and_alerts(source, orders, alerts)
+    order_book.rebuild()
+    alert_index.rebuild()
+
+    differ = TickDiffer()
+    latencies = []
+    rows = 0
+    # the pipeline logs every tick, which would mostly measure the terminal
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with quiet:
+        while source.is_open():
+            data = await source.next_batch()
+            changed = differ.diff(data)
+            tick_start = time.perf_counter()
+            if changed and not await update_database(changed):
+                differ.reset()
+            await tick_store.flush()
+            latencies.append(time.perf_counter() - tick_start)
+            rows += len(changed)
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        filled = db.query(models.PendingOrder).filter(models.PendingOrder.status == "FILLED").count()
+        triggered = db.query(models.Alert).filter(models.Alert.status == "TRIGGERED").count()
+    finally:
+        db.close()
+
+    latencies_ms = np.array(latencies) * 1000
+    simulated_seconds = ticks * REFERENCE_TICK
+    return {
+        "seed": seed,
+        "ticks": ticks,
+        "universe": universe,
+        "regime": regime,
+        "rows": rows,
+        "orders_filled": filled,
+        "alerts_triggered": triggered,
+        "wall_seconds": round(elapsed, 3),
+        "speedup": round(simulated_seconds / elapsed, 1) if elapsed else None,
+        "tick_ms_p50": round(float(np.percentile(latencies_ms, 50)), 3),
+        "tick_ms_p95": round(float(np.percentile(latencies_ms, 95)), 3),
+        "tick_ms_max": round(float(latencies_ms.max()), 3),
+        "path_digest": source.digest(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="seeded market simulation through the ingest -> matching -> alerts pipeline")
+    parser.add_argument("--seed", type=int, default=SIM_SEED)
+    parser.add_argument("--ticks", type=int, default=SIM_TICKS)
+    parser.add_argument("--universe", type=int, default=SIM_UNIVERSE)
+    parser.add_argument("--regime", choices=list(REGIMES), default=SIM_REGIME)
+    parser.add_argument("--orders", type=int, default=2000, help="resting orders to seed")
+    parser.add_argument("--alerts", type=int, default=2000, help="price alerts to seed")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's per-tick logging")
+    args = parser.parse_args()
+
+    # the run wipes the tables it uses
+    try:
+        ensure_scratch_target()
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    result = asyncio.run(run_simulation(args.seed, args.ticks, args.universe, args.regime, args.orders, args.alerts, args.verbose))
+    for key, value in result.items():
+        print(f"{key:>18}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import yfinance as yf # type: ignore
+from data_provider import provider
 from datetime import datetime, timedelta, timezone
 import json
 import asyncio
@@ -6,7 +6,6 @@ from openai import AsyncOpenAI
 import os
 from sqlalchemy.orm import Session # type: ignore
 import models
-import feedparser # type: ignore
 import urllib.parse
 from news_scraper import scrape_google_news
 from agent_tools import get_current_time
@@ -44,7 +43,7 @@ async def get_recent_news(stock_ticker):
         rss_url = f"https://news.google.com/rss/search?q={encoded_ticker}+stock+australia+when:2d&hl=en-AU&gl=AU&ceid=AU:en"
         
         loop = asyncio.get_event_loop()
-        feed = await loop.run_in_executor(None, lambda: feedparser.parse(rss_url))
+        feed = await loop.run_in_executor(None, lambda: provider.rss(rss_url))
         
         now = datetime.now(timezone.utc)
         
@@ -108,15 +107,9 @@ async def process_stock_story(stock, db: Session = None):
     try:
         # check price move (>3%)
         price_condition = False
-        change_pct = 0.0
-        try:
-            # clean string "+1.23%" -> 1.23
-            clean_pct = stock.change_percent.replace('%','').replace('+','')
-            change_pct = float(clean_pct)
-            if abs(change_pct) >= 3.0:
-                price_condition = True
-        except:
-            pass
+        change_pct = stock.change_percent_value or 0.0
+        if abs(change_pct) >= 3.0:
+            price_condition = True
             
         # check news
         news_item = await get_recent_news(stock.ticker)
@@ -0,0 +1,276 @@
+import os
+import threading
+import zlib
+from datetime import datetime, time, timedelta
+import numpy as np
+import pandas as pd
+import pytz
+from sqlalchemy import func # type: ignore
+from database import SessionLocal
+from price_simulator import MARKET_WEIGHT, SECTOR_WEIGHT, IDIO_WEIGHT
+import models
+
+# display mode price history, generated instead of downloaded
+# every ticker gets the same path on every call (seeded per ticker, per sector and for the market)
+# and each path ends at the simulator's current price, so charts, analytics and quotes agree
+
+SYNTH_SEED = int(os.getenv("SYNTH_SEED", "7"))
+
+SYDNEY_TZ = pytz.timezone("Australia/Sydney")
+
+# first generated day, "max" goes back to here
+EPOCH = "2014-01-01"
+
+SESSION_OPEN = time(10, 0)
+SESSION_CLOSE = time(16, 0)
+
+# daily log return drift, and the range of per-stock daily volatility
+DAILY_DRIFT = 0.0003
+MIN_DAILY_VOL = 0.012
+MAX_DAILY_VOL = 0.035
+INDEX_DAILY_VOL = 0.009
+
+# index symbol -> sector factor it follows (None = the whole market)
+INDEX_SECTORS = {
+    "^AXJO": None,
+    "^AXFJ": "Financial Services",
+    "^AXMJ": "Basic Materials",
+    "^AXHJ": "Healthcare",
+    "^AXRE": "Real Estate",
+    "^AXIJ": "Technology",
+    "^AXEJ": "Energy",
+    "^AXDJ": "Consumer Cyclical",
+    "^AXSJ": "Consumer Defensive",
+    "^AXTJ": "Communication Services",
+    "^AXUJ": "Utilities",
+    "^AXNJ": "Industrials",
+}
+ASX200_LEVEL = 8500.0
+
+INTRADAY_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60}
+
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+OHLCV = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+def _key(name: str) -> int:
+    return zlib.crc32(name.encode())
+
+def _uniform(name: str, salt: str, low: float, high: float) -> float:
+    """stable per-symbol constant"""
+    return low + (high - low) * (_key(f"{salt}:{name}") / 0xFFFFFFFF)
+
+class SyntheticHistory:
+    """
+    daily bars since EPOCH from a factor model (market + sector + idiosyncratic, like price_simulator)
+    streams are drawn day by day, so adding a new day never changes the old ones
+    intraday bars are a brownian bridge from each day's open to its close
+    """
+    def __init__(self, seed: int = SYNTH_SEED):
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.calendar_end = None
+        self.calendar = pd.DatetimeIndex([])
+        self.factors: dict[str, np.ndarray] = {}
+
+    def _calendar(self) -> pd.DatetimeIndex:
+        """business days up to the current (or last) session, as yfinance's daily index"""
+        now = datetime.now(SYDNEY_TZ)
+        # today isn't a session until the open, before that the last one is the previous business day
+        end = now.date() if now.time() >= SESSION_OPEN else now.date() - timedelta(days=1)
+        with self.lock:
+            if self.calendar_end != end:
+                self.calendar = pd.DatetimeIndex(pd.bdate_range(EPOCH, end).tz_localize(SYDNEY_TZ), name="Date")
+                self.calendar_end = end
+                self.factors.clear()
+            return self.calendar
+
+    def _factor(self, name: str, n: int) -> np.ndarray:
+        with self.lock:
+            factor = self.factors.get(name)
+            if factor is None or len(factor) < n:
+                factor = np.random.default_rng([self.seed, _key(name)]).standard_normal(n)
+                self.factors[name] = factor
+            return factor[:n]
+
+    def _anchors(self, symbols: list[str]) -> dict[str, dict]:
+        """previous close, current price, volume and sector per symbol, from the stocks table"""
+        tickers = [s.removesuffix(".AX") for s in symbols if not s.startswith("^")]
+        anchors = {}
+        db = SessionLocal()
+        try:
+            if tickers:
+                rows = db.query(
+                    models.Stock.ticker,
+                    models.Stock.price,
+                    models.Stock.change_amount,
+                    models.Stock.volume_value,
+                    models.Stock.sector,
+                ).filter(models.Stock.ticker.in_(tickers)).all()
+                for row in rows:
+                    if not row.price or row.price <= 0:
+                        continue
+                    prev_close = row.price - (row.change_amount or 0.0)
+                    anchors[row.ticker] = {
+                        "prev_close": prev_close if prev_close > 0 else row.price,
+                        "price": row.price,
+                        "volume": row.volume_value,
+                        "sector": row.sector,
+                    }
+
+            indices = [s for s in symbols if s.startswith("^")]
+            if indices:
+                # an index's day so far is the cap-weighted change of its stocks
+                weighted = dict(
+                    db.query(
+                        models.Stock.sector,
+                        func.sum(models.Stock.market_cap_value * models.Stock.change_percent_value) / func.sum(models.Stock.market_cap_value),
+                    ).filter(models.Stock.market_cap_value > 0).group_by(models.Stock.sector).all()
+                )
+                market = db.query(
+                    func.sum(models.Stock.market_cap_value * models.Stock.change_percent_value) / func.sum(models.Stock.market_cap_value)
+                ).filter(models.Stock.market_cap_value > 0).scalar()
+                for symbol in indices:
+                    sector = INDEX_SECTORS.get(symbol)
+                    level = ASX200_LEVEL if symbol == "^AXJO" else round(_uniform(symbol, "level", 3000, 15000), 1)
+                    change = (weighted.get(sector) if sector else market) or 0.0
+                    anchors[symbol] = {"prev_close": level, "price": level * (1 + change / 100), "volume": None, "sector": sector}
+        finally:
+            db.close()
+        return anchors
+
+    def _returns(self, symbol: str, sector: str | None, n: int) -> tuple[np.ndarray, np.ndarray, float]:
+        """daily log returns, per-day noise for the bar shapes, and the daily volatility"""
+        noise = np.random.default_rng([self.seed, _key(symbol), 1]).standard_normal((n, 5))
+        market = self._factor("market", n)
+        if symbol.startswith("^"):
+            vol = INDEX_DAILY_VOL
+            if sector is None:
+                shock = market
+            else:
+                # an index has no stock-specific noise, renormalise the two factors
+                total = MARKET_WEIGHT + SECTOR_WEIGHT
+                shock = np.sqrt(MARKET_WEIGHT / total) * market + np.sqrt(SECTOR_WEIGHT / total) * self._factor(f"sector:{sector}", n)
+        else:
+            vol = _uniform(symbol, "vol", MIN_DAILY_VOL, MAX_DAILY_VOL)
+            shock = (
+                np.sqrt(MARKET_WEIGHT) * market
+                + np.sqrt(SECTOR_WEIGHT) * self._factor(f"sector:{sector or 'Other'}", n)
+                + np.sqrt(IDIO_WEIGHT) * noise[:, 0]
+            )
+        return DAILY_DRIFT - 0.5 * vol ** 2 + vol * shock, noise, vol
+
+    def _start(self, period: str) -> int:
+        """position in the calendar the period starts at"""
+        calendar = self._calendar()
+        last = calendar[-1]
+        if period.endswith("d") and period[:-1].isdigit():
+            return max(0, len(calendar) - int(period[:-1]))
+        if period == "ytd":
+            return int(calendar.searchsorted(last.replace(month=1, day=1)))
+        if period in PERIOD_OFFSETS:
+            return int(calendar.searchsorted(last - PERIOD_OFFSETS[period], side="right"))
+        return 0 # max
+
+    def _daily(self, symbol: str, anchor: dict | None, start: int = 0) -> pd.DataFrame:
+        """daily bars from calendar position `start`, the whole path is generated so it's the same for any start"""
+        calendar = self._calendar()
+        n = len(calendar)
+        if anchor is None:
+            # not a stock we know, make one up
+            base = round(_uniform(symbol, "price", 1, 100), 2)
+            anchor = {"prev_close": base, "price": None, "volume": None, "sector": None}
+
+        r, noise, vol = self._returns(symbol, anchor["sector"], n)
+        cum = np.cumsum(r)
+        # yesterday closes exactly at the previous close, today at the live price
+        close = anchor["prev_close"] * np.exp(cum - cum[-2])
+        if anchor["price"]:
+            close[-1] = anchor["price"]
+
+        prev = np.concatenate(([close[0] * np.exp(-r[0])], close[:-1]))
+        open_ = prev * np.exp(0.25 * vol * noise[:, 1])
+        high = np.maximum(open_, close) * np.exp(0.4 * vol * np.abs(noise[:, 2]))
+        low = np.minimum(open_, close) * np.exp(-0.4 * vol * np.abs(noise[:, 3]))
+
+        base_volume = anchor["volume"] or int(_uniform(symbol, "volume", 2e5, 5e6))
+        volume = (base_volume * np.exp(0.35 * noise[:, 4] + 8 * np.abs(r))).astype(np.int64)
+        if anchor["volume"]:
+            volume[-1] = anchor["volume"]
+
+        return pd.DataFrame({
+            "Open": np.round(open_[start:], 4),
+            "High": np.round(high[start:], 4),
+            "Low": np.round(low[start:], 4),
+            "Close": np.round(close[start:], 4),
+            "Volume": volume[start:],
+        }, index=calendar[start:])
+
+    def _intraday(self, symbol: str, days: pd.DataFrame, minutes: int) -> pd.DataFrame:
+        per_day = max(1, (SESSION_CLOSE.hour - SESSION_OPEN.hour) * 60 // minutes)
+        now = datetime.now(SYDNEY_TZ)
+        frames = []
+        for day, bar in days.iterrows():
+            bars = per_day
+            if day.date() == now.date() and now.time() < SESSION_CLOSE:
+                # today's session so far (the calendar only has today once it's open), ending at the live price
+                elapsed = (now.hour - SESSION_OPEN.hour) * 60 + now.minute - SESSION_OPEN.minute
+                bars = min(per_day, max(1, elapsed // minutes + 1))
+
+            rng = np.random.default_rng([self.seed, _key(symbol), day.toordinal()])
+            steps = rng.standard_normal((bars, 3))
+            t = np.arange(1, bars + 1) / bars
+            walk = np.cumsum(steps[:, 0]) / np.sqrt(bars)
+            bridge = walk - t * walk[-1]
+            day_range = np.log(bar["High"] / bar["Low"]) or 0.01
+            log_close = np.log(bar["Open"]) + t * np.log(bar["Close"] / bar["Open"]) + 0.5 * day_range * bridge
+            close = np.exp(log_close)
+            open_ = np.concatenate(([bar["Open"]], close[:-1]))
+            wick = 0.1 * day_range / np.sqrt(bars)
+            # u-shaped volume, busy at the open and the close
+            weights = 1 + 2 * (2 * t - 1) ** 2 + 0.3 * np.abs(steps[:, 2])
+
+            start = SYDNEY_TZ.localize(datetime.combine(day.date(), SESSION_OPEN))
+            frames.append(pd.DataFrame({
+                "Open": np.round(open_, 4),
+                "High": np.round(np.maximum(open_, close) * np.exp(wick * np.abs(steps[:, 1])), 4),
+                "Low": np.round(np.minimum(open_, close) * np.exp(-wick * np.abs(steps[:, 2])), 4),
+                "Close": np.round(close, 4),
+                "Volume": (bar["Volume"] / per_day * weights / weights.mean()).astype(np.int64),
+            }, index=pd.date_range(start, periods=bars, freq=f"{minutes}min", name="Datetime")))
+        return pd.concat(frames) if frames else pd.DataFrame(columns=list(OHLCV))
+
+    def _history(self, symbol: str, anchor: dict | None, period: str, interval: str) -> pd.DataFrame:
+        daily = self._daily(symbol, anchor, self._start(period))
+        if interval in INTRADAY_MINUTES:
+            return self._intraday(symbol, daily, INTRADAY_MINUTES[interval])
+        if interval == "1wk":
+            return daily.resample("W-MON", label="left", closed="left").agg(OHLCV).dropna()
+        if interval in ("1mo", "3mo"):
+            return daily.resample("MS" if interval == "1mo" else "QS").agg(OHLCV).dropna()
+        return daily
+
+    def history(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """one symbol, shaped like yf.Ticker(symbol).history()"""
+        anchors = self._anchors([symbol])
+        return self._history(symbol, anchors.get(symbol.removesuffix(".AX")) or anchors.get(symbol), period, interval)
+
+    def bars(self, symbols: list[str], period: str = "1y", interval: str = "1d") -> dict[str, pd.DataFrame]:
+        anchors = self._anchors(symbols)
+        return {
+            symbol: self._history(symbol, anchors.get(symbol.removesuffix(".AX")) or anchors.get(symbol), period, interval)
+            for symbol in symbols
+        }
+
+    def closes(self, symbols: list[str], period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+        return pd.DataFrame({symbol: frame["Close"] for symbol, frame in self.bars(symbols, period, interval).items()})
+
+synthetic_history = SyntheticHistory()
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# the backend is a flat set of modules, import them the way main.py does
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# never the real kangaroo.db / caches, and nothing reaches the network (fixtures mode, empty dir)
+SCRATCH_DIR = tempfile.mkdtemp(prefix="kangaroo-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SCRATCH_DIR, 'test.db')}"
+os.environ["HISTORY_DB"] = os.path.join(SCRATCH_DIR, "history.db")
+os.environ["INFO_CACHE_DB"] = os.path.join(SCRATCH_DIR, "info_cache.db")
+os.environ["TICK_DIR"] = os.path.join(SCRATCH_DIR, "ticks")
+os.environ["DATA_PROVIDER"] = "fixtures"
+os.environ["FIXTURES_DIR"] = os.path.join(SCRATCH_DIR, "fixtures")
+
+@pytest.fixture
+def db():
+    """a session on a freshly created scratch schema"""
+    from database import Base, SessionLocal, engine
+    import models # noqa: F401, registers the tables
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+import models
+from alerts import AlertIndex, check_alerts
+
+def _alert(alert_id, condition, target_price, ticker="BHP", session_id=None):
+    return SimpleNamespace(id=alert_id, ticker=ticker, condition=condition, target_price=target_price, session_id=session_id)
+
+def test_crossed_fires_targets_on_the_right_side():
+    index = AlertIndex(models.Alert)
+    index.add(_alert(1, "ABOVE", 45.0))
+    index.add(_alert(2, "ABOVE", 50.0))
+    index.add(_alert(3, "BELOW", 40.0))
+
+    assert index.crossed("BHP", 44.9) == []
+    assert index.crossed("BHP", 45.0) == [1]
+    assert sorted(index.crossed("BHP", 51.0)) == [1, 2]
+    assert index.crossed("BHP", 40.0) == [3]
+    assert index.crossed("CBA", 100.0) == []
+
+def test_only_price_alerts_are_indexed():
+    index = AlertIndex(models.Alert)
+    index.add(_alert(1, "REMINDER", None))
+    index.add(_alert(2, "ABOVE", None))
+    index.add(_alert(3, "ABOVE", 45.0))
+    index.add(_alert(3, "ABOVE", 45.0))
+    assert len(index) == 1
+
+def test_remove_drops_empty_tickers():
+    index = AlertIndex(models.Alert)
+    index.add(_alert(1, "ABOVE", 45.0))
+    index.add(_alert(2, "BELOW", 40.0, ticker="CBA"))
+    index.remove(1)
+    index.remove(1)
+    assert index.tickers() == {"CBA"}
+    assert index.crossed("BHP", 100.0) == []
+
+def test_check_alerts_triggers_crossed_rows(db):
+    rows = [
+        models.Alert(ticker="BHP", condition="ABOVE", target_price=45.0, status="ACTIVE"),
+        models.Alert(ticker="BHP", condition="BELOW", target_price=40.0, status="ACTIVE"),
+    ]
+    db.add_all(rows)
+    db.commit()
+    index = AlertIndex(models.Alert)
+    index.rebuild(db)
+
+    assert check_alerts(db, index, {"BHP": 46.0}) == 1
+    # still indexed until the trigger commits
+    assert len(index) == 2
+    db.commit()
+    assert [a.status for a in db.query(models.Alert).order_by(models.Alert.id)] == ["TRIGGERED", "ACTIVE"]
+    # triggered alerts leave the index, so the same price doesn't fire twice
+    assert check_alerts(db, index, {"BHP": 46.0}) == 0
+    assert len(index) == 1
+
+def test_check_alerts_only_reads_the_index_it_is_given(db):
+    live = AlertIndex(models.Alert)
+    live.add(_alert(1, "ABOVE", 45.0))
+    session = AlertIndex(models.SessionAlert)
+
+    assert check_alerts(db, session, {"BHP": 50.0}) == 0
+    assert len(live) == 1
+
+def test_a_rolled_back_trigger_keeps_the_alert_live(db):
+    db.add(models.Alert(ticker="BHP", condition="ABOVE", target_price=45.0, status="ACTIVE"))
+    db.commit()
+    index = AlertIndex(models.Alert)
+    index.rebuild(db)
+
+    assert check_alerts(db, index, {"BHP": 46.0}) == 1
+    db.rollback()
+    assert db.query(models.Alert).one().status == "ACTIVE"
+    assert len(index) == 1
+
+    # so the next price still fires it
+    assert check_alerts(db, index, {"BHP": 46.5}) == 1
+    db.commit()
+    assert db.query(models.Alert).one().status == "TRIGGERED"
+    assert len(index) == 0
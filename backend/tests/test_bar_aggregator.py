@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+import bar_aggregator
+import tick_store
+from bar_aggregator import BarAggregator
+
+# 2026-10-16 11:00:00 sydney, on a 15 minute boundary
+OPEN = 1792108800
+
+@pytest.fixture
+def store(monkeypatch):
+    """a fresh tick store, so completed bars don't leak between tests"""
+    store = tick_store.TickStore()
+    monkeypatch.setattr(bar_aggregator, "tick_store", store)
+    return store
+
+def test_ticks_land_in_their_interval_bucket(store):
+    agg = BarAggregator()
+    agg.on_tick("BHP", OPEN, 45.0, 1000)
+    agg.on_tick("BHP", OPEN + 59.9, 45.1, 1000)
+    assert [b[0] for b in agg.get_bars("BHP", "1m", OPEN)[0]] == []
+
+    # the first tick of the next minute closes the 1m bar but not the 5m / 15m ones
+    agg.on_tick("BHP", OPEN + 60, 45.2, 1000)
+    assert agg.get_bars("BHP", "1m", OPEN) == ([[OPEN, 45.0, 45.1, 45.0, 45.1, 0]], [OPEN + 60, 45.2, 45.2, 45.2, 45.2, 0])
+    assert agg.get_bars("BHP", "5m", OPEN)[0] == []
+    assert agg.partial[("BHP", "5m")][0] == OPEN
+
+    agg.on_tick("BHP", OPEN + 300, 45.3, 1000)
+    assert [b[0] for b in agg.get_bars("BHP", "5m", OPEN)[0]] == [OPEN]
+    agg.on_tick("BHP", OPEN + 900, 45.4, 1000)
+    assert [b[0] for b in agg.get_bars("BHP", "15m", OPEN)[0]] == [OPEN]
+    assert [b[0] for b in agg.get_bars("BHP", "5m", OPEN)[0]] == [OPEN, OPEN + 300]
+
+def test_ohlc_and_volume_from_the_cumulative_day_volume(store):
+    agg = BarAggregator()
+    # the first tick only anchors the cumulative volume
+    agg.on_tick("BHP", OPEN + 1, 45.0, 10_000)
+    agg.on_tick("BHP", OPEN + 10, 46.0, 10_500)
+    agg.on_tick("BHP", OPEN + 20, 44.5, 10_700)
+    agg.on_tick("BHP", OPEN + 30, 45.5, 11_000)
+    # no price, ignored
+    agg.on_tick("BHP", OPEN + 40, 0.0, 12_000)
+
+    assert agg.partial[("BHP", "1m")] == [OPEN, 45.0, 46.0, 44.5, 45.5, 1000]
+    assert agg.partial[("BHP", "15m")] == [OPEN, 45.0, 46.0, 44.5, 45.5, 1000]
+
+    agg.on_tick("BHP", OPEN + 61, 45.6, 11_250)
+    assert agg.partial[("BHP", "1m")][5] == 250
+    assert agg.partial[("BHP", "15m")][5] == 1250
+
+def test_a_volume_reset_starts_a_new_session(store):
+    agg = BarAggregator()
+    agg.on_tick("BHP", OPEN, 45.0, 5_000_000)
+    # the next session's first report is smaller than yesterday's total
+    agg.on_tick("BHP", OPEN + 86400, 45.2, 300)
+    assert agg.partial[("BHP", "1m")] == [OPEN + 86400, 45.2, 45.2, 45.2, 45.2, 300]
+
+def test_the_first_tick_after_a_gap_opens_its_own_bar(store):
+    agg = BarAggregator()
+    agg.on_tick("BHP", OPEN + 5, 45.0, 1000)
+    agg.on_tick("BHP", OPEN + 30, 45.5, 1100)
+    # nothing for seven minutes, no empty bars are filled in
+    agg.on_tick("BHP", OPEN + 7 * 60 + 15, 47.0, 1600)
+
+    completed, partial = agg.get_bars("BHP", "1m", OPEN)
+    assert completed == [[OPEN, 45.0, 45.5, 45.0, 45.5, 100]]
+    # opens at the gap tick's price, carrying everything traded since the last tick
+    assert partial == [OPEN + 420, 47.0, 47.0, 47.0, 47.0, 500]
+
+    completed, partial = agg.get_bars("BHP", "5m", OPEN)
+    assert completed == [[OPEN, 45.0, 45.5, 45.0, 45.5, 100]]
+    assert partial[0] == OPEN + 300
+
+def test_roll_closes_bars_for_tickers_that_stopped_trading(store):
+    agg = BarAggregator()
+    agg.on_tick("BHP", OPEN, 45.0, 1000)
+    agg.roll(OPEN + 59)
+    assert ("BHP", "1m") in agg.partial
+
+    agg.roll(OPEN + 60)
+    assert ("BHP", "1m") not in agg.partial
+    assert ("BHP", "5m") in agg.partial
+    assert agg.get_bars("BHP", "1m", OPEN) == ([[OPEN, 45.0, 45.0, 45.0, 45.0, 0]], None)
+    assert store.bar_buffer == [("BHP", "1m", OPEN, 45.0, 45.0, 45.0, 45.0, 0)]
+
+def test_completed_bars_are_read_back_after_a_restart(store):
+    agg = BarAggregator()
+    for minute in range(3):
+        agg.on_tick("BHP", OPEN + minute * 60, 45.0 + minute, 1000 + minute * 100)
+    asyncio.run(store.flush())
+
+    restarted = BarAggregator()
+    completed, partial = restarted.get_bars("BHP", "1m", OPEN)
+    assert completed == [[OPEN, 45.0, 45.0, 45.0, 45.0, 0], [OPEN + 60, 46.0, 46.0, 46.0, 46.0, 100]]
+    assert partial is None
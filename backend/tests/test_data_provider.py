@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_provider import DataProvider, _join_download, _split_download, _trim
+
+def _bars(days: int = 300, end: str = "2026-10-16", tz: str | None = "Australia/Sydney") -> pd.DataFrame:
+    index = pd.bdate_range(end=end, periods=days, tz=tz, name="Date")
+    close = np.arange(days, dtype=float) + 1
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 100.0}, index=index)
+
+def test_trim_trading_days():
+    frame = _bars()
+    trimmed = _trim(frame, "5d")
+    assert len(trimmed) == 5
+    assert trimmed.index[-1] == frame.index[-1]
+
+def test_trim_intraday_days_keeps_whole_sessions():
+    index = pd.date_range("2026-10-13 10:00", periods=4 * 24, freq="h", tz="Australia/Sydney")
+    frame = pd.DataFrame({"Close": np.arange(len(index), dtype=float)}, index=index)
+    trimmed = _trim(frame, "2d")
+    assert trimmed.index.normalize().nunique() == 2
+    # the range runs to 2026-10-17 09:00, so the 16th and the 17th
+    assert trimmed.index[0] == pd.Timestamp("2026-10-16 00:00", tz="Australia/Sydney")
+
+def test_trim_counts_back_from_the_last_recorded_bar():
+    frame = _bars()
+    trimmed = _trim(frame, "1mo")
+    assert trimmed.index[0] > frame.index[-1] - pd.DateOffset(months=1)
+    assert trimmed.index[-1] == frame.index[-1]
+    assert len(_trim(frame, "1y")) < len(frame)
+
+def test_trim_ytd_max_and_unknown_periods():
+    frame = _bars()
+    assert (_trim(frame, "ytd").index.year == 2026).all()
+    assert _trim(frame, "ytd").index[0].month == 1
+    assert len(_trim(frame, "max")) == len(frame)
+    assert len(_trim(frame, None)) == len(frame)
+    assert len(_trim(frame, "bogus")) == len(frame)
+
+def test_trim_start_end_with_naive_bounds_on_a_tz_index():
+    frame = _bars()
+    trimmed = _trim(frame, "1mo", start="2026-10-01", end="2026-10-10")
+    # start/end win over the period, end is exclusive like yfinance
+    assert trimmed.index[0] == pd.Timestamp("2026-10-01", tz="Australia/Sydney")
+    assert trimmed.index[-1] == pd.Timestamp("2026-10-09", tz="Australia/Sydney")
+
+def test_trim_empty_frame():
+    empty = _bars().iloc[:0]
+    assert _trim(empty, "5d").empty
+
+@pytest.mark.parametrize("group_by", ["ticker", "column"])
+def test_split_and_join_round_trip(group_by):
+    frames = {"BHP.AX": _bars(10), "CBA.AX": _bars(10) * 2}
+    joined = _join_download(frames, group_by)
+    assert isinstance(joined.columns, pd.MultiIndex)
+    if group_by == "ticker":
+        assert joined.columns[0] == ("BHP.AX", "Open")
+    else:
+        assert set(joined.columns.get_level_values(0)) == {"Open", "High", "Low", "Close", "Volume"}
+
+    split = _split_download(joined, ["BHP.AX", "CBA.AX", "NOPE.AX"], group_by)
+    assert set(split) == {"BHP.AX", "CBA.AX"}
+    for symbol, frame in frames.items():
+        pd.testing.assert_frame_equal(split[symbol][frame.columns], frame, check_names=False)
+
+def test_split_drops_rows_a_symbol_has_no_data_for():
+    bhp = _bars(10)
+    newer = _bars(5)
+    joined = _join_download({"BHP.AX": bhp, "NEW.AX": newer}, "ticker")
+    split = _split_download(joined, ["BHP.AX", "NEW.AX"], "ticker")
+    assert len(split["BHP.AX"]) == 10
+    assert len(split["NEW.AX"]) == 5
+
+def test_split_single_symbol_download():
+    frame = _bars(10)
+    assert _split_download(frame, ["BHP.AX"], "column")["BHP.AX"] is frame
+
+def test_a_provider_missing_methods_cant_be_built():
+    class Partial(DataProvider):
+        def download(self, symbols, **kwargs):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+import enrichment
+import models
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """queue of fetch_metadata answers, an Exception in it is raised"""
+    answers = []
+
+    def fetch_metadata(ticker):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(enrichment, "fetch_metadata", fetch_metadata)
+    # no delayed re-enqueue, the test drives the retries
+    monkeypatch.setattr(enrichment, "MAX_ATTEMPTS", 1)
+    return answers
+
+def _stock(db, ticker="BHP"):
+    db.add(models.Stock(ticker=ticker, name=ticker))
+    db.commit()
+
+def _meta(db, ticker="BHP") -> models.TickerMetadata:
+    db.expire_all()
+    return db.get(models.TickerMetadata, ticker)
+
+def test_a_failed_lookup_is_retried_once_its_back_off_is_over(db, lookups):
+    _stock(db)
+    lookups.append(ConnectionError("yahoo down"))
+    asyncio.run(enrichment._enrich("BHP"))
+
+    meta = _meta(db)
+    assert meta.status == "UNKNOWN" and meta.sector == "Unknown"
+    assert db.query(models.Stock).one().sector == "Unknown"
+    # backing off
+    assert enrichment.due_tickers(db) == []
+
+    meta.retry_after = datetime.now() - timedelta(seconds=1)
+    db.commit()
+    # the ingestor won't queue it (it has a sector now), the sweep does
+    assert enrichment.due_tickers(db) == ["BHP"]
+
+    lookups.append({"sector": "Materials", "industry": "Mining", "shares_outstanding": 5e9})
+    asyncio.run(enrichment._enrich("BHP"))
+    meta = _meta(db)
+    assert meta.status == "OK" and meta.sector == "Materials"
+    assert db.query(models.Stock).one().sector == "Materials"
+    assert enrichment.due_tickers(db) == []
+
+def test_a_negative_answer_is_asked_again_after_its_ttl(db, lookups):
+    _stock(db)
+    lookups.append({"sector": None, "industry": None, "shares_outstanding": None})
+    asyncio.run(enrichment._enrich("BHP"))
+
+    meta = _meta(db)
+    assert meta.status == "UNKNOWN"
+    assert meta.retry_after > datetime.now() + enrichment.NEGATIVE_TTL - timedelta(minutes=1)
+    assert enrichment.due_tickers(db) == []
+    meta.retry_after = datetime.now() - timedelta(seconds=1)
+    db.commit()
+    assert enrichment.due_tickers(db) == ["BHP"]
+
+def test_old_lookups_are_refreshed(db, lookups):
+    _stock(db)
+    lookups.append({"sector": "Materials", "industry": "Mining", "shares_outstanding": 5e9})
+    asyncio.run(enrichment._enrich("BHP"))
+    assert enrichment.due_tickers(db) == []
+
+    meta = _meta(db)
+    meta.fetched_at = datetime.now() - enrichment.METADATA_TTL - timedelta(days=1)
+    db.commit()
+    assert enrichment.due_tickers(db) == ["BHP"]
+
+def test_metadata_without_a_stock_row_is_not_swept(db):
+    db.add(models.TickerMetadata(ticker="GONE", status="UNKNOWN", attempts=0))
+    db.commit()
+    assert enrichment.due_tickers(db) == []
@@ -0,0 +1,88 @@
+import asyncio
+from event_bus import EventBus, Subscription
+
+def _quote(ticker: str, price: float) -> tuple[str, dict]:
+    return "quote", {"ticker": ticker, "price": price}
+
+def _subscribe(bus: EventBus, channels: set[str], maxsize: int) -> Subscription:
+    """bus.subscribe() with a small queue"""
+    sub = Subscription(bus, channels, maxsize=maxsize)
+    for channel in channels:
+        bus.subscribers.setdefault(channel, set()).add(sub)
+    return sub
+
+def _drain(sub: Subscription) -> list[dict]:
+    return asyncio.run(sub.next_batch(timeout=0.01))
+
+def test_quotes_coalesce_per_ticker_in_their_first_position():
+    bus = EventBus()
+    sub = bus.subscribe({"quotes:BHP", "quotes:CBA", "account"})
+    bus.publish("quotes:BHP", *_quote("BHP", 45.0))
+    bus.publish("account", "fill", {"order_id": 1})
+    bus.publish("quotes:CBA", *_quote("CBA", 120.0))
+    bus.publish("quotes:BHP", *_quote("BHP", 45.5))
+    bus.publish("quotes:BHP", *_quote("BHP", 46.0))
+
+    batch = _drain(sub)
+    assert [(e["type"], e["data"].get("ticker")) for e in batch] == [("quote", "BHP"), ("fill", None), ("quote", "CBA")]
+    assert batch[0]["data"]["price"] == 46.0
+    assert sub.coalesced == 2
+    assert bus.get_metrics()["coalesced"] == 2
+
+def test_fills_and_alerts_are_never_coalesced():
+    bus = EventBus()
+    sub = bus.subscribe({"account", "alerts"})
+    for order_id in range(3):
+        bus.publish("account", "fill", {"order_id": order_id, "ticker": "BHP"})
+    bus.publish("alerts", "alert", {"id": 1, "ticker": "BHP"})
+    bus.publish("alerts", "alert", {"id": 2, "ticker": "BHP"})
+    assert len(_drain(sub)) == 5
+
+def test_a_full_queue_drops_the_oldest_events():
+    bus = EventBus()
+    sub = _subscribe(bus, {"account"}, maxsize=3)
+    for order_id in range(5):
+        bus.publish("account", "fill", {"order_id": order_id})
+
+    metrics = bus.get_metrics()
+    assert metrics["dropped"] == 2
+    assert metrics["queue_depth_total"] == 3 and metrics["queue_depth_max"] == 3
+    assert [e["data"]["order_id"] for e in _drain(sub)] == [2, 3, 4]
+    assert sub.dropped == 2
+
+    metrics = bus.get_metrics()
+    assert metrics["published"] == 5 and metrics["delivered"] == 3
+    assert metrics["queue_depth_total"] == 0
+
+def test_coalescing_keeps_a_slow_client_under_its_cap():
+    bus = EventBus()
+    sub = _subscribe(bus, {"quotes:BHP", "quotes:CBA"}, maxsize=2)
+    for i in range(100):
+        bus.publish("quotes:BHP", *_quote("BHP", 45.0 + i))
+        bus.publish("quotes:CBA", *_quote("CBA", 120.0 + i))
+    # one pending quote per ticker, nothing had to be dropped
+    assert bus.get_metrics()["dropped"] == 0
+    assert [e["data"]["price"] for e in _drain(sub)] == [144.0, 219.0]
+
+def test_a_waiting_client_wakes_up_on_publish():
+    bus = EventBus()
+    sub = bus.subscribe({"account"})
+
+    async def run():
+        waiter = asyncio.create_task(sub.next_batch(timeout=5))
+        await asyncio.sleep(0)
+        bus.publish("account", "fill", {"order_id": 1})
+        return await waiter
+
+    assert asyncio.run(run()) == [{"type": "fill", "data": {"order_id": 1}}]
+    # and times out empty when there's nothing
+    assert _drain(sub) == []
+
+def test_unsubscribe_drops_empty_channels():
+    bus = EventBus()
+    sub = bus.subscribe({"quotes:BHP", "account"})
+    other = bus.subscribe({"account"})
+    bus.unsubscribe(sub)
+    assert set(bus.subscribers) == {"account"}
+    bus.unsubscribe(other)
+    assert bus.get_metrics()["subscribers"] == 0 and bus.get_metrics()["channels"] == 0
@@ -0,0 +1,122 @@
+from datetime import date, datetime
+import pandas as pd
+import pytest
+import history_store
+from history_store import HistoryStore, SYDNEY_TZ
+
+def _frame(days: list[str], closes: list[float], volume: float = 1000.0, splits: dict | None = None, dividends: dict | None = None) -> pd.DataFrame:
+    """one symbol's yf.download(actions=True) bars"""
+    index = pd.DatetimeIndex(pd.to_datetime(days)).tz_localize(SYDNEY_TZ)
+    frame = pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": volume}, index=index)
+    frame["Dividends"] = [float((dividends or {}).get(d, 0.0)) for d in days]
+    frame["Stock Splits"] = [float((splits or {}).get(d, 0.0)) for d in days]
+    return frame
+
+@pytest.fixture
+def clock(monkeypatch):
+    """sets the sydney wall clock history_store sees"""
+    def set_now(value: str):
+        now = SYDNEY_TZ.localize(datetime.fromisoformat(value))
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now.astimezone(tz) if tz else now.replace(tzinfo=None)
+
+        monkeypatch.setattr(history_store, "datetime", FrozenDatetime)
+    return set_now
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """queue of frames the next downloads return, keyed by symbol"""
+    queue = []
+
+    def download(symbols, start=None, **kwargs):
+        frames = queue.pop(0)
+        return pd.concat({s: f[f.index >= pd.Timestamp(start).tz_localize(SYDNEY_TZ)] for s, f in frames.items()}, axis=1)
+
+    monkeypatch.setattr(history_store.yahoo, "download", download)
+    # every call re-checks for new bars
+    monkeypatch.setattr(history_store, "HISTORY_TTL", -1)
+    return queue
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"))
+
+START = date(2026, 10, 1)
+
+def _closes(store: HistoryStore, symbol: str = "BHP.AX") -> list[float]:
+    return [round(c, 6) for c in store.bars([symbol], "1mo")[symbol]["Close"].tolist()]
+
+def _last_date(store: HistoryStore, symbol: str = "BHP.AX") -> str | None:
+    return store._connect().execute("SELECT last_date FROM coverage WHERE symbol = ?", (symbol,)).fetchone()[0]
+
+def test_a_live_session_is_stored_but_not_used_as_last_date(store, downloads, clock):
+    clock("2026-10-16 12:00")
+    downloads.append({"BHP.AX": _frame(["2026-10-14", "2026-10-15", "2026-10-16"], [9.0, 9.5, 10.0])})
+    store.refresh(["BHP.AX"], START)
+    assert _last_date(store) == "2026-10-15"
+
+    # the day moves on, that's a price move, not a corporate action
+    downloads.append({"BHP.AX": _frame(["2026-10-14", "2026-10-15", "2026-10-16"], [9.0, 9.5, 11.0])})
+    store.refresh(["BHP.AX"], START)
+    assert store.get_stats()["rebased"] == 0
+    assert store.get_stats()["incremental_downloads"] == 1
+    assert _closes(store)[-3:] == [9.0, 9.5, 11.0]
+
+    # after the close today is a finished session
+    clock("2026-10-16 17:00")
+    downloads.append({"BHP.AX": _frame(["2026-10-14", "2026-10-15", "2026-10-16"], [9.0, 9.5, 11.2])})
+    store.refresh(["BHP.AX"], START)
+    assert _last_date(store) == "2026-10-16"
+    assert _closes(store)[-3:] == [9.0, 9.5, 11.2]
+
+def test_a_revised_last_close_without_an_event_is_not_a_rebase(store, downloads, clock):
+    clock("2026-10-17 12:00") # saturday
+    downloads.append({"BHP.AX": _frame(["2026-10-14", "2026-10-15", "2026-10-16"], [9.0, 9.5, 10.0])})
+    store.refresh(["BHP.AX"], START)
+    assert _last_date(store) == "2026-10-16"
+
+    downloads.append({"BHP.AX": _frame(["2026-10-16"], [11.0])})
+    store.refresh(["BHP.AX"], START)
+    assert store.get_stats()["rebased"] == 0
+    assert _closes(store) == [9.0, 9.5, 11.0]
+
+def test_a_split_rebases_prices_and_volume(store, downloads, clock):
+    clock("2026-10-19 17:00")
+    downloads.append({"BHP.AX": _frame(["2026-10-14", "2026-10-15", "2026-10-16"], [18.0, 19.0, 20.0], volume=1000)})
+    store.refresh(["BHP.AX"], START)
+
+    # 2:1 on the 19th, yahoo halves everything before it
+    downloads.append({"BHP.AX": _frame(["2026-10-16", "2026-10-19"], [10.0, 10.2], volume=2000, splits={"2026-10-19": 2.0})})
+    store.refresh(["BHP.AX"], START)
+
+    assert store.get_stats()["rebased"] == 1
+    bars = store.bars(["BHP.AX"], "1mo")["BHP.AX"]
+    assert [round(c, 6) for c in bars["Close"]] == [9.0, 9.5, 10.0, 10.2]
+    assert bars["Volume"].tolist() == [2000, 2000, 2000, 2000]
+    assert _last_date(store) == "2026-10-19"
+
+def test_a_dividend_rebases_prices_only(store, downloads, clock):
+    clock("2026-10-19 17:00")
+    downloads.append({"BHP.AX": _frame(["2026-10-14", "2026-10-15", "2026-10-16"], [9.0, 9.5, 10.0], volume=1000)})
+    store.refresh(["BHP.AX"], START)
+
+    # 20c dividend going ex on the 19th, yahoo scales the bars before it by 0.98
+    downloads.append({"BHP.AX": _frame(["2026-10-16", "2026-10-19"], [9.8, 9.9], volume=1000, dividends={"2026-10-19": 0.2})})
+    store.refresh(["BHP.AX"], START)
+
+    assert store.get_stats()["rebased"] == 1
+    bars = store.bars(["BHP.AX"], "1mo")["BHP.AX"]
+    assert [round(c, 6) for c in bars["Close"]] == [8.82, 9.31, 9.8, 9.9]
+    assert bars["Volume"].tolist() == [1000, 1000, 1000, 1000]
+
+def test_stored_symbols_are_not_downloaded_again_within_the_ttl(store, downloads, clock, monkeypatch):
+    clock("2026-10-17 12:00")
+    downloads.append({"BHP.AX": _frame(["2026-10-15", "2026-10-16"], [9.5, 10.0])})
+    store.refresh(["BHP.AX"], START)
+    monkeypatch.setattr(history_store, "HISTORY_TTL", 900)
+    store.refresh(["BHP.AX"], START)
+    assert store.get_stats()["full_downloads"] == 1
+    assert store.get_stats()["incremental_downloads"] == 0
@@ -0,0 +1,136 @@
+import time
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+import http_cache
+from http_cache import ConditionalGetMiddleware
+
+@pytest.fixture
+def calls():
+    return {}
+
+@pytest.fixture
+def client(calls):
+    app = FastAPI()
+
+    def count(name: str) -> int:
+        calls[name] = calls.get(name, 0) + 1
+        return calls[name]
+
+    @app.get("/macro/calendar")
+    def calendar():
+        return {"n": count("calendar")}
+
+    @app.get("/stock/{ticker}/info")
+    def info(ticker: str):
+        n = count("info")
+        return {"error": "yahoo down"} if n == 1 else {"ticker": ticker, "n": n}
+
+    @app.get("/stock/{ticker}/valuation")
+    def valuation(ticker: str, response: Response):
+        response.set_cookie("kt_session", "abc")
+        return {"n": count("valuation")}
+
+    @app.get("/stock/{ticker}/corporate")
+    def corporate(ticker: str, response: Response):
+        response.headers["Vary"] = "Cookie"
+        return {"n": count("corporate")}
+
+    @app.get("/stock/{ticker}/financials")
+    def financials(ticker: str, response: Response):
+        response.headers["Vary"] = "Accept-Encoding"
+        return {"n": count("financials")}
+
+    @app.get("/stocks")
+    def stocks():
+        return {"n": count("stocks")}
+
+    app.add_middleware(ConditionalGetMiddleware)
+    with TestClient(app) as client:
+        yield client
+
+def _middleware() -> ConditionalGetMiddleware:
+    return http_cache._middleware
+
+def test_fresh_responses_are_served_from_the_cache(client, calls):
+    first = client.get("/macro/calendar")
+    second = client.get("/macro/calendar")
+    assert first.json() == second.json() == {"n": 1}
+    assert calls["calendar"] == 1
+    assert first.headers["etag"] == second.headers["etag"]
+    assert "max-age=1800" in first.headers["cache-control"]
+    assert _middleware().get_stats()["hits"] == 1
+
+def test_if_none_match(client, calls):
+    etag = client.get("/macro/calendar").headers["etag"]
+
+    not_modified = client.get("/macro/calendar", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    assert client.get("/macro/calendar", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/macro/calendar", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/macro/calendar", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert calls["calendar"] == 1
+    assert _middleware().get_stats()["not_modified"] == 3
+
+def test_no_cache_refetches(client, calls):
+    client.get("/macro/calendar")
+    assert client.get("/macro/calendar", headers={"Cache-Control": "no-cache"}).json() == {"n": 2}
+
+def test_stale_is_served_while_it_refreshes(client, calls):
+    client.get("/macro/calendar")
+    entry = next(iter(_middleware().cache.values()))
+    entry.stored_at -= 1800 + 1
+
+    stale = client.get("/macro/calendar")
+    assert stale.json() == {"n": 1}
+    assert int(stale.headers["age"]) > 1800
+
+    deadline = time.monotonic() + 5
+    while (calls["calendar"] < 2 or _middleware().refreshing) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.get("/macro/calendar").json() == {"n": 2}
+    assert calls["calendar"] == 2
+    assert _middleware().get_stats()["stale_hits"] == 1
+    assert not _middleware().tasks
+
+def test_too_stale_is_refetched_inline(client, calls):
+    client.get("/macro/calendar")
+    next(iter(_middleware().cache.values())).stored_at -= 1800 + 3600 + 1
+    assert client.get("/macro/calendar").json() == {"n": 2}
+
+def test_errors_are_not_cached(client, calls):
+    assert client.get("/stock/BHP/info").json() == {"error": "yahoo down"}
+    assert client.get("/stock/BHP/info").json()["n"] == 2
+    assert client.get("/stock/BHP/info").json()["n"] == 2
+
+def test_per_session_responses_are_never_cached(client, calls):
+    for _ in range(2):
+        response = client.get("/stock/BHP/valuation")
+        assert "kt_session" in response.headers["set-cookie"]
+        assert "etag" not in response.headers
+    assert calls["valuation"] == 2
+
+    client.get("/stock/BHP/corporate")
+    client.get("/stock/BHP/corporate")
+    assert calls["corporate"] == 2
+    assert not _middleware().cache
+
+def test_vary_on_the_encoding_is_still_cached(client, calls):
+    client.get("/stock/BHP/financials")
+    client.get("/stock/BHP/financials")
+    assert calls["financials"] == 1
+
+def test_other_routes_pass_through(client, calls):
+    client.get("/stocks")
+    response = client.get("/stocks")
+    assert calls["stocks"] == 2
+    assert "etag" not in response.headers
+
+def test_the_query_string_is_part_of_the_key(client, calls):
+    client.get("/macro/calendar?week=1")
+    client.get("/macro/calendar?week=2")
+    client.get("/macro/calendar?week=1")
+    assert calls["calendar"] == 2
@@ -0,0 +1,137 @@
+import time
+import pytest
+import info_cache
+from info_cache import EmptyInfo, InfoCache, FUNDAMENTALS_TTL, PROFILE_TTL, QUOTE_TTL, ttl_for
+
+@pytest.fixture
+def yahoo_info(monkeypatch):
+    """queue of answers for yahoo.info, an Exception in it is raised"""
+    answers = []
+    calls = []
+
+    def info(symbol):
+        calls.append(symbol)
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(info_cache.yahoo, "info", info)
+    return answers, calls
+
+@pytest.fixture
+def cache(tmp_path):
+    return InfoCache(str(tmp_path / "info_cache.db"))
+
+def _age(cache: InfoCache, symbol: str, seconds: float):
+    """pretends the cached entry was fetched `seconds` ago (memory and disk)"""
+    fetched_at = time.time() - seconds
+    with cache.lock:
+        cache.lru[symbol] = (fetched_at, cache.lru[symbol][1])
+        cache._connect().execute("UPDATE info SET fetched_at = ? WHERE symbol = ?", (fetched_at, symbol))
+        cache.conn.commit()
+
+def test_ttl_is_the_shortest_among_the_fields():
+    assert ttl_for(("sector", "industry")) == PROFILE_TTL
+    assert ttl_for(("sector", "currentPrice")) == QUOTE_TTL
+    assert ttl_for(("profitMargins",)) == FUNDAMENTALS_TTL
+    assert ttl_for(None) == QUOTE_TTL
+
+def test_fresh_entries_are_served_from_memory(cache, yahoo_info):
+    answers, calls = yahoo_info
+    answers.append({"sector": "Materials", "currentPrice": 45.0})
+
+    assert cache.get("bhp.ax", ("sector",))["sector"] == "Materials"
+    assert cache.get("BHP.AX", ("sector",))["sector"] == "Materials"
+    assert calls == ["BHP.AX"]
+    assert cache.get_stats()["memory_hits"] == 1
+
+def test_callers_get_their_own_copy(cache, yahoo_info):
+    answers, _ = yahoo_info
+    answers.append({"sector": "Materials"})
+    cache.get("BHP.AX", ("sector",))["sector"] = "changed"
+    assert cache.get("BHP.AX", ("sector",))["sector"] == "Materials"
+
+def test_the_fields_asked_for_decide_when_to_refetch(cache, yahoo_info):
+    answers, calls = yahoo_info
+    answers.extend([{"sector": "Materials", "currentPrice": 45.0}, {"sector": "Materials", "currentPrice": 46.0}])
+    cache.get("BHP.AX", ("sector",))
+    _age(cache, "BHP.AX", QUOTE_TTL + 1)
+
+    # a sector is good for a week
+    assert cache.get("BHP.AX", ("sector",))["currentPrice"] == 45.0
+    # a price isn't
+    assert cache.get("BHP.AX", ("currentPrice",))["currentPrice"] == 46.0
+    assert len(calls) == 2
+
+def test_entries_survive_a_restart(tmp_path, yahoo_info):
+    answers, calls = yahoo_info
+    answers.append({"sector": "Materials"})
+    InfoCache(str(tmp_path / "info.db")).get("BHP.AX", ("sector",))
+
+    restarted = InfoCache(str(tmp_path / "info.db"))
+    assert restarted.get("BHP.AX", ("sector",))["sector"] == "Materials"
+    assert len(calls) == 1
+    assert restarted.get_stats()["disk_hits"] == 1
+
+def test_lru_keeps_the_most_recent_entries(tmp_path, yahoo_info):
+    answers, _ = yahoo_info
+    answers.extend({"sector": s} for s in ("A", "B", "C"))
+    cache = InfoCache(str(tmp_path / "info.db"), size=2)
+    for symbol in ("A.AX", "B.AX", "C.AX"):
+        cache.get(symbol, ("sector",))
+    assert list(cache.lru) == ["B.AX", "C.AX"]
+
+def test_stale_copy_is_served_when_yahoo_fails(cache, yahoo_info):
+    answers, _ = yahoo_info
+    answers.extend([{"sector": "Materials"}, ConnectionError("throttled")])
+    cache.get("BHP.AX", ("sector",))
+    _age(cache, "BHP.AX", PROFILE_TTL + 1)
+
+    assert cache.get("BHP.AX", ("sector",))["sector"] == "Materials"
+    stats = cache.get_stats()
+    assert stats["stale_served"] == 1 and stats["errors"] == 1
+
+def test_failure_with_nothing_cached_raises(cache, yahoo_info):
+    answers, _ = yahoo_info
+    answers.append(ConnectionError("throttled"))
+    with pytest.raises(ConnectionError):
+        cache.get("BHP.AX", ("sector",))
+
+def test_empty_payloads_are_never_cached(cache, yahoo_info):
+    answers, calls = yahoo_info
+    answers.extend([{}, {"trailingPegRatio": None}, {"sector": "Materials"}])
+    with pytest.raises(EmptyInfo):
+        cache.get("BHP.AX", ("sector",))
+    with pytest.raises(EmptyInfo):
+        cache.get("BHP.AX", ("sector",))
+    assert "BHP.AX" not in cache.lru
+    assert cache._connect().execute("SELECT COUNT(*) FROM info").fetchone()[0] == 0
+
+    assert cache.get("BHP.AX", ("sector",))["sector"] == "Materials"
+    assert len(calls) == 3
+
+def test_empty_payload_falls_back_to_the_stale_copy(cache, yahoo_info):
+    answers, _ = yahoo_info
+    answers.extend([{"sector": "Materials"}, {}])
+    cache.get("BHP.AX", ("sector",))
+    _age(cache, "BHP.AX", PROFILE_TTL + 1)
+
+    assert cache.get("BHP.AX", ("sector",))["sector"] == "Materials"
+    # the good copy is still the one stored
+    assert cache._lookup("BHP.AX")[1] == {"sector": "Materials"}
+
+def test_old_but_fresh_entries_refresh_in_the_background(cache, yahoo_info):
+    answers, calls = yahoo_info
+    answers.extend([{"currentPrice": 45.0}, {"currentPrice": 46.0}])
+    cache.get("BHP.AX", ("currentPrice",))
+    _age(cache, "BHP.AX", QUOTE_TTL * 0.9)
+
+    # served as is, the refresh happens behind it
+    assert cache.get("BHP.AX", ("currentPrice",))["currentPrice"] == 45.0
+    deadline = time.monotonic() + 5
+    while cache.get_stats()["refreshing"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get_stats()["refresh_ahead"] == 1
+    assert cache.get("BHP.AX", ("currentPrice",))["currentPrice"] == 46.0
+    assert len(calls) == 2
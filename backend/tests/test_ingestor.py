@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+import pytest
+import bar_aggregator
+import enrichment
+import ingestor
+import models
+import tick_store
+from event_bus import event_bus
+from market_version import market_version
+
+TS = 1792108800 # 2026-10-16 11:00 sydney
+
+@pytest.fixture
+def ingest(db, monkeypatch):
+    """update_database with its side effects captured instead of queued / buffered"""
+    enqueued = []
+    monkeypatch.setattr(enrichment, "enqueue", enqueued.append)
+    store = tick_store.TickStore()
+    monkeypatch.setattr(ingestor, "tick_store", store)
+    monkeypatch.setattr(bar_aggregator, "tick_store", store)
+    monkeypatch.setattr(ingestor, "bar_aggregator", bar_aggregator.BarAggregator())
+    market_version.value = 0
+    market_version.pending.clear()
+
+    def run(data: list[dict], ts: float = TS) -> bool:
+        return asyncio.run(ingestor.update_database(data, ts))
+    run.enqueued = enqueued
+    run.ticks = store.buffer
+    yield run
+    market_version.value = 0
+    market_version.pending.clear()
+
+def _item(ticker: str, price: str, change_percent: str = "+1.00%", volume: str = "1,000", market_cap: str = "$1B") -> dict:
+    return {
+        "ticker": ticker, "name": f"{ticker} Ltd", "price": price, "change_amount": "0.10",
+        "change_percent": change_percent, "market_cap": market_cap, "volume": volume,
+    }
+
+def _stocks(db) -> dict[str, models.Stock]:
+    db.expire_all()
+    return {s.ticker: s for s in db.query(models.Stock)}
+
+def test_a_mixed_batch_inserts_new_and_updates_changed_tickers(db, ingest):
+    db.add_all([
+        models.Stock(ticker="BHP", name="BHP Group", sector="Materials", price=44.0, change_amount=0.1, change_percent="+1.00%",
+                     market_cap="$1B", volume="1,000", change_percent_value=1.0, market_cap_value=1e9, volume_value=1000),
+        # unchanged by the tick, but missing its sector
+        models.Stock(ticker="CBA", name="CBA", sector=None, price=120.0, change_amount=0.1, change_percent="+1.00%",
+                     market_cap="$1B", volume="1,000", change_percent_value=1.0, market_cap_value=1e9, volume_value=1000),
+        models.TickerMetadata(ticker="WBC", sector="Financials"),
+    ])
+    db.commit()
+    sub = event_bus.subscribe({"quotes:BHP", "quotes:CBA", "quotes:WBC", "quotes:XYZ"})
+    try:
+        assert ingest([
+            _item("BHP", "$45.50", change_percent="+3.41%", volume="2,500", market_cap="$230.5B"),
+            _item("CBA", "$120.00"),
+            _item("WBC", "$30.10"),
+            _item("XYZ", "0.012", change_percent="-4%", market_cap="12M", volume="98,000"),
+        ])
+        events = asyncio.run(sub.next_batch(timeout=0)) if sub.depth() else []
+    finally:
+        event_bus.unsubscribe(sub)
+
+    stocks = _stocks(db)
+    assert set(stocks) == {"BHP", "CBA", "WBC", "XYZ"}
+
+    bhp = stocks["BHP"]
+    assert (bhp.price, bhp.change_percent, bhp.market_cap, bhp.volume) == (45.5, "+3.41%", "$230.5B", "2,500")
+    assert (bhp.change_percent_value, bhp.market_cap_value, bhp.volume_value) == (3.41, 230_500_000_000.0, 2500)
+    assert (bhp.name, bhp.sector) == ("BHP Group", "Materials")
+
+    # new rows take the cached sector when there is one
+    assert (stocks["WBC"].name, stocks["WBC"].sector, stocks["WBC"].price) == ("WBC Ltd", "Financials", 30.1)
+    xyz = stocks["XYZ"]
+    assert xyz.sector is None
+    assert (xyz.price, xyz.change_percent_value, xyz.market_cap_value, xyz.volume_value) == (0.012, -4.0, 12_000_000.0, 98000)
+
+    # one version for the whole tick, the unchanged row keeps its old one
+    assert {t: s.version for t, s in stocks.items()} == {"BHP": 1, "CBA": 0, "WBC": 1, "XYZ": 1}
+    assert market_version.current() == 1
+    assert bhp.last_updated == xyz.last_updated == datetime.fromtimestamp(TS)
+    assert stocks["CBA"].last_updated != datetime.fromtimestamp(TS)
+
+    # sector lookups for the new ticker without a cached sector and the existing row missing one
+    assert sorted(ingest.enqueued) == ["CBA", "XYZ"]
+    # every ticker in the tick is recorded and published, changed or not
+    assert [t[0] for t in ingest.ticks] == ["BHP", "CBA", "WBC", "XYZ"]
+    assert all(t[1] == TS * 1000 for t in ingest.ticks)
+    assert [e["data"]["ticker"] for e in events] == ["BHP", "CBA", "WBC", "XYZ"]
+
+def test_an_unchanged_tick_writes_nothing(db, ingest):
+    batch = [_item("BHP", "$45.50"), _item("CBA", "$120.00")]
+    assert ingest(batch)
+    assert market_version.current() == 1
+
+    assert ingest(batch, TS + 5)
+    assert market_version.current() == 1
+    assert {s.version for s in _stocks(db).values()} == {1}
+
+    # the next change gets the next version, only on the row that moved
+    assert ingest([_item("BHP", "$45.60"), _item("CBA", "$120.00")], TS + 10)
+    assert {t: s.version for t, s in _stocks(db).items()} == {"BHP": 2, "CBA": 1}
+    assert market_version.current() == 2
@@ -0,0 +1,98 @@
+import pytest
+import models
+from database import SessionLocal
+from market_version import market_version
+
+@pytest.fixture
+def versions(db):
+    """the process-wide market_version, reset (its release hook is registered on SessionLocal)"""
+    market_version.value = 0
+    market_version.pending.clear()
+    yield market_version
+    market_version.value = 0
+    market_version.pending.clear()
+
+def _write(db, ticker: str, price: float) -> int:
+    """one ingest-style write: stamps the row with the next version"""
+    version = market_version.next(db)
+    stock = db.query(models.Stock).filter_by(ticker=ticker).first()
+    if stock is None:
+        stock = models.Stock(ticker=ticker, name=ticker)
+        db.add(stock)
+    stock.price = price
+    stock.version = version
+    return version
+
+def _since(db, since: int) -> dict[str, float]:
+    """what /stocks?since= sends"""
+    return {s.ticker: s.price for s in db.query(models.Stock).filter(models.Stock.version > since)}
+
+def test_versions_only_go_up(versions, db):
+    assert _write(db, "BHP", 45.0) == 1
+    assert _write(db, "CBA", 120.0) == 2
+    db.commit()
+    assert versions.current() == 2
+
+def test_current_waits_for_the_oldest_pending_writer(versions):
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        _write(first, "BHP", 45.0)
+        _write(second, "CBA", 120.0)
+        second.commit()
+        # version 2 is visible, but 1 isn't yet, so nobody is told 2
+        assert versions.current() == 0
+        first.commit()
+        assert versions.current() == 2
+    finally:
+        first.close()
+        second.close()
+
+def test_rollback_and_close_release_their_versions(versions):
+    rolled_back, closed = SessionLocal(), SessionLocal()
+    _write(rolled_back, "BHP", 45.0)
+    _write(closed, "CBA", 120.0)
+    rolled_back.rollback()
+    # 1 never wrote anything, 2 is still in flight
+    assert versions.current() == 1
+    closed.close()
+    assert versions.current() == 2
+    assert not versions.pending
+    rolled_back.close()
+
+def test_since_returns_only_rows_changed_after_it(versions, db):
+    _write(db, "BHP", 45.0)
+    _write(db, "CBA", 120.0)
+    db.commit()
+    seen = versions.current()
+
+    _write(db, "BHP", 46.0)
+    db.commit()
+    assert _since(db, seen) == {"BHP": 46.0}
+    assert _since(db, versions.current()) == {}
+
+def test_a_client_at_current_never_misses_a_late_commit(versions, db):
+    _write(db, "BHP", 45.0)
+    db.commit()
+
+    slow, fast = SessionLocal(), SessionLocal()
+    try:
+        _write(slow, "CBA", 120.0)
+        _write(fast, "CSL", 280.0)
+        fast.commit()
+        # a poll now is told the version before the slow write ...
+        seen = versions.current()
+        assert seen == 1
+        slow.commit()
+        # ... so the next poll still gets both rows
+        assert _since(db, seen) == {"CBA": 120.0, "CSL": 280.0}
+    finally:
+        slow.close()
+        fast.close()
+
+def test_load_resumes_from_the_highest_stamped_row(versions, db):
+    _write(db, "BHP", 45.0)
+    _write(db, "CBA", 120.0)
+    db.commit()
+    versions.value = 0
+    versions.load()
+    assert versions.current() == 2
@@ -0,0 +1,62 @@
+from sqlalchemy import MetaData, Table, inspect, text # type: ignore
+import pytest
+import models
+from database import engine
+from migrations import ADDED_COLUMNS, run_migrations
+
+@pytest.fixture
+def old_db(db):
+    """the scratch db with a stocks table from before the numeric / version columns"""
+    models.Stock.__table__.drop(engine)
+    added = ADDED_COLUMNS["stocks"]
+    Table("stocks", MetaData(), *[c._copy() for c in models.Stock.__table__.columns if c.name not in added]).create(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO stocks (ticker, name, price, change_percent, market_cap, volume) VALUES "
+            "('BHP', 'BHP Group', 45.1, '+1.23%', '$200B', '336,595'),"
+            "('XYZ', 'Tiny Co', 0.01, '-0.5%', NULL, NULL)"
+        ))
+    return db
+
+def _columns() -> set[str]:
+    return {c["name"] for c in inspect(engine).get_columns("stocks")}
+
+def _values(db) -> dict[str, tuple]:
+    db.expire_all()
+    return {
+        s.ticker: (s.change_percent_value, s.market_cap_value, s.volume_value)
+        for s in db.query(models.Stock)
+    }
+
+def test_adds_the_columns_and_backfills_them(old_db, capsys):
+    assert not set(ADDED_COLUMNS["stocks"]) & _columns()
+    run_migrations()
+
+    assert set(ADDED_COLUMNS["stocks"]) <= _columns()
+    indexes = {i["name"] for i in inspect(engine).get_indexes("stocks")}
+    assert {f"ix_stocks_{c}" for c in ADDED_COLUMNS["stocks"]} <= indexes
+    assert _values(old_db) == {"BHP": (1.23, 200_000_000_000.0, 336595), "XYZ": (-0.5, None, None)}
+    assert [s.version for s in old_db.query(models.Stock)] == [0, 0]
+    assert "added columns" in capsys.readouterr().out
+
+def test_running_twice_changes_nothing(old_db, capsys):
+    run_migrations()
+    before = _values(old_db)
+    capsys.readouterr()
+
+    run_migrations()
+    assert _values(old_db) == before
+    # nothing to add and every row already parsed
+    assert capsys.readouterr().out == ""
+
+def test_backfills_rows_the_ingestor_never_parsed(db):
+    db.add_all([
+        # written before the ingestor filled the numeric copies in
+        models.Stock(ticker="BHP", change_percent="+1.23%", market_cap="1.5T", volume="1,000", change_percent_value=None),
+        # already parsed, left alone
+        models.Stock(ticker="CBA", change_percent="-2%", market_cap="$180B", volume="500", change_percent_value=-2.5, market_cap_value=1.0, volume_value=7),
+    ])
+    db.commit()
+
+    run_migrations()
+    assert _values(db) == {"BHP": (1.23, 1_500_000_000_000.0, 1000), "CBA": (-2.5, 1.0, 7)}
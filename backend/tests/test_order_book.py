@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+import models
+from order_book import OrderBook, PriceLevels
+
+def _levels(*entries) -> PriceLevels:
+    levels = PriceLevels()
+    for price, item_id in entries:
+        levels.add(price, item_id)
+    return levels
+
+def test_price_levels_stay_sorted():
+    levels = _levels((42.0, 3), (40.0, 1), (41.0, 2), (40.0, 0))
+    assert levels.levels == [(40.0, 0), (40.0, 1), (41.0, 2), (42.0, 3)]
+    assert len(levels) == 4
+
+def test_price_levels_bounds_are_inclusive():
+    levels = _levels((40.0, 1), (41.0, 2), (42.0, 3))
+    assert levels.at_or_above(41.0) == [2, 3]
+    assert levels.at_or_below(41.0) == [1, 2]
+    assert levels.at_or_above(42.5) == []
+    assert levels.at_or_below(39.5) == []
+
+def test_price_levels_remove():
+    levels = _levels((40.0, 1), (40.0, 2))
+    assert levels.remove(40.0, 1)
+    assert not levels.remove(40.0, 1)
+    assert not levels.remove(41.0, 2)
+    assert levels.levels == [(40.0, 2)]
+
+def _order(order_id, order_type, limit_price, ticker="BHP"):
+    return SimpleNamespace(id=order_id, ticker=ticker, order_type=order_type, limit_price=limit_price)
+
+def test_order_book_triggers_by_side():
+    book = OrderBook(models.PendingOrder)
+    book.add(_order(1, "LIMIT_BUY", 40.0))
+    book.add(_order(2, "STOP_LOSS", 38.0))
+    book.add(_order(3, "LIMIT_SELL", 45.0))
+
+    assert book.triggered("BHP", 41.0) == []
+    assert sorted(book.triggered("BHP", 40.0)) == [1]
+    assert sorted(book.triggered("BHP", 37.0)) == [1, 2]
+    assert book.triggered("BHP", 45.0) == [3]
+    assert book.triggered("CBA", 1.0) == []
+    # no price, nothing fires
+    assert book.triggered("BHP", 0.0) == []
+
+def test_order_book_ignores_unknown_and_duplicate_orders():
+    book = OrderBook(models.PendingOrder)
+    book.add(_order(1, "MARKET", 40.0))
+    book.add(_order(2, "LIMIT_BUY", None))
+    book.add(_order(3, "LIMIT_BUY", 40.0))
+    book.add(_order(3, "LIMIT_BUY", 40.0))
+    assert len(book) == 1
+    assert book.triggered("BHP", 39.0) == [3]
+
+def test_order_book_remove_drops_empty_tickers():
+    book = OrderBook(models.PendingOrder)
+    book.add(_order(1, "LIMIT_BUY", 40.0))
+    book.remove(1)
+    book.remove(1)
+    assert len(book) == 0
+    assert book.tickers() == set()
+
+def test_remove_on_commit_waits_for_the_commit(db):
+    book = OrderBook(models.PendingOrder)
+    book.add(_order(1, "LIMIT_BUY", 40.0))
+
+    book.remove_on_commit(db, 1)
+    assert book.triggered("BHP", 39.0) == [1]
+    db.rollback()
+    # a rolled back fill keeps resting
+    assert book.triggered("BHP", 39.0) == [1]
+
+    book.remove_on_commit(db, 1)
+    db.commit()
+    assert book.triggered("BHP", 39.0) == []
+    assert len(book) == 0
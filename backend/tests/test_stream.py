@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+import models
+from display_mode import match_session_orders
+from event_bus import event_bus, publish_on_commit, stream_channels
+from order_book import session_order_book
+
+@pytest.fixture
+def subscribe():
+    """subscriptions on the process-wide bus (the one publish_on_commit feeds), dropped afterwards"""
+    subs = []
+
+    def sub(channels: set[str]):
+        subs.append(event_bus.subscribe(channels))
+        return subs[-1]
+
+    yield sub
+    for s in subs:
+        event_bus.unsubscribe(s)
+
+def _drain(sub) -> list[dict]:
+    """what's queued, without waiting (each asyncio.run is a new loop, and the wait binds to one)"""
+    return asyncio.run(sub.next_batch(timeout=0)) if sub.depth() else []
+
+def test_nothing_is_published_for_a_rolled_back_write(db, subscribe):
+    sub = subscribe({"quotes:BHP"})
+    publish_on_commit(db, "quotes:BHP", "quote", {"ticker": "BHP", "price": 45.0})
+    assert _drain(sub) == []
+    db.rollback()
+    db.commit()
+    assert _drain(sub) == []
+
+    publish_on_commit(db, "quotes:BHP", "quote", {"ticker": "BHP", "price": 46.0})
+    db.commit()
+    assert _drain(sub) == [{"type": "quote", "data": {"ticker": "BHP", "price": 46.0}}]
+
+def test_a_subscriber_only_gets_its_channels(db, subscribe):
+    bhp = subscribe(stream_channels({"BHP"}, None, account=False, alerts=False))
+    for ticker, price in (("BHP", 45.0), ("CBA", 120.0)):
+        publish_on_commit(db, f"quotes:{ticker}", "quote", {"ticker": ticker, "price": price})
+    publish_on_commit(db, "account", "fill", {"order_id": 1})
+    db.commit()
+    assert [e["data"]["ticker"] for e in _drain(bhp)] == ["BHP"]
+
+def test_stream_channels():
+    assert stream_channels({"BHP"}, None) == {"quotes:BHP", "account", "alerts"}
+    assert stream_channels({"BHP"}, "s1") == {"quotes:BHP", "account:s1", "alerts:s1"}
+    assert stream_channels(set(), "s1", account=False) == {"alerts:s1"}
+
+def test_a_session_only_sees_its_own_fills(db, subscribe):
+    live = subscribe(stream_channels(set(), None))
+    first = subscribe(stream_channels(set(), "s1"))
+    second = subscribe(stream_channels(set(), "s2"))
+
+    orders = [
+        models.SessionPendingOrder(session_id=sid, ticker="BHP", order_type="LIMIT_BUY", shares=1, limit_price=40.0, status="PENDING")
+        for sid in ("s1", "s2")
+    ]
+    db.add_all([models.SessionAccount(session_id="s1", balance=1000.0), models.SessionAccount(session_id="s2", balance=1000.0), *orders])
+    db.commit()
+    for order in orders:
+        session_order_book.add(order)
+    try:
+        assert match_session_orders(db, {"BHP": 39.0}) == 2
+        db.commit()
+    finally:
+        for order in orders:
+            session_order_book.remove(order.id)
+
+    assert [e["data"]["order_id"] for e in _drain(first)] == [orders[0].id]
+    assert [e["data"]["order_id"] for e in _drain(second)] == [orders[1].id]
+    assert _drain(live) == []
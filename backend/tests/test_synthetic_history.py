@@ -0,0 +1,65 @@
+from datetime import datetime
+import pandas as pd
+import pytest
+import synthetic_history
+from synthetic_history import SYDNEY_TZ, SyntheticHistory
+
+@pytest.fixture
+def clock(monkeypatch):
+    """sets the sydney wall clock synthetic_history sees"""
+    def set_now(value: str):
+        now = SYDNEY_TZ.localize(datetime.fromisoformat(value))
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now.astimezone(tz) if tz else now.replace(tzinfo=None)
+
+        monkeypatch.setattr(synthetic_history, "datetime", FrozenDatetime)
+        return now
+    return set_now
+
+def _daily(history: SyntheticHistory, period: str = "5d") -> pd.DataFrame:
+    return history._history("BHP.AX", None, period, "1d")
+
+def _intraday(history: SyntheticHistory, period: str = "5d") -> pd.DataFrame:
+    return history._history("BHP.AX", None, period, "5m")
+
+def test_today_is_not_a_session_before_the_open(clock):
+    now = clock("2026-10-16 08:00") # friday
+    history = SyntheticHistory()
+    assert _daily(history).index[-1].date().isoformat() == "2026-10-15"
+    bars = _intraday(history)
+    assert bars.index[-1] < now
+    assert bars.index[-1].date().isoformat() == "2026-10-15"
+
+def test_todays_intraday_bars_stop_at_now(clock):
+    now = clock("2026-10-16 12:02")
+    history = SyntheticHistory()
+    assert _daily(history).index[-1].date().isoformat() == "2026-10-16"
+    today = _intraday(history).loc["2026-10-16"]
+    assert today.index[0] == SYDNEY_TZ.localize(datetime(2026, 10, 16, 10, 0))
+    assert today.index[-1] <= now
+    # 10:00 .. 12:00 in 5 minute bars
+    assert len(today) == 25
+
+def test_a_finished_session_has_every_bar(clock):
+    clock("2026-10-16 17:00")
+    today = _intraday(SyntheticHistory()).loc["2026-10-16"]
+    assert len(today) == 72
+    assert today.index[-1] == SYDNEY_TZ.localize(datetime(2026, 10, 16, 15, 55))
+
+def test_weekends_end_on_friday(clock):
+    clock("2026-10-18 11:00") # sunday
+    assert _daily(SyntheticHistory()).index[-1].date().isoformat() == "2026-10-16"
+
+def test_past_bars_dont_change_as_days_are_added(clock):
+    clock("2026-10-15 17:00")
+    before = _daily(SyntheticHistory(), "1mo")
+    clock("2026-10-16 17:00")
+    after = _daily(SyntheticHistory(), "1mo")
+    # without an anchor the path ends wherever it ends, the shape of earlier days is fixed
+    shared = before.index.intersection(after.index)[:-1]
+    returns = lambda frame: frame.loc[shared, "Close"].pct_change().dropna()
+    # (up to the 4dp rounding of the bars)
+    pd.testing.assert_series_equal(returns(before), returns(after), check_exact=False, atol=1e-5)
@@ -0,0 +1,112 @@
+import threading
+import time
+import pandas as pd
+import pytest
+import yahoo
+from yahoo import SingleFlight
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def _run_concurrently(flight, key, fetch, callers):
+    """starts `callers` threads on the same key once the leader is inside fetch"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fetch))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+def test_concurrent_calls_share_one_fetch():
+    flight = SingleFlight()
+    release = threading.Event()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        release.wait(5)
+        return pd.DataFrame({"Close": [1.0, 2.0]})
+
+    threads, results, errors = _run_concurrently(flight, ("download", "BHP.AX"), fetch, 5)
+    _wait_for(lambda: flight.followers.get(("download", "BHP.AX")) == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(fetches) == 1
+    assert len(results) == 5
+    # every caller gets its own frame, mutating one doesn't show up in the others
+    assert len({id(r) for r in results}) == 5
+    results[0]["Close"] = 0.0
+    assert results[1]["Close"].tolist() == [1.0, 2.0]
+
+    stats = flight.get_stats()
+    assert stats["calls"] == 5 and stats["fetches"] == 1 and stats["deduplicated"] == 4
+    assert stats["in_flight"] == 0
+    assert stats["by_kind"]["download"] == {"calls": 5, "deduplicated": 4}
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise ConnectionError("throttled")
+
+    threads, results, errors = _run_concurrently(flight, ("info", "BHP.AX"), fetch, 3)
+    _wait_for(lambda: flight.followers.get(("info", "BHP.AX")) == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert not results
+    assert len(errors) == 3 and all(isinstance(e, ConnectionError) for e in errors)
+    assert flight.get_stats()["errors"] == 1
+
+def test_nothing_is_cached_once_the_fetch_returns():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    assert flight.do(("info", "BHP.AX"), fetch) == {"n": 1}
+    assert flight.do(("info", "BHP.AX"), fetch) == {"n": 2}
+
+def test_a_failed_fetch_is_retried_by_the_next_caller():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do(("quote", "BHP.AX"), lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.do(("quote", "BHP.AX"), lambda: 42) == 42
+
+def test_download_only_shares_between_identical_symbol_sets(monkeypatch):
+    asked = []
+
+    def download(symbols, **kwargs):
+        asked.append(symbols)
+        names = [symbols] if isinstance(symbols, str) else symbols
+        return pd.concat({s: pd.DataFrame({"Close": [1.0]}) for s in names}, axis=1)
+
+    monkeypatch.setattr(yahoo.provider, "download", download)
+    monkeypatch.setattr(yahoo, "single_flight", SingleFlight())
+
+    keys = {yahoo._symbols_key(s) for s in (["BHP.AX", "CBA.AX"], ["CBA.AX", "BHP.AX"])}
+    assert len(keys) == 1
+    # differently cased symbols come back under different column names, so they're fetched apart
+    assert yahoo._symbols_key(["bhp.ax"]) != yahoo._symbols_key(["BHP.AX"])
+    assert yahoo._symbols_key("BHP.AX") != yahoo._symbols_key(["BHP.AX"])
+
+    assert "bhp.ax" in yahoo.download(["bhp.ax"], period="1d").columns.get_level_values(0)
+    assert "BHP.AX" in yahoo.download(["BHP.AX"], period="1d").columns.get_level_values(0)
+    assert asked == [["bhp.ax"], ["BHP.AX"]]
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+import pytz
+
+# intraday tick store
+# one sqlite file per trading day (ticks/ticks-YYYY-MM-DD.db) so writes never
+# contend with the main kangaroo.db lock and old days can be dropped as whole files
+
+TICK_DIR = os.getenv("TICK_DIR", "./ticks")
+
+# how often buffered ticks are written (seconds)
+TICK_FLUSH_INTERVAL = 1
+
+# drop partitions older than this
+TICK_RETENTION_DAYS = 30
+
+# partitions older than this are thinned to the last tick per ticker per minute
+TICK_COMPACT_AFTER_DAYS = 7
+
+# safety cap so a stalled disk can't eat all the memory
+MAX_BUFFERED_TICKS = 500_000
+
+SYDNEY_TZ = pytz.timezone("Australia/Sydney")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticks (
+    ticker TEXT NOT NULL,
+    ts INTEGER NOT NULL,      -- epoch ms
+    price REAL NOT NULL,
+    change REAL,
+    volume INTEGER,
+    PRIMARY KEY (ticker, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,   -- "1m", "5m", "15m"
+    ts INTEGER NOT NULL,      -- bar start, epoch seconds
+    open REAL, high REAL, low REAL, close REAL,
+    volume INTEGER,
+    PRIMARY KEY (ticker, interval, ts)
+) WITHOUT ROWID;
+"""
+
+def _partition_day(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, SYDNEY_TZ).strftime("%Y-%m-%d")
+
+def _partition_path(day: str) -> str:
+    return os.path.join(TICK_DIR, f"ticks-{day}.db")
+
+class TickStore:
+    def __init__(self):
+        self.buffer: list[tuple] = []
+        self.bar_buffer: list[tuple] = []
+        self.connections: dict[str, sqlite3.Connection] = {}
+        self.lock = threading.Lock() # guards the connections (writer thread vs readers)
+        self.last_maintenance = None
+
+    def _connect(self, day: str, create: bool = True) -> sqlite3.Connection | None:
+        conn = self.connections.get(day)
+        if conn:
+            return conn
+        path = _partition_path(day)
+        if not create and not os.path.exists(path):
+            return None
+        os.makedirs(TICK_DIR, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        self.connections[day] = conn
+        return conn
+
+    def record(self, ticks: list[tuple]):
+        """
+        buffers (ticker, ts_ms, price, change, volume) rows
+        called by the ingestor, never touches disk
+        """
+        self.buffer.extend(ticks)
+        if len(self.buffer) > MAX_BUFFERED_TICKS:
+            dropped = len(self.buffer) - MAX_BUFFERED_TICKS
+            del self.buffer[:dropped]
+            print(f"[📼] tick buffer full, dropped {dropped} oldest ticks")
+
+    def record_bars(self, bars: list[tuple]):
+        """buffers completed (ticker, interval, ts, open, high, low, close, volume) bars"""
+        self.bar_buffer.extend(bars)
+
+    def _write(self, ticks: list[tuple], bars: list[tuple] = ()):
+        by_day: dict[str, tuple[list, list]] = {}
+        for t in ticks:
+            by_day.setdefault(_partition_day(t[1]), ([], []))[0].append(t)
+        for b in bars:
+            by_day.setdefault(_partition_day(b[2] * 1000), ([], []))[1].append(b)
+
+        with self.lock:
+            for day, (tick_rows, bar_rows) in by_day.items():
+                conn = self._connect(day)
+                with conn:
+                    if tick_rows:
+                        conn.executemany("INSERT OR REPLACE INTO ticks VALUES (?, ?, ?, ?, ?)", tick_rows)
+                    if bar_rows:
+                        conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", bar_rows)
+
+    async def flush(self):
+        """writes everything buffered so far in one batch per partition"""
+        if not self.buffer and not self.bar_buffer:
+            return
+        ticks, self.buffer = self.buffer, []
+        bars, self.bar_buffer = self.bar_buffer, []
+        try:
+            await asyncio.to_thread(self._write, ticks, bars)
+        except Exception as e:
+            print(f"[📼] tick write failed: {e}")
+
+    def query(self, ticker: str, start_ms: int, end_ms: int | None = None) -> list[tuple]:
+        """returns (ts, price, change, volume) rows for a ticker, oldest first"""
+        end_ms = end_ms or int(time.time() * 1000)
+        start_day = datetime.fromtimestamp(start_ms / 1000, SYDNEY_TZ).date()
+        end_day = datetime.fromtimestamp(end_ms / 1000, SYDNEY_TZ).date()
+
+        rows = []
+        day = start_day
+        with self.lock:
+            while day <= end_day:
+                conn = self._connect(day.strftime("%Y-%m-%d"), create=False)
+                if conn:
+                    rows.extend(conn.execute(
+                        "SELECT ts, price, change, volume FROM ticks WHERE ticker = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                        (ticker, start_ms, end_ms)
+                    ).fetchall())
+                day += timedelta(days=1)
+        return rows
+
+    def query_bars(self, ticker: str, interval: str, start: int, end: int | None = None) -> list[tuple]:
+        """returns stored (ts, open, high, low, close, volume) bars, oldest first (epoch seconds)"""
+        end = end or int(time.time())
+        start_day = datetime.fromtimestamp(start, SYDNEY_TZ).date()
+        end_day = datetime.fromtimestamp(end, SYDNEY_TZ).date()
+
+        rows = []
+        day = start_day
+        with self.lock:
+            while day <= end_day:
+                conn = self._connect(day.strftime("%Y-%m-%d"), create=False)
+                if conn:
+                    rows.extend(conn.execute(
+                        "SELECT ts, open, high, low, close, volume FROM bars WHERE ticker = ? AND interval = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                        (ticker, interval, start, end)
+                    ).fetchall())
+                day += timedelta(days=1)
+        return rows
+
+    def maintain(self):
+        """
+        retention + compaction, runs once a day from the writer task
+        """
+        if not os.path.isdir(TICK_DIR):
+            return
+        today = datetime.now(SYDNEY_TZ).date()
+
+        for name in sorted(os.listdir(TICK_DIR)):
+            if not (name.startswith("ticks-") and name.endswith(".db")):
+                continue
+            day_str = name[len("ticks-"):-len(".db")]
+            try:
+                age = (today - datetime.strptime(day_str, "%Y-%m-%d").date()).days
+            except ValueError:
+                continue
+
+            with self.lock:
+                if age > TICK_RETENTION_DAYS:
+                    conn = self.connections.pop(day_str, None)
+                    if conn:
+                        conn.close()
+                    for suffix in ("", "-wal", "-shm"):
+                        path = _partition_path(day_str) + suffix
+                        if os.path.exists(path):
+                            os.remove(path)
+                    print(f"[📼] dropped tick partition {day_str}")
+
+                elif age > TICK_COMPACT_AFTER_DAYS:
+                    conn = self._connect(day_str, create=False)
+                    if not conn or conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+                        continue
+                    # keep the last tick per ticker per minute
+                    with conn:
+                        conn.execute("""
+                            DELETE FROM ticks WHERE (ticker, ts) NOT IN (
+                                SELECT ticker, MAX(ts) FROM ticks GROUP BY ticker, ts / 60000
+                            )
+                        """)
+                        conn.execute("PRAGMA user_version = 1")
+                    conn.execute("VACUUM")
+                    self.connections.pop(day_str, None)
+                    conn.close()
+                    print(f"[📼] compacted tick partition {day_str}")
+
+        self.last_maintenance = today
+
+tick_store = TickStore()
+
+async def run_tick_writer():
+    """
+    background loop that flushes buffered ticks to disk once a second
+    and runs retention/compaction once a day
+    """
+    print("[📼] tick store writer started")
+    try:
+        while True:
+            await tick_store.flush()
+
+            if tick_store.last_maintenance != datetime.now(SYDNEY_TZ).date():
+                try:
+                    await asyncio.to_thread(tick_store.maintain)
+                except Exception as e:
+                    print(f"[📼] tick maintenance failed: {e}")
+
+            await asyncio.sleep(TICK_FLUSH_INTERVAL)
+    finally:
+        # don't lose the last second of ticks on shutdown
+        if tick_store.buffer or tick_store.bar_buffer:
+            tick_store._write(tick_store.buffer, tick_store.bar_buffer)
+            tick_store.buffer = []
+            tick_store.bar_buffer = []
@@ -1,4 +1,4 @@
-import yfinance as yf # type: ignore
+import market_history
 import pandas as pd
 import asyncio
 from datetime import datetime, timedelta
@@ -23,8 +23,7 @@ async def get_volatile_days(ticker: str):
     try:
         # fetch 1y history
         sym = f"{ticker.upper()}.AX"
-        stock = yf.Ticker(sym)
-        hist = stock.history(period="1y")
+        hist = market_history.get_history(sym, period="1y")
         
         if hist.empty:
             return []
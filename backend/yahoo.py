@@ -0,0 +1,108 @@
+import copy
+import threading
+from concurrent.futures import Future
+import pandas as pd
+from data_provider import provider
+
+# single-flight wrapper around yfinance
+# concurrent callers asking for the same thing (same symbols/period/interval, same ticker attribute)
+# share one in-flight request and its result instead of each hitting yahoo, which throttles bursts
+# only requests that overlap in time are merged, nothing is cached once the fetch returns
+# the fetches themselves go to the configured data provider (live / record / fixtures, see data_provider.py)
+
+def _share(result):
+    """callers' own copy of a shared result, the endpoints add columns / reset indexes in place"""
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return result.copy()
+    if isinstance(result, (dict, list)):
+        return copy.copy(result)
+    return result
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight: dict[tuple, Future] = {}
+        self.followers: dict[tuple, int] = {}
+        self.stats = {"calls": 0, "fetches": 0, "deduplicated": 0, "errors": 0}
+        self.by_kind: dict[str, dict] = {}
+
+    def do(self, key: tuple, fetch):
+        """runs fetch() unless a call with the same key is already running, then waits for that one"""
+        with self.lock:
+            self.stats["calls"] += 1
+            kind = self.by_kind.setdefault(key[0], {"calls": 0, "deduplicated": 0})
+            kind["calls"] += 1
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+                self.followers[key] = 0
+                self.stats["fetches"] += 1
+            else:
+                self.followers[key] += 1
+                self.stats["deduplicated"] += 1
+                kind["deduplicated"] += 1
+
+        if not leader:
+            # re-raises the leader's exception
+            return _share(future.result())
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            with self.lock:
+                del self.in_flight[key]
+                self.followers.pop(key)
+                self.stats["errors"] += 1
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.in_flight[key]
+            shared = self.followers.pop(key)
+        future.set_result(result)
+        # followers copy the original, so the leader doesn't get to mutate it under them
+        return _share(result) if shared else result
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                **self.stats,
+                "in_flight": len(self.in_flight),
+                "by_kind": {k: dict(v) for k, v in self.by_kind.items()},
+            }
+
+single_flight = SingleFlight()
+
+def _symbols_key(symbols):
+    # case kept: the frame's columns are keyed by the symbols as the leader asked for them,
+    # and a string comes back shaped differently from a list, so they don't share either
+    return symbols if isinstance(symbols, str) else tuple(sorted(symbols))
+
+def _kwargs_key(kwargs: dict) -> tuple:
+    return tuple(sorted(kwargs.items()))
+
+def download(symbols, **kwargs) -> pd.DataFrame:
+    """yf.download, keyed on the symbol set and every download option (period, interval, start, ...)"""
+    kwargs.setdefault("progress", False)
+    key = ("download", _symbols_key(symbols), _kwargs_key(kwargs))
+    return single_flight.do(key, lambda: provider.download(symbols, **kwargs))
+
+def history(symbol: str, **kwargs) -> pd.DataFrame:
+    """yf.Ticker(symbol).history"""
+    key = ("history", symbol.upper(), _kwargs_key(kwargs))
+    return single_flight.do(key, lambda: provider.history(symbol, **kwargs))
+
+def ticker_data(symbol: str, attr: str):
+    """one yf.Ticker property: info, calendar, dividends, income_stmt, major_holders, ..."""
+    return single_flight.do((attr, symbol.upper()), lambda: provider.ticker_data(symbol, attr))
+
+def info(symbol: str) -> dict:
+    return ticker_data(symbol, "info")
+
+def quote(symbol: str) -> dict:
+    """last price / previous close from fast_info"""
+    return single_flight.do(("quote", symbol.upper()), lambda: provider.quote(symbol))
+
+def get_stats() -> dict:
+    return single_flight.get_stats()